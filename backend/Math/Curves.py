@@ -0,0 +1,190 @@
+import functools
+from math import log10
+import numpy as np
+
+
+# ХАРАКТЕРИСТИКИ АГРЕГАТОВ: ТРЕНИЕ В ТРУБАХ И НАПОР НАСОСА
+# Коэффициент трения Дарси (PipeModel.compute_darcy_friction) и напор насоса по
+# законам подобия (CentrifugalPump.calculate_head) считаются на каждом такте для
+# каждой трубы и насоса, причём у однотипных агрегатов - по одним и тем же формулам
+# с одними и теми же параметрами. Здесь эти формулы один раз сводятся к готовым
+# характеристикам, общим для всех агрегатов одной геометрии (кэш по параметрам):
+#
+#   FrictionTable - таблица f(Re) для векторных расчётов (Math/Network.py,
+#       Math/VectorEngine.py): геометрическая сетка по Re с линейной интерполяцией
+#       вместо логарифма и дробной степени по всему массиву. Переходная зона
+#       (Re_lam..Re_tur) линейна и воспроизводится таблицей точно, ламинарный
+#       режим (λ/Re) и Re > RE_MAX считаются по формуле. Погрешность интерполяции
+#       проверяется при построении: на SAMPLES точках внутри каждого интервала
+#       сетки относительная ошибка не больше TOLERANCE, иначе сетка сгущается вдвое.
+#       Скалярный расчёт (PipeModel.compute_darcy_friction) идёт по формуле с
+#       заранее посчитанными постоянными - для одного числа log10 дешевле поиска.
+#   PumpCurve - приведённые коэффициенты H(q, ω) = a·q² + b·q·ω + c·ω² вместо
+#       пересчёта q_ref и H_ref с делениями и степенями на каждом вызове. Насос
+#       получает свою характеристику один раз при создании.
+#
+# Характеристики неизменяемы; копии модели (Math/Fork.py) используют те же
+# объекты, а в pickle сохраняются только их параметры.
+
+RE_MAX = 1e8            # Верхняя граница таблицы трения
+TOLERANCE = 1e-6        # Допустимая относительная погрешность таблицы трения
+SAMPLES = 8             # Точек проверки внутри каждого интервала сетки
+MIN_KNOTS = 256
+MAX_KNOTS = 1 << 16
+
+
+class FrictionTable:
+    """
+    Коэффициент трения Дарси трубы как функция числа Рейнольдса - те же формулы,
+    что в PipeModel.compute_darcy_friction, с табличным турбулентным режимом.
+    re, f, slope - узлы сетки, значения и наклоны интервалов (только для чтения),
+    max_error - проверенная относительная погрешность таблицы.
+    """
+
+    def __init__(self, r, D_h, Re_lam, Re_tur, lambda_lam):
+        self.key = (r, D_h, Re_lam, Re_tur, lambda_lam)
+        self.Re_lam = Re_lam
+        self.Re_tur = Re_tur
+        self.lambda_lam = lambda_lam
+        self.roughness = (r / (3.7 * D_h)) ** 1.11
+        self.f_lam = lambda_lam / Re_lam
+        self.f_tur = 1.0 / (-1.8 * log10((6.9 / Re_tur) + self.roughness)) ** 2
+
+        knots = MIN_KNOTS
+        while True:
+            re = np.concatenate(([Re_lam], np.geomspace(Re_tur, RE_MAX, knots)))
+            f = self.exact(re)
+            error = self._interpolation_error(re, f)
+            if error <= TOLERANCE:
+                break
+            if knots >= MAX_KNOTS:
+                raise ValueError(f"Таблица трения не достигает точности {TOLERANCE}: {error:.2e} при {knots} узлах")
+            knots *= 2
+        self.max_error = error
+        self.re = re
+        self.f = f
+        self.slope = np.diff(f) / np.diff(re)
+        for value in (self.re, self.f, self.slope):
+            value.flags.writeable = False
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return friction_table, self.key
+
+    def exact(self, Re):
+        """Коэффициент трения по формулам (массив Re > 0)."""
+        Re = np.asarray(Re, dtype=float)
+        with np.errstate(divide='ignore'):
+            turbulent = 1.0 / (-1.8 * np.log10((6.9 / Re) + self.roughness)) ** 2
+        transition = self.f_lam + (self.f_tur - self.f_lam) * (Re - self.Re_lam) / (self.Re_tur - self.Re_lam)
+        return np.where(Re < self.Re_lam, self.lambda_lam / Re, np.where(Re > self.Re_tur, turbulent, transition))
+
+    def _interpolation_error(self, re, f):
+        """Наибольшая относительная ошибка интерполяции на SAMPLES точках внутри каждого интервала."""
+        t = np.arange(1, SAMPLES + 1) / (SAMPLES + 1)
+        left, right = re[:-1, None], re[1:, None]
+        points = (left + (right - left) * t).ravel()
+        exact = self.exact(points)
+        return float(np.max(np.abs(np.interp(points, re, f) - exact) / exact))
+
+    def friction_array(self, Re):
+        """
+        Коэффициент трения для массива Re. При Re < Re_lam возвращается f(Re_lam):
+        в ламинарном режиме потери считаются без коэффициента трения.
+        """
+        f = np.interp(Re, self.re, self.f)
+        high = Re > RE_MAX
+        if high.any():
+            f[high] = self.exact(Re[high])
+        return f
+
+    def friction_slope(self, Re):
+        """Коэффициент трения и его производная df/dRe для массива Re (Re >= Re_lam)."""
+        j = np.clip(np.searchsorted(self.re, Re, 'right') - 1, 0, len(self.re) - 2)
+        slope = self.slope[j]
+        f = self.f[j] + slope * (Re - self.re[j])
+        high = Re > RE_MAX
+        if high.any():
+            f[high] = self.exact(Re[high])
+            slope[high] = 0.0
+        return f, slope
+
+
+@functools.lru_cache(maxsize=None)
+def friction_table(r, D_h, Re_lam, Re_tur, lambda_lam):
+    """Общая таблица трения для труб с такой геометрией."""
+    return FrictionTable(r, D_h, Re_lam, Re_tur, lambda_lam)
+
+
+def pipe_friction_table(pipe):
+    """Таблица трения трубы PipeModel."""
+    return friction_table(pipe.r, pipe.D_h, pipe.Re_lam, pipe.Re_tur, pipe.lambda_lam)
+
+
+class FrictionTables:
+    """
+    Таблицы трения набора труб для векторных расчётов: трубы с одинаковой
+    геометрией считаются одним вызовом (обычно на станции одна геометрия).
+    """
+
+    def __init__(self, pipes):
+        tables = [pipe_friction_table(pipe) for pipe in pipes]
+        groups = {}
+        for i, table in enumerate(tables):
+            groups.setdefault(table, []).append(i)
+        self.groups = [(table, np.array(index)) for table, index in groups.items()]
+        self.single = self.groups[0][0] if len(self.groups) == 1 else None
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def friction(self, Re):
+        """Коэффициент трения всех труб набора (массив Re по трубам)."""
+        if self.single is not None:
+            return self.single.friction_array(Re)
+        f = np.empty_like(Re)
+        for table, index in self.groups:
+            f[index] = table.friction_array(Re[index])
+        return f
+
+    def friction_slope(self, Re):
+        """Коэффициент трения и df/dRe всех труб набора."""
+        if self.single is not None:
+            return self.single.friction_slope(Re)
+        f, slope = np.empty_like(Re), np.empty_like(Re)
+        for table, index in self.groups:
+            f[index], slope[index] = table.friction_slope(Re[index])
+        return f, slope
+
+
+class PumpCurve:
+    """
+    Напор насоса по законам подобия, приведённый к H(q, ω) = a·q² + b·q·ω + c·ω²
+    (как CentrifugalPump.calculate_head, без проверки минимальной скорости).
+    """
+
+    def __init__(self, a, b, c, reference_shaft_speed, impeller_diameter_scale):
+        self.key = (a, b, c, reference_shaft_speed, impeller_diameter_scale)
+        scale = impeller_diameter_scale
+        # q_ref = q·(ω0/ω)/D³, H = H_ref(q_ref)·(ω/ω0)²·D²
+        self.a = a / scale ** 4
+        self.b = b / (scale * reference_shaft_speed)
+        self.c = c * scale ** 2 / reference_shaft_speed ** 2
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return pump_curve, self.key
+
+    def head(self, q, omega):
+        """Напор (м) при расходе q и скорости omega (числа или массивы)."""
+        return (self.a * q + self.b * omega) * q + self.c * omega * omega
+
+
+@functools.lru_cache(maxsize=None)
+def pump_curve(a, b, c, reference_shaft_speed, impeller_diameter_scale):
+    """Общая характеристика для насосов с такими параметрами."""
+    return PumpCurve(float(a), float(b), float(c), float(reference_shaft_speed), float(impeller_diameter_scale))
@@ -0,0 +1,57 @@
+import copy
+import types
+import numpy as np
+
+
+# ОТВЕТВЛЕНИЕ (FORK) МОДЕЛИ
+# Копия модели для новой сессии с тем же текущим состоянием. В отличие от
+# copy.deepcopy копируется только изменяемое состояние:
+#   - числа, строки, кортежи из них - неизменяемы и общие для копий;
+#   - массивы NumPy только для чтения (writeable=False) - это параметры
+#     (характеристики агрегатов, диапазоны датчиков, индексы топологии),
+#     они общие для всех копий и в памяти не дублируются;
+#   - атрибуты из FORK_SHARED класса - неизменяемые после сборки модели
+#     структуры (например, индексы банка датчиков), общие для копий;
+#   - остальные массивы копируются, объекты, словари и списки собираются заново.
+# Объекты прочих типов (генератор случайных чисел и т.п.) копируются copy.deepcopy.
+
+_ATOMIC = frozenset((int, float, bool, complex, str, bytes, type(None),
+                     np.float64, np.int64, np.bool_, types.FunctionType, type))
+
+
+def fork(model):
+    """Копия модели с общими параметрами и собственным состоянием."""
+    return _clone(model, {})
+
+
+def _clone(value, memo):
+    cls = type(value)
+    if cls in _ATOMIC:
+        return value
+    key = id(value)
+    result = memo.get(key)
+    if result is not None:
+        return result
+
+    if cls is dict:
+        result = memo[key] = {}
+        for k, v in value.items():
+            result[k] = v if type(v) in _ATOMIC else _clone(v, memo)
+    elif cls is list:
+        result = memo[key] = []
+        result.extend(v if type(v) in _ATOMIC else _clone(v, memo) for v in value)
+    elif cls is tuple:
+        items = tuple(v if type(v) in _ATOMIC else _clone(v, memo) for v in value)
+        result = memo[key] = value if all(a is b for a, b in zip(items, value)) else items
+    elif cls is np.ndarray:
+        result = memo[key] = value if not value.flags.writeable else value.copy()
+    elif hasattr(value, "__dict__") and not isinstance(value, types.ModuleType) \
+            and not hasattr(cls, "__deepcopy__") and cls.__reduce_ex__ is object.__reduce_ex__:
+        result = memo[key] = cls.__new__(cls)
+        shared = getattr(cls, "FORK_SHARED", ())
+        result.__dict__.update({
+            k: v if k in shared or type(v) in _ATOMIC else _clone(v, memo) for k, v in vars(value).items()
+        })
+    else:
+        result = copy.deepcopy(value, memo)
+    return result
@@ -0,0 +1,66 @@
+import math
+
+
+# ПОДШАГИ ТАКТА ДЛЯ БЫСТРЫХ ПЕРЕХОДНЫХ ПРОЦЕССОВ
+# Такт модели идёт с шагом dt планировщика (0.02..10 с). Быстрые процессы - ход
+# задвижек, разгон и выбег насосов и связанные с ними расходы сети, давления и
+# ток насосов - считаются на подшагах, медленные - маслосистема (бак, нагрев масла)
+# и температуры подшипников - один раз за такт с полным dt.
+#
+# Длина подшага выбирается по текущему состоянию перед каждым подшагом:
+#   разгон/выбег - скорость ω(t) = ω_target - (ω_target - ω0)·exp(-t/τ) сеть и
+#       давления видят только в точках подшагов. Отклонение ломаной по этим точкам
+#       от кривой не больше h²/8·|ω''|, где |ω''| = |ω_target - ω|/τ² убывает со
+#       временем, поэтому подшаг h = sqrt(8·TOLERANCE·ω_ref/|ω''|) держит ошибку
+#       не выше TOLERANCE от номинальной скорости и растёт по мере затухания;
+#   ход задвижки линеен, но её состояние (движется/открыта/закрыта) меняет режим
+#       насосов - подшаг заканчивается в момент, когда задвижка доходит до цели.
+# На подшаге сначала обновляются положения задвижек и скорости насосов на его
+# конец, затем по ним решается сеть и считаются давления, расход и ток насосов.
+# Без переходных процессов такт идёт одним шагом - при частых тактах лишних
+# вычислений нет. Подшаг не короче MIN_SUBSTEP, подшагов за такт не больше
+# MAX_SUBSTEPS (последний забирает остаток такта).
+#
+# Приращения, которые раньше задавались «за такт» (подъём давления на входе,
+# спад тока при останове, нагрев подшипников), заданы скоростями в секунду: при
+# такте 1 с без подшагов результат тот же, что и раньше.
+
+TOLERANCE = 1e-3        # Допустимое отклонение скорости насоса между подшагами (доля ω_ref)
+MIN_SUBSTEP = 0.01      # с
+MAX_SUBSTEPS = 50
+
+
+def curvature_step(curvature, scale):
+    """
+    Наибольший подшаг (с), при котором ломаная по точкам подшагов отклоняется от
+    кривой с кривизной curvature не больше TOLERANCE·scale. При нулевой кривизне
+    ограничения нет (inf).
+    """
+    return math.sqrt(8 * TOLERANCE * scale / curvature) if curvature > 0 else math.inf
+
+
+class SubSteps:
+    """
+    Подшаги такта dt. next(limit) - длина очередного подшага не больше limit;
+    last - такт пройден (подшаг, выданный последним, - заключительный).
+    Такт из нулевого dt - один подшаг нулевой длины.
+    """
+
+    def __init__(self, dt):
+        self.dt = dt
+        self.remaining = dt
+        self.count = 0
+
+    @property
+    def last(self):
+        return self.remaining <= 0
+
+    def next(self, limit):
+        remaining = self.remaining
+        h = max(min(limit, remaining), MIN_SUBSTEP)
+        self.count += 1
+        # Остаток короче MIN_SUBSTEP не выделяется в отдельный подшаг
+        if h >= remaining - MIN_SUBSTEP or self.count >= MAX_SUBSTEPS:
+            h = remaining
+        self.remaining = remaining - h
+        return h
@@ -0,0 +1,255 @@
+import numpy as np
+
+from Math.Curves import FrictionTables, pump_curve
+
+
+# ГИДРАВЛИЧЕСКАЯ СЕТЬ СТАНЦИИ
+# Расходы ветвей и давления в узлах считаются на каждом такте решением
+# уравнений сети, а не задаются константами:
+#
+#   вход станции --[общая входная труба]--> входной коллектор
+#   входной коллектор --[вх. труба, вх. задвижка, насос, вых. задвижка, вых. труба]--> выходной коллектор
+#   выходной коллектор --[общая выходная труба, нагрузка]--> потребитель (давление задано)
+#
+# Последовательные элементы ветви насоса идут с одним расходом и собраны в одну
+# ветвь: перепад на ней - потери в трубах и задвижках минус напор насоса.
+# Неизвестные - расходы ветвей Q и давления узлов p. Уравнения:
+#   p_from - p_to = h(Q) для каждой ветви, сумма расходов в каждом узле = 0.
+# Решаются методом Ньютона в форме глобального градиента (Todini-Pilati):
+# якобиан разрежен - диагональ dh/dQ по ветвям и матрица инцидентности, - поэтому
+# шаг сводится к системе по узлам, которая собирается только по концам ветвей,
+# а расходы обновляются поэлементно. Стоимость итерации линейна по числу насосов.
+# Начальное приближение - решение прошлого такта (теплый старт), обычно хватает
+# 2-3 итераций.
+#
+# Единицы: расход ветвей - м³/ч (как характеристика насоса), давление - МПа;
+# трубы (PipeModel) считают потери по массовому расходу в кг/с.
+# Обратный клапан насоса: ветвь, на которой итерация дала обратный расход
+# (насос не пересиливает выходной коллектор), закрывается и выпадает из системы.
+# После сходимости закрытый клапан снова открывается, если напор насоса при
+# нулевом расходе уже выше перепада между коллекторами.
+
+FLOW_UNIT = 3600.0      # м³/ч -> м³/с
+BAR = 0.1               # 1 бар в МПа: Kv - расход (м³/ч) при перепаде 1 бар
+CV_MIN = 1e-3           # Задвижка, открытая меньше чем на 0.1%, закрывает ветвь
+Q_MIN = 1.0             # м³/ч: при меньшем расходе производная потерь берётся как при Q_MIN
+D_MIN = 1e-9            # Нижняя граница dh/dQ, МПа/(м³/ч)
+TOLERANCE = 1e-6        # Точность по расходу, м³/ч
+MAX_ITERATIONS = 50
+
+# Узлы: 0 - входной коллектор, 1 - выходной коллектор (давления неизвестны);
+# 2 - вход станции, 3 - потребитель (давления заданы)
+INLET_HEADER, OUTLET_HEADER, SOURCE, SINK = range(4)
+UNKNOWN_NODES = 2
+
+
+def _gather(objects, attr):
+    return np.array([getattr(obj, attr) for obj in objects], dtype=float)
+
+
+class HydraulicNetwork:
+    """
+    Гидравлическая сеть станции по топологии модели (Math/Topology.py).
+
+    Ветви: 0 - общая входная труба, 1..n - ветви насосов, n+1 - общая выходная
+    труба с нагрузкой. После solve():
+        flow       - расходы ветвей (м³/ч), pump_flow - расходы насосов;
+        pressure   - давления входного и выходного коллекторов (МПа);
+        pipe_flow  - массовый расход по каждой трубе топологии (кг/с);
+        valve_loss - потеря давления на каждой задвижке топологии (МПа);
+        iterations - число итераций Ньютона на последнем такте.
+    Параметры агрегатов - массивы только для чтения (общие для копий модели),
+    результаты - массивы состояния: они входят в снимок и служат тёплым стартом.
+    """
+
+    def __init__(self, model):
+        topology = model.topology
+        n = self.n_pumps = topology.n_pumps
+        branches = np.arange(1, n + 1)
+
+        # Концы ветвей (номера узлов)
+        self.link_from = np.array([SOURCE] + [INLET_HEADER] * n + [OUTLET_HEADER])
+        self.link_to = np.array([INLET_HEADER] + [OUTLET_HEADER] * n + [SINK])
+        self.is_pump = np.zeros(n + 2, dtype=bool)
+        self.is_pump[branches] = True
+        # Позиции вкладов ветвей в матрицу узлов 4x4 (развёрнутую в строку):
+        # (from, from), (to, to) - с плюсом, (from, to), (to, from) - с минусом
+        self.matrix_index = np.concatenate([
+            self.link_from * 4 + self.link_from, self.link_to * 4 + self.link_to,
+            self.link_from * 4 + self.link_to, self.link_to * 4 + self.link_from,
+        ])
+
+        # Трубы сети и их ветви
+        self.pipe_index = np.array([topology.inlet, *topology.pump_in_pipe, *topology.pump_out_pipe, topology.outlet])
+        self.pipe_link = np.concatenate(([0], branches, branches, [n + 1]))
+        pipes = list(model.pipes.values())
+        pipes = [pipes[i] for i in self.pipe_index]
+        for attr in ('L', 'S', 'D_h', 'L_eq', 'Re_lam', 'lambda_lam'):
+            setattr(self, f'pipe_{attr}', _gather(pipes, attr))
+        self.pipe_length = self.pipe_L + self.pipe_L_eq
+        # Коэффициент трения и его наклон по Re - из общих таблиц (Math/Curves.py)
+        self._friction = FrictionTables(pipes)
+
+        # Задвижки ветвей насосов
+        self.in_valve = np.array(topology.pump_in_valve)
+        self.out_valve = np.array(topology.pump_out_valve)
+        valves = list(model.valves.values())
+        self.in_kv = _gather([valves[i] for i in self.in_valve], 'kv')
+        self.out_kv = _gather([valves[i] for i in self.out_valve], 'kv')
+
+        # Характеристики насосов
+        for attr in ('min_shaft_speed_threshold', 'g'):
+            setattr(self, f'pump_{attr}', _gather(model.pumps, attr))
+        curves = [pump_curve(pump.a, pump.b, pump.c, pump.reference_shaft_speed, pump.impeller_diameter_scale)
+                  for pump in model.pumps]
+        for attr in ('a', 'b', 'c'):
+            setattr(self, f'pump_{attr}', _gather(curves, attr))
+
+        # Потребитель за выходным коллектором
+        self.load_pressure = topology.load_pressure
+        self.load_kv = topology.load_kv
+
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+        # Состояние: решение последнего такта
+        self.flow = np.zeros(n + 2)
+        self.pressure = np.array([model.inlet_pressure, self.load_pressure])
+        self.pipe_flow = np.zeros(len(topology.pipes))
+        self.valve_loss = np.zeros(len(topology.valves))
+        self.iterations = 0
+
+    @property
+    def pump_flow(self):
+        return self.flow[1:-1]
+
+    def _coefficients(self, omega, in_cv, out_cv, rho, mu):
+        """
+        Коэффициенты уравнений ветвей на такт (не меняются между итерациями):
+        трубы - по свойствам жидкости, насосы - по скоростям, задвижки - по открытию.
+        """
+        S, D_h = self.pipe_S, self.pipe_D_h
+        flow_to_mass = rho / FLOW_UNIT
+        # Потери в трубе (МПа, обе половины) через расход ветви q (м³/ч):
+        # ламинарный режим - k_lam·q, иначе - f·k_tur·q·|q|; Re = re·|q|
+        re = flow_to_mass * D_h / (S * mu)
+        k_lam = 2 * (self.pipe_lambda_lam * mu * self.pipe_length / 2) / (2 * rho * D_h ** 2 * S) * flow_to_mass / 1e6
+        k_tur = 2 * (self.pipe_length / 2) / (2 * rho * D_h * S ** 2) * flow_to_mass ** 2 / 1e6
+
+        # Напор насоса по приведённой характеристике: H(q, ω) = a·q² + b·q·ω + c·ω²;
+        # насос, который не вращается, напора не создаёт
+        spinning = omega >= self.pump_min_shaft_speed_threshold
+        speed = np.where(spinning, omega, 0.0)
+        k = rho * self.pump_g / 1e6
+        pump = (np.where(spinning, k * self.pump_a, 0.0),
+                k * self.pump_b * speed,
+                k * self.pump_c * speed ** 2)
+
+        r_in = BAR / (self.in_kv * np.maximum(in_cv, CV_MIN)) ** 2
+        r_out = BAR / (self.out_kv * np.maximum(out_cv, CV_MIN)) ** 2
+        return (re, k_lam, k_tur), pump, r_in, r_out
+
+    def _head_loss(self, q, pipe, pump, r_valves):
+        """
+        Перепад h(Q) = p_from - p_to на ветвях (МПа) и dh/dQ.
+        Производная учитывает зависимость коэффициента трения от Re (наклон таблицы).
+        """
+        n_links = self.n_pumps + 2
+        re, k_lam, k_tur = pipe
+        qp = q[self.pipe_link]
+        aq = np.abs(qp)
+        Re = re * aq
+        f, f_slope = self._friction.friction_slope(Re)
+        laminar = Re < self.pipe_Re_lam
+        loss = np.where(laminar, k_lam * qp, f * k_tur * qp * aq)
+        # d(f(re·|q|)·q·|q|)/dq = |q|·(2f + Re·df/dRe)
+        slope = np.where(laminar, k_lam, k_tur * np.maximum(aq, Q_MIN) * (2 * f + f_slope * Re))
+        h = np.bincount(self.pipe_link, loss, n_links)
+        d = np.bincount(self.pipe_link, slope, n_links)
+
+        qb = q[1:-1]
+        a, b, c = pump
+        h[1:-1] += r_valves * qb * np.abs(qb) - (a * qb ** 2 + b * qb + c)
+        d[1:-1] += 2 * r_valves * np.maximum(np.abs(qb), Q_MIN) - (2 * a * qb + b)
+
+        r_load = BAR / self.load_kv ** 2
+        h[-1] += r_load * q[-1] * abs(q[-1])
+        d[-1] += 2 * r_load * max(abs(q[-1]), Q_MIN)
+        return h, np.maximum(d, D_MIN)
+
+    def solve(self, inlet_pressure, omega, in_cv, out_cv, rho, mu):
+        """
+        Расходы и давления сети на такт. omega - скорости насосов (рад/с),
+        in_cv, out_cv - открытие входных и выходных задвижек (0..1).
+        """
+        omega = np.asarray(omega, dtype=float)
+        in_cv = np.asarray(in_cv, dtype=float)
+        out_cv = np.asarray(out_cv, dtype=float)
+        link_from, link_to = self.link_from, self.link_to
+
+        # Ветвь насоса работает, если насос вращается и обе задвижки приоткрыты
+        active = np.ones(self.n_pumps + 2, dtype=bool)
+        active[1:-1] = (omega >= self.pump_min_shaft_speed_threshold) & (in_cv > CV_MIN) & (out_cv > CV_MIN)
+        pipe, pump, r_in, r_out = self._coefficients(omega, in_cv, out_cv, rho, mu)
+        r_valves = r_in + r_out
+
+        # Перепад на ветвях от заданных давлений (вход станции, потребитель)
+        fixed = np.array([0.0, 0.0, inlet_pressure, self.load_pressure])
+        fixed_dp = fixed[link_from] - fixed[link_to]
+
+        q = np.where(active, self.flow, 0.0)
+        p = self.pressure.copy()
+        nodes = np.zeros(4)
+        check_closed = np.zeros_like(active)
+        iterations = 0
+        while iterations < MAX_ITERATIONS:
+            iterations += 1
+            h, d = self._head_loss(q, pipe, pump, r_valves)
+            inv_d = np.where(active, 1.0 / d, 0.0)
+            y = inv_d * (h - fixed_dp)
+
+            # Система по узлам: (A·D⁻¹·Aᵀ) p = A·(y - Q), A - инцидентность неизвестных узлов
+            weights = np.concatenate((inv_d, inv_d, -inv_d, -inv_d))
+            matrix = np.bincount(self.matrix_index, weights, 16).reshape(4, 4)[:UNKNOWN_NODES, :UNKNOWN_NODES]
+            w = y - q
+            rhs = (np.bincount(link_from, w, 4) - np.bincount(link_to, w, 4))[:UNKNOWN_NODES]
+            isolated = matrix.diagonal() == 0
+            if isolated.any():
+                # Узел без открытых ветвей сохраняет прежнее давление
+                matrix[isolated, isolated] = 1.0
+                rhs[isolated] = p[isolated]
+            p = np.linalg.solve(matrix, rhs)
+
+            nodes[:UNKNOWN_NODES] = p
+            q_new = np.where(active, q - y + inv_d * (nodes[link_from] - nodes[link_to]), 0.0)
+
+            # Обратный клапан: насос с обратным расходом отключается от сети
+            reverse = active & self.is_pump & (q_new < 0)
+            if reverse.any():
+                active &= ~reverse
+                check_closed |= reverse
+                q = np.where(reverse, 0.0, q_new)
+                continue
+
+            converged = np.max(np.abs(q_new - q)) <= TOLERANCE
+            q = q_new
+            if converged:
+                if check_closed.any():
+                    # Клапан открывается, если напор насоса при нулевом расходе (c)
+                    # выше перепада между коллекторами
+                    reopen = check_closed.copy()
+                    reopen[1:-1] &= pump[2] > p[OUTLET_HEADER] - p[INLET_HEADER]
+                    if reopen.any():
+                        active |= reopen
+                        check_closed &= ~reopen
+                        continue
+                break
+
+        self.flow[:] = q
+        self.pressure[:] = p
+        self.iterations = iterations
+        self.pipe_flow[self.pipe_index] = q[self.pipe_link] * rho / FLOW_UNIT
+        qb = q[1:-1]
+        self.valve_loss[self.in_valve] = r_in * qb * np.abs(qb)
+        self.valve_loss[self.out_valve] = r_out * qb * np.abs(qb)
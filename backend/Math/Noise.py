@@ -0,0 +1,85 @@
+import numpy as np
+
+
+# ИСТОЧНИК СЛУЧАЙНЫХ КОЛЕБАНИЙ
+class NoiseSource:
+    """
+    Генератор случайных колебаний модели.
+
+    Каждая модель владеет своим numpy.random.Generator, поэтому прогоны с одним
+    зерном воспроизводимы и не зависят от других моделей в процессе. Равномерные
+    числа на [0, 1) заранее вытягиваются блоками по block_size и выдаются из
+    кольцевого буфера - без обращения к генератору на каждое значение.
+    """
+
+    def __init__(self, seed=None, block_size=4096):
+        self.seed = seed
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+        self._buffer = np.empty(block_size)
+        self._refill()
+
+    def _refill(self):
+        """Вытягивает следующий блок значений."""
+        # Состояние генератора до вытягивания блока - по нему блок восстанавливается из снимка
+        self._block_state = self.rng.bit_generator.state
+        self.rng.random(out=self._buffer)
+        self._pos = 0
+
+    def reseed(self, seed=None):
+        """Новое зерно генератора (None - случайное); буфер вытягивается заново."""
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self._refill()
+
+    def snapshot_state(self):
+        """Компактное состояние для снимка модели (Math/Snapshot.py): без самого буфера."""
+        return {"block_state": self._block_state, "pos": self._pos}
+
+    def restore_state(self, state):
+        self.rng.bit_generator.state = state["block_state"]
+        self._refill()
+        self._pos = state["pos"]
+
+    def uniform(self, low, high):
+        """Одно значение, равномерно распределённое на [low, high)."""
+        if self._pos >= self.block_size:
+            self._refill()
+        u = self._buffer[self._pos]
+        self._pos += 1
+        return low + (high - low) * float(u)
+
+    def peek(self, size):
+        """Следующие size значений на [0, 1) без их выдачи (выдаются потом skip или uniform)."""
+        end = self._pos + size
+        if end <= self.block_size:
+            return self._buffer[self._pos:end]
+        # Значения следующих блоков - из копии генератора, сам генератор не сдвигается
+        rng = np.random.Generator(type(self.rng.bit_generator)())
+        rng.bit_generator.state = self.rng.bit_generator.state
+        blocks = -(-(end - self.block_size) // self.block_size)
+        return np.concatenate((self._buffer[self._pos:], rng.random(blocks * self.block_size)))[:size]
+
+    def skip(self, size):
+        """Пропускает size значений (уже полученных через peek)."""
+        while size > 0:
+            if self._pos >= self.block_size:
+                self._refill()
+            take = min(size, self.block_size - self._pos)
+            self._pos += take
+            size -= take
+
+    def uniform_array(self, low, high):
+        """Массив значений на [low, high) по форме low/high (для векторного движка)."""
+        low, high = np.broadcast_arrays(np.asarray(low, dtype=float), np.asarray(high, dtype=float))
+        size = low.size
+        u = np.empty(size)
+        filled = 0
+        while filled < size:
+            if self._pos >= self.block_size:
+                self._refill()
+            take = min(size - filled, self.block_size - self._pos)
+            u[filled:filled + take] = self._buffer[self._pos:self._pos + take]
+            self._pos += take
+            filled += take
+        return low + (high - low) * u.reshape(low.shape)
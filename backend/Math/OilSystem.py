@@ -31,13 +31,16 @@ class OilPump:
 
 # МАСЛОСИСТЕМА использует 2 маслонасоса, подает масло к насосам и подшипникам
 class OilSystem:
-    def __init__(self, pump_id: int, temp_limit = 75.0):
-        """ модель маслосистемы центробежного насоса (pump_id): идентификатор насоса (0 для NA4, 1 для NA2) """
+    def __init__(self, pump_id: int, temp_limit = 75.0, pump_name=None):
+        """ модель маслосистемы центробежного насоса (pump_id): идентификатор насоса (0 для NA4, 1 для NA2);
+        pump_name - имя насоса для тегов (по умолчанию - по pump_id) """
         self.tank = OilTank() # маслобак
         
         self.pump_id = pump_id
         
-        self.pump_name = 'NA4' if self.pump_id == 0 else 'NA2' if self.pump_id == 1 else 'UNKNOWN'
+        if pump_name is None:
+            pump_name = 'NA4' if self.pump_id == 0 else 'NA2' if self.pump_id == 1 else 'UNKNOWN'
+        self.pump_name = pump_name
         
         self.temp_limit = temp_limit  # предельная температура масла (°C)
         self.temperature = 40.0  # температура масла (°C)
@@ -65,7 +68,8 @@ class OilSystem:
         self.flow_rate = 0.0  # расход масла (л/мин)
         self.pressure = 0.0  # текущее давление (бар)
 
-    def update(self, command_main_run, command_main_stop, command_reserve_run, command_reserve_stop, dt, inlet_signals, outlet_signals, inflow_rates, outflow_rates, new_density=None, new_temp=None):
+    def update(self, command_main_run, command_main_stop, command_reserve_run, command_reserve_stop, dt, inlet_signals, outlet_signals, inflow_rates, outflow_rates, new_density=None, new_temp=None, now=None):
+        # now - модельное время (с) для колебаний давления; по умолчанию - системное время
 	
 	# обновим состояние внутреннго резервуара
         self.tank.update(inlet_signals, outlet_signals, inflow_rates, outflow_rates, new_density, new_temp, dt)
@@ -99,7 +103,8 @@ class OilSystem:
         self.flow_rate = (self.main_pump.nominal_flow * self.main_pump.pump_speed + self.reserve_pump.nominal_flow * self.reserve_pump.pump_speed) * viscosity_factor
 
         # Динамическое давление с колебаниями (для имитации реальной работы)
-        time_factor = 1 + 0.1 * math.sin(time.time() / 10)
+        now = time.time() if now is None else now
+        time_factor = 1 + 0.1 * math.sin(now / 10)
         self.pressure = min(self.main_pump.max_pressure, self.main_pump.max_pressure * total_speed * time_factor)
 
         # 3. Термодинамика: нагрев масла при работе, охлаждение всегда!!!
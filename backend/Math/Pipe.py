@@ -13,6 +13,10 @@ class PipeModel:
         self.Re_lam = 2000  # Laminar flow upper Reynolds number
         self.Re_tur = 4000  # Turbulent flow lower Reynolds number
         self.lambda_lam = 64  # Laminar friction constant (Darcy friction factor)
+        # Постоянные формулы трения - считаются один раз, а не на каждом вызове
+        self.roughness = (self.r / (3.7 * self.D_h)) ** 1.11
+        self.f_lam = self.lambda_lam / self.Re_lam
+        self.f_tur = 1.0 / (-1.8 * log10((6.9 / self.Re_tur) + self.roughness)) ** 2
         # Входные/Выходные давления
         self.p_in = 0
         self.p_out = 0
@@ -29,22 +33,20 @@ class PipeModel:
         if Re < self.Re_lam:
             return self.lambda_lam / Re
         elif Re > self.Re_tur:
-            term1 = (6.9 / Re) + (self.r / (3.7 * self.D_h)) ** 1.11
-            return 1.0 / (-1.8 * log10(term1)) ** 2
+            return 1.0 / (-1.8 * log10((6.9 / Re) + self.roughness)) ** 2
         else:
             # Linear interpolation in transition region (simplified)
-            f_lam = self.lambda_lam / self.Re_lam
-            f_tur = 1.0 / (-1.8 * log10((6.9 / self.Re_tur) + (self.r / (3.7 * self.D_h)) ** 1.11)) ** 2
-            return f_lam + (f_tur - f_lam) * (Re - self.Re_lam) / (self.Re_tur - self.Re_lam)
+            return self.f_lam + (self.f_tur - self.f_lam) * (Re - self.Re_lam) / (self.Re_tur - self.Re_lam)
 
     def compute_pressure_loss(self, m_dot, mu, rho):
         """Сама функция расчёта потери давления"""
         Re = self.compute_reynolds(m_dot, mu, rho)
-        f = self.compute_darcy_friction(Re)
 
         if Re < self.Re_lam:
             delta_p = (self.lambda_lam * mu * (self.L + self.L_eq) / 2) * (m_dot / (2 * rho * self.D_h ** 2 * self.S))
         else:
+            # Коэффициент трения нужен только вне ламинарного режима (при m_dot = 0 Re = 0)
+            f = self.compute_darcy_friction(Re)
             delta_p = (f * (self.L + self.L_eq) / 2) * (m_dot * abs(m_dot) / (2 * rho * self.D_h * self.S ** 2))
 
         return delta_p
@@ -53,7 +55,8 @@ class PipeModel:
         self.p_in = p_in
         """Рассчитываем потери давления в обоих половинах трубы"""
         delta_p_A = self.compute_pressure_loss(m_dot_A, mu, rho)
-        delta_p_B = self.compute_pressure_loss(m_dot_B, mu, rho)
+        # Расход в обеих половинах обычно одинаковый - потери не пересчитываются
+        delta_p_B = delta_p_A if m_dot_B == m_dot_A else self.compute_pressure_loss(m_dot_B, mu, rho)
 
         self.p_out = self.p_in - (delta_p_A + delta_p_B)/1e6
         self.T = temperature
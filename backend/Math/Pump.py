@@ -1,14 +1,19 @@
 import numpy as np
 import time
+from math import exp
 from Math.OilSystem import OilSystem
 from Math.Pipe import PipeModel
+from Math.Noise import NoiseSource
+from Math.Curves import pump_curve
+from Math.Integrator import curvature_step
 
 
 class CentrifugalPump:
-    def __init__(self, bond_oil_system, name):
+    def __init__(self, bond_oil_system, name, noise=None):
         # Pump parameters
         self.name = name
         self.bond_oil_system = bond_oil_system
+        self.noise = noise if noise is not None else NoiseSource()  # Источник случайных колебаний
         self.p_in_outside = 1.7
         self.p_in = 1.7  # МПа (входное давление)
         self.p_out = 1.7
@@ -23,7 +28,13 @@ class CentrifugalPump:
 
         # Motor parameters
         self.nominal_current = 10.0  # A (номинальный ток двигателя)
-        self.current_reduction_step = 0.1  # шаг уменьшения тока при остановке
+        self.current_reduction_step = 0.1  # скорость уменьшения тока при остановке (А/с)
+        self.current_response = 0.3  # доля отклонения тока от целевого, отрабатываемая за 1 с на номинальной скорости
+
+        # Скорости изменения давлений (МПа/с)
+        self.p_in_rise_rate = 0.072  # подъём давления на входе до подпора
+        self.p_drop_rate = 0.5  # падение давлений при закрытой входной задвижке
+        self.p_out_decay_rate = 0.01  # спад давления на выходе при остановке
 
         # Temperature parameters
         self.ambient_temp = 25.0  # °C (температура окружающей среды)
@@ -74,6 +85,8 @@ class CentrifugalPump:
 
         # Derived parameters
         self.a, self.b, self.c = self._calculate_head_curve_coeffs()
+        # Законы подобия, сведенные к общей для однотипных насосов характеристике (Math/Curves.py)
+        self._curve = pump_curve(self.a, self.b, self.c, self.reference_shaft_speed, self.impeller_diameter_scale)
 
         # For exponential ramp calculation
         self.start_omega = 0.0
@@ -99,23 +112,36 @@ class CentrifugalPump:
         self.start_omega = self.current_omega
         self.start_time = self.simulation_time
 
-    def calculate_omega(self, target_omega):
-        """Симулируем плавное повышение угловой скорости"""
-        t = self.simulation_time - self.start_time
+    def calculate_omega(self, target_omega, dt=0.0):
+        """Симулируем плавное повышение угловой скорости; скорость - на конец шага dt (с)"""
+        t = self.simulation_time + dt - self.start_time
         if t < 0:
             t = 0
 
         if self.na_on:  # Скорость растет только при включенном насосе
-            self.current_omega = target_omega - (target_omega - self.start_omega) * np.exp(-t / self.time_constant)
+            self.current_omega = target_omega - (target_omega - self.start_omega) * exp(-t / self.time_constant)
         else:  # Если насос выключен, скорость падает до 0
-            self.current_omega = max(0, self.start_omega * np.exp(-t / (self.time_constant / 2)))
+            self.current_omega = max(0, self.start_omega * exp(-t / (self.time_constant / 2)))
 
         return self.current_omega
 
+    def substep_limit(self):
+        """
+        Наибольший подшаг (с) по разгону/выбегу (Math/Integrator.py): на нём скорость
+        отклоняется от ломаной по точкам подшагов не больше допустимого.
+        Команда пуска/останова, ещё не обработанная control_pump, уже учитывается.
+        """
+        on = (self.na_on or self.na_start) and not self.na_stop
+        if on:
+            curvature = abs(self.reference_shaft_speed - self.current_omega) / self.time_constant ** 2
+        else:
+            curvature = self.current_omega / (self.time_constant / 2) ** 2
+        return curvature_step(curvature, self.reference_shaft_speed)
+
     def apply_fluctuation(self, value, target_max, fluctuation_range):
         """Добавляет случайные колебания, если значение близко к максимуму."""
         if value >= target_max * 0.9:
-            noise = np.random.uniform(-fluctuation_range, fluctuation_range)
+            noise = self.noise.uniform(-fluctuation_range, fluctuation_range)
             return value + noise
         return value
 
@@ -125,22 +151,23 @@ class CentrifugalPump:
         if omega < self.min_shaft_speed_threshold:
             return 0.0
 
-        q_ref = q * (self.reference_shaft_speed / omega) * (1.0 / self.impeller_diameter_scale) ** 3
-        H_ref = self.a * q_ref ** 2 + self.b * q_ref + self.c
-        return H_ref * (omega / self.reference_shaft_speed) ** 2 * (self.impeller_diameter_scale) ** 2
+        return self._curve.head(q, omega)
 
-    def calculate_pressure_gain(self, q, rho, omega=None):
-        """Вычисляем прирост давления"""
+    def calculate_pressure_gain(self, q, rho, omega=None, fluctuate=True):
+        """Вычисляем прирост давления; fluctuate - добавлять случайные колебания"""
         H = self.calculate_head(q, omega)
         delta_p = rho * self.g * H
 
-        if delta_p >= 0.8 * rho * self.g * self.max_head_zero_capacity:
-            delta_p += np.random.uniform(-self.pressure_fluctuation * 1e6, self.pressure_fluctuation * 1e6)
+        if fluctuate and delta_p >= 0.8 * rho * self.g * self.max_head_zero_capacity:
+            delta_p += self.noise.uniform(-self.pressure_fluctuation * 1e6, self.pressure_fluctuation * 1e6)
 
         return delta_p
 
-    def calculate_current(self):
-        """Расчет тока двигателя насоса с плавными переходами между режимами"""
+    def calculate_current(self, dt=1.0, fluctuate=True):
+        """
+        Расчет тока двигателя насоса с плавными переходами между режимами за шаг dt (с);
+        fluctuate - добавлять случайные колебания
+        """
         if not self.na_on or self.current_omega < self.min_shaft_speed_threshold:
             return 0.0
 
@@ -158,21 +185,22 @@ class CentrifugalPump:
         else:  # Режим с обеими закрытыми
             target_current = self.nominal_current * (self.current_omega / self.reference_shaft_speed) * 0.5
 
-        # Плавный переход к целевому току
-        current = self.current_motor_i + (target_current - self.current_motor_i) * 0.3 * (
-                    self.current_omega / self.reference_shaft_speed)
+        # Плавный переход к целевому току: за 1 с отрабатывается доля current_response·(ω/ω_ref)
+        # отклонения, за шаг dt - та же экспонента (результат не зависит от деления на шаги)
+        response = self.current_response * (self.current_omega / self.reference_shaft_speed)
+        current = target_current + (self.current_motor_i - target_current) * max(0.0, 1.0 - response) ** dt
 
         # Добавляем случайные колебания, если ток выше 80% от номинального
-        if current >= self.nominal_current * 0.8:
-            current += np.random.uniform(-self.current_fluctuation, self.current_fluctuation)
+        if fluctuate and current >= self.nominal_current * 0.8:
+            current += self.noise.uniform(-self.current_fluctuation, self.current_fluctuation)
 
         return max(0, current)
 
-    def update_temperatures(self):
-        """Изменяем температуру на выходе насоса в зависимости от режима работы"""
+    def update_temperatures(self, dt=1.0):
+        """Изменяем температуру на выходе насоса в зависимости от режима работы за шаг dt (с)"""
         if not self.na_on or self.current_omega < self.min_shaft_speed_threshold or (
                 self.NA_AI_T_1_n > self.max_operating_temp):
-            delta_temp = self.temp_cooling_rate
+            delta_temp = self.temp_cooling_rate * dt
             self.NA_AI_T_1_n = max(self.NA_AI_T_1_n - delta_temp, self.ambient_temp)
             self.NA_AI_T_2_n = max(self.NA_AI_T_2_n - delta_temp, self.ambient_temp)
             self.NA_AI_T_3_n = max(self.NA_AI_T_3_n - delta_temp, self.ambient_temp)
@@ -196,13 +224,15 @@ class CentrifugalPump:
         else:  # обе задвижки закрыты
             delta_temp = self.temp_closed_valve_rise_rate * 1.5
 
-        # Применяем изменение температуры
+        # Применяем изменение температуры (скорости - в °C/с; без давления масла - ещё 3 °C/с)
         if self.NA_AI_T_1_n < self.max_operating_temp:
-            self.NA_AI_T_1_n = self.NA_AI_T_1_n + delta_temp + int(not (self.bond_oil_system.pressure_ok)) * 3
-            self.NA_AI_T_2_n = self.NA_AI_T_2_n + delta_temp + int(not (self.bond_oil_system.pressure_ok)) * 3
-            self.NA_AI_T_3_n = self.NA_AI_T_3_n + delta_temp + int(not (self.bond_oil_system.pressure_ok)) * 3
-            self.NA_AI_T_4_n = self.NA_AI_T_4_n + delta_temp + int(not (self.bond_oil_system.pressure_ok)) * 3
-            self.NA_AI_T_5_n = self.NA_AI_T_5_n + delta_temp + int(not (self.bond_oil_system.pressure_ok)) * 3
+            delta_temp = delta_temp * dt
+            delta_oil = int(not (self.bond_oil_system.pressure_ok)) * 3 * dt
+            self.NA_AI_T_1_n = self.NA_AI_T_1_n + delta_temp + delta_oil
+            self.NA_AI_T_2_n = self.NA_AI_T_2_n + delta_temp + delta_oil
+            self.NA_AI_T_3_n = self.NA_AI_T_3_n + delta_temp + delta_oil
+            self.NA_AI_T_4_n = self.NA_AI_T_4_n + delta_temp + delta_oil
+            self.NA_AI_T_5_n = self.NA_AI_T_5_n + delta_temp + delta_oil
 
         # Добавляем дребезг
         self.NA_AI_T_1_n = self.apply_fluctuation(self.NA_AI_T_1_n, self.max_operating_temp, self.temp_fluctuation)
@@ -234,8 +264,8 @@ class CentrifugalPump:
             self.operation_mode = new_mode
             self.mode_change_time = self.simulation_time
 
-    def control_pump(self):
-        """Работа насоса в связи с командами, подающимися на него"""
+    def control_pump(self, dt=1.0):
+        """Работа насоса в связи с командами, подающимися на него; dt - длительность шага (с)"""
         if self.na_start and not self.na_on:
             self.na_on = True
             self.na_off = False
@@ -249,13 +279,29 @@ class CentrifugalPump:
             self.reset_ramp()
 
         if not self.na_on and self.current_motor_i > 0:
-            self.current_motor_i = max(0, self.current_motor_i - self.current_reduction_step)
-            self.p_out = max(self.p_in, self.p_out - 0.01)
-
-    def step(self, target_omega, q, rho, inlet, outlet):
-        """Шаг работы насоса"""
-        self.control_pump()
-        self.calculate_omega(target_omega)
+            self.current_motor_i = max(0, self.current_motor_i - self.current_reduction_step * dt)
+            self.p_out = max(self.p_in, self.p_out - self.p_out_decay_rate * dt)
+
+    def step(self, target_omega, q, rho, inlet, outlet, dt=1.0, tick_dt=None):
+        """
+        Шаг работы насоса; dt - длительность шага (с) для модельного времени.
+        Такт модели может делиться на подшаги (Math/Integrator.py): на промежуточных
+        подшагах tick_dt = 0 - считаются скорость, давления, расход и ток без случайных
+        колебаний; на последнем tick_dt - длительность такта, за которую обновляются
+        температуры. По умолчанию tick_dt = dt (такт одним шагом).
+        """
+        self.control_pump(dt)
+        self.calculate_omega(target_omega, dt)
+        self.update_operation(target_omega, q, rho, inlet, outlet, dt, tick_dt)
+
+    def update_operation(self, target_omega, q, rho, inlet, outlet, dt=1.0, tick_dt=None):
+        """
+        Вторая половина шага step при уже рассчитанной скорости на конец шага:
+        режим работы, давления, расход, ток и температуры. Станция (Math/Station.py)
+        сначала обновляет скорости насосов, затем решает сеть и вызывает этот метод.
+        """
+        tick_dt = dt if tick_dt is None else tick_dt
+        final = tick_dt > 0
 
         # Определяем текущий режим работы
         if inlet and outlet:
@@ -276,40 +322,42 @@ class CentrifugalPump:
             # Поведение насоса зависит от режима работы
             if self.operation_mode == self.OPERATION_MODE_NORMAL:
                 if self.p_in_outside > self.p_in:
-                    self.p_in = min(self.p_in + 0.072, self.p_in_outside)
-                delta_p = self.calculate_pressure_gain(q, rho)
+                    self.p_in = min(self.p_in + self.p_in_rise_rate * dt, self.p_in_outside)
+                delta_p = self.calculate_pressure_gain(q, rho, fluctuate=final)
                 self.p_out = self.p_in + (delta_p / 1e6)
-                self.NA_AI_Qmom_n = q * (self.current_omega / target_omega)
+                # На такте пуска target_omega ещё 0 - расход тоже 0 (без деления 0/0)
+                self.NA_AI_Qmom_n = q * (self.current_omega / target_omega) if target_omega > 0 else 0.0
 
             elif self.operation_mode == self.OPERATION_MODE_INLET_CLOSED:
                 # При закрытой входной задвижке
-                self.p_in = max(0, self.p_in - 0.5)  # Давление на входе падает
-                self.p_out = max(0, self.p_out - 0.5)  # Давление на выходе тоже падает
+                self.p_in = max(0, self.p_in - self.p_drop_rate * dt)  # Давление на входе падает
+                self.p_out = max(0, self.p_out - self.p_drop_rate * dt)  # Давление на выходе тоже падает
                 self.NA_AI_Qmom_n = 0.0  # Расход нулевой
 
             elif self.operation_mode == self.OPERATION_MODE_OUTLET_CLOSED:
                 # При закрытой выходной задвижке
-                delta_p = self.calculate_pressure_gain(0, rho)  # Расход нулевой
+                delta_p = self.calculate_pressure_gain(0, rho, fluctuate=final)  # Расход нулевой
                 if self.p_in_outside > self.p_in:
-                    self.p_in = min(self.p_in + 0.072, self.p_in_outside)
+                    self.p_in = min(self.p_in + self.p_in_rise_rate * dt, self.p_in_outside)
                 self.p_out = self.p_in + (delta_p / 1e6)  # Давление на выходе растет
                 self.NA_AI_Qmom_n = 0.0  # Расход нулевой
 
             elif self.operation_mode == self.OPERATION_MODE_BOTH_CLOSED:  # ИЗМЕНЕНО: обработка нового режима
-                self.p_in = max(0, self.p_in - 0.5)
-                self.p_out = max(0, self.p_out - 0.5)
+                self.p_in = max(0, self.p_in - self.p_drop_rate * dt)
+                self.p_out = max(0, self.p_out - self.p_drop_rate * dt)
                 self.NA_AI_Qmom_n = 0.0
 
             # Добавляем флуктуации расхода в штатном режиме
-            if self.operation_mode == self.OPERATION_MODE_NORMAL and self.NA_AI_Qmom_n >= 0.8 * self.nominal_capacity:
-                self.NA_AI_Qmom_n += np.random.uniform(-self.flow_fluctuation, self.flow_fluctuation)
+            if final and self.operation_mode == self.OPERATION_MODE_NORMAL and self.NA_AI_Qmom_n >= 0.8 * self.nominal_capacity:
+                self.NA_AI_Qmom_n += self.noise.uniform(-self.flow_fluctuation, self.flow_fluctuation)
 
-            self.current_motor_i = self.calculate_current()
+            self.current_motor_i = self.calculate_current(dt, fluctuate=final)
         else:
             self.NA_AI_Qmom_n = 0.0
 
-        self.update_temperatures()
-        self.simulation_time += 1.0
+        if final:
+            self.update_temperatures(tick_dt)
+        self.simulation_time += dt
 
     def get_operation_mode_name(self):
         """Возвращает текстовое название текущего режима работы"""
@@ -0,0 +1,171 @@
+import os
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from Math.Station import BKNS
+
+
+# СЦЕНАРИИ ИСПЫТАНИЙ БКНС
+# Сценарий - последовательность фаз (описание, команды, число шагов модели).
+# Команда - кортеж (имя метода модели, *аргументы), чтобы сценарии можно было
+# передавать в дочерние процессы без сериализации функций.
+_START_BOTH = [
+    ('control_pump', 0, True), ('control_pump', 1, True),
+    ('control_oil_pump', 0, True), ('control_oil_pump', 1, True),
+    ('control_valve', 'in_0', 'open'), ('control_valve', 'out_0', 'open'),
+    ('control_valve', 'in_1', 'open'), ('control_valve', 'out_1', 'open'),
+]
+
+SCENARIOS = {
+    1: ("Плавная работа одного из насосов (NA4)", [
+        ("Запуск насоса NA4", [('control_valve', 'in_0', 'open'), ('control_valve', 'out_0', 'open'),
+                               ('control_pump', 0, True), ('control_oil_pump', 0, True)], 50),
+        ("Остановка насоса NA4", [('control_pump', 0, False), ('control_oil_pump', 0, False)], 50),
+    ]),
+    2: ("Плавная работа обоих насосов", [
+        ("Запуск насоса NA4", [('control_valve', 'in_0', 'open'), ('control_valve', 'out_0', 'open'),
+                               ('control_pump', 0, True), ('control_oil_pump', 0, True)], 15),
+        ("Запуск насоса NA2", [('control_valve', 'in_1', 'open'), ('control_valve', 'out_1', 'open'),
+                               ('control_pump', 1, True), ('control_oil_pump', 1, True)], 35),
+        ("Остановка насоса NA4", [('control_pump', 0, False), ('control_oil_pump', 0, False)], 15),
+        ("Остановка насоса NA2", [('control_pump', 1, False), ('control_oil_pump', 1, False)], 35),
+    ]),
+    3: ("Работа обоих насосов и закрытие входной задвижки у одного насоса", [
+        ("Запуск обоих насосов", _START_BOTH, 25),
+        ("Закрытие входной задвижки NA4", [('control_valve', 'in_0', 'close')], 40),
+        ("Открытие входной задвижки NA4", [('control_valve', 'in_0', 'open')], 35),
+    ]),
+    4: ("Работа обоих насосов и закрытие выходной задвижки у одного насоса", [
+        ("Запуск обоих насосов", _START_BOTH, 25),
+        ("Закрытие выходной задвижки NA2", [('control_valve', 'out_1', 'close')], 40),
+        ("Открытие выходной задвижки NA2", [('control_valve', 'out_1', 'open')], 35),
+    ]),
+    5: ("Работа обоих насосов и закрытие задвижек у одного насоса", [
+        ("Запуск обоих насосов", _START_BOTH, 25),
+        ("Закрытие задвижек NA2", [('control_valve', 'in_1', 'close'), ('control_valve', 'out_1', 'close')], 40),
+        ("Открытие задвижек NA2", [('control_valve', 'in_1', 'open'), ('control_valve', 'out_1', 'open')], 35),
+    ]),
+    6: ("Работа обоих насосов и выключение маслосистемы у одного насоса", [
+        ("Запуск обоих насосов", _START_BOTH, 25),
+        ("Выключение маслосистемы NA4", [('control_oil_pump', 0, False)], 40),
+        ("Включение маслосистемы NA4", [('control_oil_pump', 0, True)], 35),
+    ]),
+    7: ("Работа обоих насосов и заклинивание (остановка) задвижки у одного насоса", [
+        ("Запуск обоих насосов", _START_BOTH, 25),
+        ("Закрытие выходной задвижки NA4", [('control_valve', 'out_0', 'close')], 4),
+        ("Остановка задвижки NA4", [('control_valve', 'out_0', 'stop')], 36),
+        ("Открытие задвижки NA4", [('control_valve', 'out_0', 'open')], 35),
+    ]),
+}
+
+# Доля номинального давления, при достижении которой насос считается вышедшим на режим
+NOMINAL_PRESSURE_FRACTION = 0.95
+
+
+def nominal_pressure(model, pump):
+    """Номинальное давление на выходе насоса (МПа): давление подпора + номинальный напор."""
+    return pump.p_in_outside + model.rho * pump.g * pump.nominal_head / 1e6
+
+
+def run_scenario(model, scenario_id, dt=1.0, on_phase=None, on_step=None):
+    """
+    Прогоняет сценарий на модели с фиксированным шагом dt и возвращает показатели по насосам:
+    peak_temperature - максимальная температура подшипников (°C),
+    time_to_nominal - время от начала сценария до выхода на номинальное давление (с) или None.
+
+    on_phase(description) и on_step(model) - необязательные обработчики для вывода хода сценария.
+    """
+    if scenario_id not in SCENARIOS:
+        raise ValueError(f"Сценарий {scenario_id} не определён")
+
+    _, phases = SCENARIOS[scenario_id]
+    pump_count = len(model.pumps)
+    targets = [nominal_pressure(model, pump) * NOMINAL_PRESSURE_FRACTION for pump in model.pumps]
+    peak_temperature = [-np.inf] * pump_count
+    time_to_nominal = [None] * pump_count
+    start_time = model.model_time
+
+    for description, commands, steps in phases:
+        if on_phase is not None:
+            on_phase(description)
+        for method, *args in commands:
+            getattr(model, method)(*args)
+
+        for _ in range(steps):
+            model.update_system(dt)
+            fields = model.status_fields()
+            # Подшипники - T1..T4, T5 - температура воды в гидропяте
+            bearing = np.max(fields['temps'][:4], axis=0)
+            for pump_id in range(pump_count):
+                peak_temperature[pump_id] = max(peak_temperature[pump_id], float(bearing[pump_id]))
+                if time_to_nominal[pump_id] is None and fields['pressure_out'][pump_id] >= targets[pump_id]:
+                    time_to_nominal[pump_id] = model.model_time - start_time
+            if on_step is not None:
+                on_step(model)
+
+    return {'peak_temperature': peak_temperature, 'time_to_nominal': time_to_nominal}
+
+
+def _run_seeded(task):
+    """Один прогон ансамбля в дочернем процессе: свежая модель со своим зерном ГСЧ."""
+    topology, scenario_id, seed, dt, model_kwargs = task
+    # Модель печатает каждую команду - в ансамбле этот вывод не нужен
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        model = BKNS(seed=seed, topology=topology, **model_kwargs)
+        return run_scenario(model, scenario_id, dt)
+
+
+def _summary(values):
+    """Статистика по прогонам: среднее, СКО, минимум, максимум и перцентили."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return None
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        'mean': float(values.mean()), 'std': float(values.std()),
+        'min': float(values.min()), 'max': float(values.max()),
+        'p5': float(p5), 'p50': float(p50), 'p95': float(p95),
+    }
+
+
+def run_ensemble(topology, scenario_id, runs=100, seed=None, dt=1.0, processes=None, model_kwargs=None):
+    """
+    Запускает runs независимых копий модели по сценарию в пуле процессов.
+    topology - топология станции, как у BKNS (путь к JSON или словарь; None - стандартная БКНС):
+    обычно TOPOLOGY из конфигурации сессии.
+
+    Зёрна прогонов порождаются из seed через np.random.SeedSequence, поэтому ансамбль
+    воспроизводим при одинаковом seed. Возвращает зёрна, показатели каждого прогона
+    и сводную статистику по насосам.
+    """
+    if scenario_id not in SCENARIOS:
+        raise ValueError(f"Сценарий {scenario_id} не определён")
+
+    seeds = [int(s) for s in np.random.SeedSequence(seed).generate_state(runs)]
+    tasks = [(topology, scenario_id, s, dt, model_kwargs or {}) for s in seeds]
+
+    workers = processes or os.cpu_count() or 1
+    chunksize = max(1, runs // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_seeded, tasks, chunksize=chunksize))
+
+    pumps = []
+    for pump_id in range(len(results[0]['peak_temperature']) if results else 0):
+        peaks = [r['peak_temperature'][pump_id] for r in results]
+        times = [r['time_to_nominal'][pump_id] for r in results if r['time_to_nominal'][pump_id] is not None]
+        pumps.append({
+            'peak_temperature': _summary(peaks),
+            'time_to_nominal': _summary(times),
+            'reached_nominal': len(times),
+        })
+
+    return {
+        'scenario': scenario_id,
+        'title': SCENARIOS[scenario_id][0],
+        'runs': runs,
+        'dt': dt,
+        'seeds': seeds,
+        'results': results,
+        'pumps': pumps,
+    }
@@ -0,0 +1,160 @@
+import json
+import struct
+import types
+import zlib
+import numpy as np
+
+
+# ДВОИЧНЫЙ СНИМОК СОСТОЯНИЯ МОДЕЛИ
+# Снимок содержит только значения: числа и флаги всех агрегатов, датчиков и
+# массивов движка. Структура модели (какой атрибут какого объекта) не хранится,
+# а берётся из живой модели того же config.py - в снимке только её контрольная
+# сумма. Поэтому снимок занимает единицы килобайт и восстанавливается за
+# миллисекунды, без пересоздания объектов.
+#
+# Формат: MAGIC | длина заголовка (uint32) | заголовок JSON | zlib(коды типов, значения, массивы)
+#
+# Обход модели:
+#   - атрибуты с "_" в начале - служебные кэши, не сохраняются;
+#   - атрибуты из SNAPSHOT_EXCLUDE класса не сохраняются (например, версия статуса);
+#   - объекты с методами snapshot_state()/restore_state(state) (NoiseSource)
+#     сохраняют своё состояние сами, оно пишется в заголовок;
+#   - строки (состояние задвижки "open"/"moving"/..., имена) пишутся в заголовок;
+#   - массивы только для чтения - параметры модели, не сохраняются.
+
+MAGIC = b"BKNSSNP1"
+
+# Коды типов скалярных значений
+_FLOAT, _INT, _BOOL, _NONE = 0, 1, 2, 3
+_DECODE = {
+    _FLOAT: float,
+    _INT: int,
+    _BOOL: bool,
+    _NONE: lambda value: None,
+}
+
+
+def _scalar_code(value):
+    if value is None:
+        return _NONE
+    if isinstance(value, (bool, np.bool_)):
+        return _BOOL
+    if isinstance(value, (int, np.integer)):
+        return _INT
+    if isinstance(value, (float, np.floating)):
+        return _FLOAT
+    return None
+
+
+def _collect(model):
+    """
+    Обходит модель и возвращает (скаляры, строки, массивы, объекты со своим состоянием, пути).
+    Скаляр и строка - (контейнер, ключ, значение); для объектов ключ - имя атрибута.
+    """
+    scalars, strings, arrays, stateful, paths = [], [], [], [], []
+    seen = set()
+
+    def visit(container, key, value, path):
+        code = _scalar_code(value)
+        if code is not None:
+            scalars.append((container, key, value))
+            paths.append(path)
+            return
+        if isinstance(value, str):
+            strings.append((container, key, value))
+            paths.append(f"{path}:str")
+            return
+        if id(value) in seen:
+            return
+        seen.add(id(value))
+        if isinstance(value, np.ndarray):
+            if not value.flags.writeable:
+                return
+            arrays.append(value)
+            paths.append(f"{path}:{value.dtype.str}{value.shape}")
+        elif hasattr(value, "snapshot_state"):
+            stateful.append(value)
+            paths.append(f"{path}:state")
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                visit(value, k, v, f"{path}[{k!r}]")
+        elif isinstance(value, list):
+            for i, v in enumerate(value):
+                visit(value, i, v, f"{path}[{i}]")
+        elif isinstance(value, tuple):
+            for i, v in enumerate(value):
+                # Кортежи неизменяемы - сохраняются только вложенные объекты
+                if _scalar_code(v) is None and not isinstance(v, str):
+                    visit(value, i, v, f"{path}[{i}]")
+        elif hasattr(value, "__dict__") and not callable(value) and not isinstance(value, types.ModuleType):
+            exclude = getattr(type(value), "SNAPSHOT_EXCLUDE", ())
+            for k, v in vars(value).items():
+                if not k.startswith("_") and k not in exclude:
+                    visit(value, k, v, f"{path}.{k}")
+
+    visit(None, None, model, "")
+    return scalars, strings, arrays, stateful, paths
+
+
+def _assign(container, key, value):
+    if isinstance(container, (dict, list)):
+        container[key] = value
+    else:
+        setattr(container, key, value)
+
+
+def _layout(paths):
+    return zlib.crc32("\n".join(paths).encode("utf-8"))
+
+
+def save_state(model):
+    """Двоичный снимок состояния модели (bytes)."""
+    scalars, strings, arrays, stateful, paths = _collect(model)
+    codes = np.fromiter((_scalar_code(value) for _, _, value in scalars), dtype=np.uint8, count=len(scalars))
+    values = np.fromiter(
+        (0.0 if value is None else float(value) for _, _, value in scalars), dtype=np.float64, count=len(scalars)
+    )
+    header = json.dumps({
+        "layout": _layout(paths),
+        "scalars": len(scalars),
+        "strings": [value for _, _, value in strings],
+        "arrays": [array.nbytes for array in arrays],
+        "states": [obj.snapshot_state() for obj in stateful],
+    }).encode("utf-8")
+    body = b"".join([codes.tobytes(), values.tobytes()] + [np.ascontiguousarray(a).tobytes() for a in arrays])
+    return MAGIC + struct.pack("<I", len(header)) + header + zlib.compress(body, 1)
+
+
+def load_state(model, data):
+    """
+    Восстанавливает состояние модели из снимка save_state. Модель должна быть
+    собрана тем же config.py (совпадает структура), иначе ValueError.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Это не снимок модели")
+    offset = len(MAGIC)
+    header_len, = struct.unpack_from("<I", data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + header_len])
+    body = zlib.decompress(data[offset + header_len:])
+
+    scalars, strings, arrays, stateful, paths = _collect(model)
+    if header["layout"] != _layout(paths) or header["scalars"] != len(scalars) \
+            or len(header["strings"]) != len(strings) or header["arrays"] != [array.nbytes for array in arrays]:
+        raise ValueError("Снимок сделан для модели другой структуры")
+
+    count = len(scalars)
+    codes = np.frombuffer(body, dtype=np.uint8, count=count)
+    values = np.frombuffer(body, dtype=np.float64, count=count, offset=count)
+    for (container, key, _), code, value in zip(scalars, codes.tolist(), values.tolist()):
+        _assign(container, key, _DECODE[code](value))
+    for (container, key, _), value in zip(strings, header["strings"]):
+        _assign(container, key, value)
+
+    position = count * 9
+    for array, size in zip(arrays, header["arrays"]):
+        # Массивы заполняются на месте: на них могут ссылаться представления (views)
+        array[...] = np.frombuffer(body, dtype=array.dtype, count=array.size, offset=position).reshape(array.shape)
+        position += size
+    for obj, state in zip(stateful, header["states"]):
+        obj.restore_state(state)
@@ -0,0 +1,864 @@
+import os
+import time
+import numpy as np
+from itertools import repeat
+from typing import Dict, List
+from Math.OilSystem import OilSystem
+from Math.Pump import CentrifugalPump
+from Math.Noise import NoiseSource
+from Math.Pipe import PipeModel
+from Math.Valve import Valve
+from Math.Integrator import SubSteps
+from Math.Network import OUTLET_HEADER, HydraulicNetwork
+from Math.Topology import SENSOR_GROUPS, load_topology
+from Math.VectorEngine import VectorEngine
+from Math.sensors.sensor_bank import SensorBank
+from Math.sensors.valve_sensors import ValveTemperatureSensor, ValvePressureSensor,ValvePositionSensor
+from Math.sensors.pump_sensors import PumpFlowSensor,PumpMotorCurrentSensor,PumpPressureSensor,PumpShaftSpeedSensor,PumpTemperatureSensor
+from Math.sensors.pipe_sensors import PipePressureSensor,PipeTemperatureSensor
+from Math.sensors.oil_sensors import  OilFlowSensor, OilTemperatureSensor
+from Math.sensors.tank_sensors import TankLevelSensor, TankDensitySensor, TankTemperatureSensor, TankFlowRateSensor
+
+
+# Описания станций (топологии, см. Math/Topology.py); bkns.json - стандартная БКНС из 2 насосов
+STATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stations")
+DEFAULT_TOPOLOGY = os.path.join(STATIONS_DIR, "bkns.json")
+
+
+def _sensor_factory(sensor_class):
+    return lambda unit, **args: sensor_class(**args)
+
+
+# Типы датчиков для описания топологии: имя класса -> фабрика(агрегат, **args)
+SENSOR_TYPES = {
+    sensor_class.__name__: _sensor_factory(sensor_class)
+    for sensor_class in (
+        ValveTemperatureSensor, ValvePressureSensor, ValvePositionSensor,
+        PumpTemperatureSensor, PumpPressureSensor, PumpMotorCurrentSensor, PumpFlowSensor, PumpShaftSpeedSensor,
+        PipePressureSensor, PipeTemperatureSensor,
+        OilFlowSensor, OilTemperatureSensor,
+        TankDensitySensor, TankTemperatureSensor, TankFlowRateSensor,
+    )
+}
+# Диапазон уровнемера - объём маслобака
+SENSOR_TYPES['TankLevelSensor'] = lambda tank, **args: TankLevelSensor(**{'volume_max': tank.volume_max, **args})
+
+# Физические величины, которые измеряют датчики группы ("input" канала в топологии),
+# в порядке столбцов BKNS._sensor_inputs и VectorEngine.sensor_inputs
+SENSOR_INPUTS = {
+    'valve': ('temperature', 'pressure', 'position'),
+    'pump': ('T1', 'T2', 'T3', 'T4', 'T5', 'pressure', 'motor_current', 'flow', 'shaft_speed'),
+    'pipe': ('pressure', 'temperature'),
+    'oil': ('flow', 'temperature'),
+    'tank': ('level', 'density', 'temperature', 'flow'),
+}
+
+
+class CommandLimits:
+    """
+    Допустимые аргументы команд управления станции: число насосов и маслосистем,
+    ключи задвижек. Проверяет вызов control_* до постановки в очередь команд
+    (model_runner.CommandQueue) с теми же ошибками, что сами методы BKNS;
+    в режиме "process" передаётся в основной процесс через pickle.
+    """
+
+    VALVE_COMMANDS = ("open", "close", "stop")
+
+    def __init__(self, pumps: int, oil_systems: int, valves):
+        self.pumps = pumps
+        self.oil_systems = oil_systems
+        self.valves = tuple(valves)
+
+    def check(self, name: str, args):
+        if name == "control_pump":
+            pump_id, _ = args
+            if pump_id not in range(self.pumps):
+                raise ValueError(f"Invalid pump_id. Must be in range 0..{self.pumps - 1}.")
+        elif name == "control_oil_pump":
+            pump_id, _ = args
+            if pump_id not in range(self.oil_systems):
+                raise ValueError(f"Invalid pump_id. Must be in range 0..{self.oil_systems - 1}.")
+        elif name == "control_valve":
+            valve_key, command_or_bool = args
+            if valve_key not in self.valves:
+                raise ValueError(f"Invalid valve lock key: {valve_key}")
+            if isinstance(command_or_bool, str):
+                if command_or_bool not in self.VALVE_COMMANDS:
+                    raise ValueError(f"Invalid valve control command: {command_or_bool}")
+            elif not isinstance(command_or_bool, bool):
+                raise TypeError("command_or_bool must be of type str or bool")
+
+
+class BKNS:
+    """
+    Насосная станция, собранная по описанию топологии (Math/Topology.py).
+    Каждый насос имеет входную задвижку и выходную;
+    После задвижек идут трубы -входная и выходная.
+    Трубы выходят в общую выходную и общую входную.
+    Каждый насос подключен к маслосистеме.
+    Стандартная БКНС (stations/bkns.json): 2 насоса
+        2 маслосистемы
+        4 задвижки
+        6 труб (2 входные, 2 выходные, 1 общая входная, 1 общая выходная)
+
+    topology - путь к файлу JSON, словарь с описанием или Topology
+    (по умолчанию - стандартная БКНС). Станции на 8 или 16 насосов
+    описываются так же, без нового класса (пример - stations/bkns8.json).
+
+    Расходы через насосы и давления в коллекторах считает гидравлическая сеть
+    (Math/Network.py) по характеристикам насосов, открытию задвижек и потерям
+    в трубах; потребитель за станцией задаётся в топологии ("load").
+
+    Режим расчёта задаётся параметром engine:
+        "scalar" - каждый агрегат обновляется своим объектом (по умолчанию);
+        "vector" - состояние всех агрегатов хранится в массивах NumPy
+                   и обновляется одним пакетным шагом (см. Math/VectorEngine.py);
+                   быстрее скалярного только на больших станциях (от ~32 насосов).
+
+    seed - зерно генератора случайных колебаний модели (None - случайное).
+    При одинаковом seed прогоны модели воспроизводимы, в том числе между режимами:
+    векторный движок берёт колебания из генератора в том же порядке, что и
+    скалярный, и расходится с ним лишь в пределах точности таблиц трения (Math/Curves.py).
+    """
+
+    ENGINES = ("scalar", "vector")
+
+    # Не входят в двоичный снимок состояния (Math/Snapshot.py): версия статуса только
+    # растёт, а время последнего обновления - реальное, а не модельное; топология - не состояние
+    SNAPSHOT_EXCLUDE = ("status_version", "last_update_time", "topology")
+
+    # Топология неизменяема и общая для копий модели (Math/Fork.py)
+    FORK_SHARED = ("topology",)
+
+    def __init__(self,inlet_pressure=1.9, inlet_temperature=25.0, engine="scalar", seed=None, topology=None):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Invalid engine: {engine}. Must be one of {self.ENGINES}.")
+
+        # Топология станции: агрегаты и связи между ними по номерам
+        self.topology = topology = load_topology(DEFAULT_TOPOLOGY if topology is None else topology)
+
+        # Генератор случайных колебаний, общий для всех агрегатов модели
+        self.noise = NoiseSource(seed)
+        
+        #Параметры для входной трубы (если труба откуда-то идет)
+        self.inlet_pressure = inlet_pressure  # По умолчанию 1.9 (относительное давление)
+        self.inlet_temperature = inlet_temperature  # По умолчанию 25°C
+
+        # Маслосистемы (в стандартной БКНС - своя у каждого насоса)
+        self.oil_systems = [
+            OilSystem(oil_id, pump_name=name) for oil_id, name in enumerate(topology.oil_systems)
+        ]
+
+        # Команды управления маслонасосами: 
+        # для каждого маслонасоса отдельные флаги запуска/остановки
+        self.oil_pump_commands = [{'start': False, 'stop': True} for _ in self.oil_systems]
+
+        # Инициализация насосов с привязкой к соответствующим маслосистемам
+        self.pumps = [
+            CentrifugalPump(self.oil_systems[topology.pump_oil[pump_id]], name, self.noise)
+            for pump_id, name in enumerate(topology.pumps)
+        ]
+
+        # Задвижки: входные и выходные для каждого насоса
+        self.valves = {key: Valve() for key in topology.valves}
+
+        # Трубы входные и выходные для каждого насоса, а также общие
+        # (общая входная - до разделения, общая выходная - после объединения)
+        self.pipes = {key: PipeModel() for key in topology.pipes}
+
+        # Связи по номерам для шага модели: (насос, вх. задвижка, вых. задвижка, вх. труба, вых. труба)
+        valves, pipes = list(self.valves.values()), list(self.pipes.values())
+        self._units = [
+            (pump, valves[topology.pump_in_valve[i]], valves[topology.pump_out_valve[i]],
+             pipes[topology.pump_in_pipe[i]], pipes[topology.pump_out_pipe[i]])
+            for i, pump in enumerate(self.pumps)
+        ]
+        self._inlet_pipe = pipes[topology.inlet]
+        self._outlet_pipe = pipes[topology.outlet]
+
+        # Физические параметры жидкости
+        self.rho = 1000       # Плотность жидкости [кг/м3]
+        self.mu = 1e-3        # Динамическая вязкость [Па·с]
+
+        # Сигналы и расходы маслобаков - по строке на маслосистему топологии, по значению на клапан бака.
+        # Пока что так, дальше надо будет корректировать !
+        tank_valves = [len(oil_system.tank.inlet_valves) for oil_system in self.oil_systems]
+        self.oil_inlet_signals = [[True] * n for n in tank_valves]
+        self.oil_outlet_signals = [[True] * n for n in tank_valves]
+        self.oil_inflow_rates = [[1.0] * n for n in tank_valves]
+        self.oil_outflow_rates = [[1.0] * n for n in tank_valves]
+        
+        #Датчики: каналы группы из топологии - на каждый агрегат группы
+        #(задвижки и трубы - по ключу, насосы, маслосистемы и маслобаки - по номеру)
+        units = {
+            'valve': self.valves,
+            'pump': dict(enumerate(self.pumps)),
+            'pipe': self.pipes,
+            'oil': dict(enumerate(self.oil_systems)),
+            'tank': {i: oil_system.tank for i, oil_system in enumerate(self.oil_systems)},
+        }
+        sensors = {}
+        for group in SENSOR_GROUPS:
+            channels = topology.sensors[group]
+            for sensor_name, sensor_type, _, source, _ in channels:
+                if sensor_type not in SENSOR_TYPES:
+                    raise ValueError(f"Неизвестный тип датчика {sensor_type}. Допустимо: {sorted(SENSOR_TYPES)}")
+                if source not in SENSOR_INPUTS[group]:
+                    raise ValueError(f"Датчик {sensor_name}: величина {source!r} не измеряется в группе {group}. "
+                                     f"Допустимо: {SENSOR_INPUTS[group]}")
+            sensors[group] = {
+                key: {sensor_name: SENSOR_TYPES[sensor_type](unit, **args)
+                      for sensor_name, sensor_type, _, _, args in channels}
+                for key, unit in units[group].items()
+            }
+        self.valve_sensors = sensors['valve']
+        self.pump_sensors = sensors['pump']
+        self.pipe_sensors = sensors['pipe']
+        self.oil_sensors = sensors['oil']
+        self.tank_sensors = sensors['tank']
+
+        #Банк датчиков: все датчики модели в общих массивах, пересчёт тока за один проход
+        self.sensor_bank = SensorBank()
+        for group, sensors in self._sensor_groups():
+            for sensor_name, _, value_name, _, _ in topology.sensors[group]:
+                for key, unit_sensors in sensors.items():
+                    self.sensor_bank.register(group, key, value_name, unit_sensors[sensor_name])
+        self.sensor_bank.build()
+        # Столбцы физических величин для банка в порядке регистрации: (группа, номер величины)
+        self._sensor_columns = tuple(
+            (group, SENSOR_INPUTS[group].index(source))
+            for group in SENSOR_GROUPS for _, _, _, source, _ in topology.sensors[group]
+        )
+
+        #Значения с датчиков - представления банка {key: {value_name: мА}}
+        self.valve_sensor_values = self.sensor_bank.values('valve')
+        self.pump_sensor_values = self.sensor_bank.values('pump')
+        self.pipe_sensor_values = self.sensor_bank.values('pipe')
+        self.oil_sensor_values = self.sensor_bank.values('oil')
+        self.tank_sensor_values = self.sensor_bank.values('tank')
+
+        # Таймер для обновления состояния и модельное время (с)
+        self.last_update_time = time.time()
+        self.model_time = 0.0
+
+        # Гидравлическая сеть: расходы ветвей и давления коллекторов на каждый такт
+        self.network = HydraulicNetwork(self)
+
+        # Векторный движок (только для engine="vector")
+        self.engine = VectorEngine(self) if engine == "vector" else None
+
+        # Снимок get_status и версии тегов: обновляются один раз за такт в update_system
+        self._status_layout = self._status_tags()
+        self.status_version = 0
+        self._status = None
+        self._tag_versions = {}  # (component, param) -> версия, в которой тег последний раз изменился
+
+
+    def  update_system(self, dt=None):
+        """
+        Основной метод обновления состояния всей системы.
+        Выполняется циклически для симуляции работы БКНС.
+
+        dt - фиксированный шаг модели (с). Если не задан, шаг берётся
+        по реальному времени с предыдущего обновления. Быстрые процессы (ход
+        задвижек, разгон и выбег насосов) внутри такта считаются подшагами
+        (Math/Integrator.py), медленные (маслосистемы, температуры) - одним шагом dt.
+        """
+
+        #Для большей плавности и корректной работы модели
+        current_time = time.time()  # Получаем текущее время в секундах с начала эпохи
+        if dt is None:
+            dt = current_time - self.last_update_time  # Вычисляем разницу с предыдущим обновлением
+        self.last_update_time = current_time  # Обновляем время последнего обновления
+        self.model_time += dt
+
+        if self.engine is not None:
+            # Все агрегаты обновляются одним пакетным шагом
+            self.engine.step(self, dt, self.model_time)
+            self._update_sensors()
+            self._refresh_status()
+            return
+
+        # Обновляем маслосистемы с учётом команд запуска/остановки маслонасосов - медленная
+        # часть такта, один шаг на весь dt.
+        # Важно: маслосистема запускается только по команде, без автоматического запуска
+        for pump_id, oil_system in enumerate(self.oil_systems):
+            cmd = self.oil_pump_commands[pump_id]
+            oil_system.update(
+                command_main_run=cmd['start'],
+                command_main_stop=cmd['stop'],
+                command_reserve_run=False,  # Резервный маслонасос всегда выключен
+                command_reserve_stop=True,
+                dt=dt,
+                inlet_signals=self.oil_inlet_signals[pump_id],
+                outlet_signals=self.oil_outlet_signals[pump_id],
+                inflow_rates=self.oil_inflow_rates[pump_id],
+                outflow_rates=self.oil_outflow_rates[pump_id],
+                now=self.model_time
+            )
+
+        # Быстрая часть такта - задвижки, сеть, трубы и насосы - идёт подшагами
+        # по разгону/выбегу насосов и ходу задвижек (Math/Integrator.py)
+        steps = SubSteps(dt)
+        while True:
+            h = steps.next(self._substep_limit())
+            self._fast_step(h, dt if steps.last else 0.0)
+            if steps.last:
+                break
+
+        # Обновляем общую выходную трубу: давление - в выходном коллекторе по решению сети,
+        # температура - средняя по выходным трубам
+        units = self._units
+        network = self.network
+        avg_temp = sum(unit[4].T for unit in units) / len(units)
+        m_dot = float(network.pipe_flow[self.topology.outlet])
+
+        self._outlet_pipe.compute_output_pressure(
+            p_in=float(network.pressure[OUTLET_HEADER]),
+            m_dot_A=m_dot,
+            m_dot_B=m_dot,
+            mu=self.mu,
+            rho=self.rho,
+            temperature=avg_temp
+        )
+        
+        #Обновление данных на датчиках
+        self._update_sensors()
+        self._refresh_status()
+
+    def _substep_limit(self):
+        """Наибольший подшаг быстрой части такта: до конца хода задвижки и по разгону/выбегу насосов."""
+        limit = min(valve.travel_time() for valve in self.valves.values())
+        return min(limit, min(pump.substep_limit() for pump in self.pumps))
+
+    def _fast_step(self, dt, tick_dt):
+        """
+        Подшаг dt быстрой части такта: задвижки, гидравлическая сеть, трубы и насосы.
+        tick_dt - длительность такта на последнем подшаге (0 на остальных, см. CentrifugalPump.step).
+        """
+        # Обновляем состояние всех задвижек
+        for valve in self.valves.values():
+            valve.update(dt)
+
+        # Команды пуска/останова и скорости насосов на конец подшага
+        for pump in self.pumps:
+            pump.control_pump(dt)
+            pump.calculate_omega(pump.reference_shaft_speed if pump.na_on else 0.0, dt)
+
+        # Расходы и давления сети по скоростям насосов и открытию задвижек на конец подшага
+        units = self._units
+        network = self.network
+        network.solve(
+            self.inlet_pressure,
+            [unit[0].current_omega for unit in units],
+            [unit[1].get_opening_coefficient() for unit in units],
+            [unit[2].get_opening_coefficient() for unit in units],
+            self.rho, self.mu
+        )
+        topology = self.topology
+        pipe_flow = network.pipe_flow.tolist()
+        valve_loss = network.valve_loss.tolist()
+        pump_flow = network.pump_flow.tolist()
+
+        # Обновляем общую входную трубу (рассчитываем давление и температуру)
+        main_inlet = self._inlet_pipe
+        m_dot = pipe_flow[topology.inlet]
+        main_inlet.compute_output_pressure(
+            p_in=self.inlet_pressure,  # Входное давление в систему
+            m_dot_A=m_dot,             # Массовый расход в порту A
+            m_dot_B=m_dot,             # Массовый расход в порту B
+            mu=self.mu,                # Вязкость жидкости
+            rho=self.rho,              # Плотность жидкости
+            temperature=self.inlet_temperature  # Температура жидкости на входе
+        )
+
+        # Обновляем насосы, трубы и задвижки (связи - из топологии)
+        for pump_id, (pump, in_valve, out_valve, in_pipe, out_pipe) in enumerate(units):
+
+            # Обновляем входную трубу насоса (от общей входной трубы)
+            m_dot = pipe_flow[topology.pump_in_pipe[pump_id]]
+            in_pipe.compute_output_pressure(
+                p_in=main_inlet.p_out,
+                m_dot_A=m_dot,
+                m_dot_B=m_dot,
+                mu=self.mu,
+                rho=self.rho,
+                temperature=main_inlet.T
+            )
+                
+            # Обновляем насос: подпор - давление после входной задвижки, расход - из решения сети
+            pump.p_in_outside = in_pipe.p_out - valve_loss[topology.pump_in_valve[pump_id]]
+            target_omega = pump.reference_shaft_speed if pump.na_on else 0.0
+            q = pump_flow[pump_id]
+            # Получаем состояния задвижек (True - открыта, False - закрыта)
+            inlet_open = in_valve.state == "open" or  in_valve.state == "moving" or in_valve.state == "stopped"  # можно считать двигающуюся задвижку частично открытой
+            outlet_open = out_valve.state == "open" or out_valve.state == "moving"
+            pump.update_operation(target_omega, q, self.rho, inlet_open, outlet_open, dt=dt, tick_dt=tick_dt)
+
+            # За закрытой выходной задвижкой давление не передаётся
+            if out_valve.get_opening_coefficient() > 0:
+                p_before_out_pipe = pump.p_out - valve_loss[topology.pump_out_valve[pump_id]]
+            else:
+                p_before_out_pipe = 0.0
+
+            # Обновляем давление и температуру в выходной трубе
+            m_dot = pipe_flow[topology.pump_out_pipe[pump_id]]
+            out_pipe.compute_output_pressure(
+                p_in=p_before_out_pipe,
+                m_dot_A=m_dot,
+                m_dot_B=m_dot,
+                mu=self.mu,
+                rho=self.rho,
+                temperature=self.inlet_temperature
+            )
+                
+            # Обновляем состояние задвижек
+            in_valve.update_conditions(
+                pressure=in_pipe.p_out,
+                temperature=in_pipe.T
+            )
+            out_valve.update_conditions(
+                pressure=out_pipe.p_out,
+                temperature=out_pipe.T
+            )
+
+    def simulate(self, steps: int, dt: float = 1.0, actions=None, record_every: int = 1) -> List[Dict]:
+        """
+        Пакетный прогон модели быстрее реального времени с фиксированным шагом dt.
+
+        actions - {номер шага: [callable(model), ...]}, команды выполняются
+        перед соответствующим шагом. Возвращает траекторию: список
+        {"step", "time", "status"} каждые record_every шагов и на последнем шаге.
+        """
+        actions = actions or {}
+        record_every = max(1, int(record_every))
+        trajectory = []
+        for step in range(steps):
+            for action in actions.get(step, ()):
+                action(self)
+            self.update_system(dt)
+            if (step + 1) % record_every == 0 or step == steps - 1:
+                trajectory.append({
+                    "step": step + 1,
+                    "time": round(self.model_time, 3),
+                    "status": self.get_status(),
+                })
+        return trajectory
+
+    def _sensor_inputs(self):
+        """
+        Физические величины для датчиков: для каждой группы - кортеж столбцов
+        (по одному на величину из SENSOR_INPUTS), значения в порядке агрегатов.
+        """
+        valves = list(self.valves.values())
+        pipes = list(self.pipes.values())
+        tanks = [oil_system.tank for oil_system in self.oil_systems]
+        return {
+            'valve': ([v.temperature for v in valves], [v.pressure for v in valves], [v.current_position for v in valves]),
+            'pump': ([p.NA_AI_T_1_n for p in self.pumps], [p.NA_AI_T_2_n for p in self.pumps],
+                     [p.NA_AI_T_3_n for p in self.pumps], [p.NA_AI_T_4_n for p in self.pumps],
+                     [p.NA_AI_T_5_n for p in self.pumps], [p.p_out for p in self.pumps],
+                     [p.current_motor_i for p in self.pumps], [p.NA_AI_Qmom_n for p in self.pumps],
+                     [p.current_omega for p in self.pumps]),
+            'pipe': ([p.p_out for p in pipes], [p.T for p in pipes]),
+            'oil': ([o.flow_rate for o in self.oil_systems], [o.temperature for o in self.oil_systems]),
+            'tank': ([t.level_radar for t in tanks], [t.density_meter for t in tanks],
+                     [t.temperature_sensor for t in tanks], [t.flow_meter for t in tanks]),
+        }
+
+    def _sensor_groups(self):
+        """Группы датчиков в порядке регистрации в банке."""
+        return (
+            ('valve', self.valve_sensors),
+            ('pump', self.pump_sensors),
+            ('pipe', self.pipe_sensors),
+            ('oil', self.oil_sensors),
+            ('tank', self.tank_sensors),
+        )
+
+    def _update_sensors(self):
+        """Пересчёт токовых сигналов всех датчиков одним векторным проходом банка."""
+        inputs = self.engine.sensor_inputs() if self.engine is not None else self._sensor_inputs()
+        physical = np.concatenate([
+            np.asarray(inputs[group][column], dtype=float)
+            for group, column in self._sensor_columns
+        ])
+        self.sensor_bank.convert(physical)
+
+    def reseed(self, seed=None):
+        """Новое зерно генератора колебаний (для копий модели из шаблона сессии)."""
+        self.noise.reseed(seed)
+
+    def command_limits(self) -> CommandLimits:
+        """Допустимые аргументы control_* для проверки команд до постановки в очередь."""
+        return CommandLimits(len(self.pumps), len(self.oil_systems), self.valves)
+
+    def control_pump(self, pump_id: int, start: bool):
+        """
+        Управление насосом (включение/выключение)
+    
+        """
+        print(f"[MathModel] Передан тег {pump_id} с параметром {start}")
+        if pump_id not in range(len(self.pumps)):
+            raise ValueError(f"Invalid pump_id. Must be in range 0..{len(self.pumps) - 1}.")
+
+        if self.engine is not None:
+            self.engine.control_pump(pump_id, start)
+            return
+            
+        if start:
+            
+            self.pumps[pump_id].na_start = True
+            self.pumps[pump_id].na_stop = False
+
+        else:
+            self.pumps[pump_id].na_start = False
+            self.pumps[pump_id].na_stop = True
+    
+    def control_oil_pump(self, pump_id: int, start: bool):
+        """
+        Управление маслонасосом, отдельное от основного насоса.
+        start=True — запустить маслонасос, False — остановить.
+        """
+        print(f"[MathModel] Передан тег {pump_id} с параметром {start}")
+        if pump_id not in range(len(self.oil_systems)):
+            raise ValueError(f"Invalid pump_id. Must be in range 0..{len(self.oil_systems) - 1}.")
+
+        self.oil_pump_commands[pump_id]['start'] = start
+        self.oil_pump_commands[pump_id]['stop'] = not start
+        if self.engine is not None:
+            self.engine.control_oil_pump(pump_id, start)
+
+    def control_valve(self, valve_key: str, command_or_bool):
+        """
+        Управление задвижкой
+        """
+        print(f"[MathModel] Задвижка {valve_key} с параметром {command_or_bool}")
+        if valve_key not in self.valves:
+            raise ValueError(f"Invalid valve lock key: {valve_key}")
+        
+        valve = self.valves[valve_key]
+        
+        if isinstance(command_or_bool, bool):
+            command = "open" if command_or_bool else "close"
+        elif isinstance(command_or_bool, str):
+            if command_or_bool not in ("open", "close", "stop"):
+                raise ValueError(f"Invalid valve control command: {command_or_bool}")
+            command = command_or_bool
+        else:
+            raise TypeError("command_or_bool must be of type str or bool")
+
+        if self.engine is not None:
+            self.engine.control_valve(valve_key, command)
+            return
+
+        valve.control(command)
+    
+    
+    def status_fields(self) -> Dict:
+        """
+        Значения для get_status в виде списков по агрегатам (в порядке pumps/oil_systems/valves):
+        для расчётов по всем насосам сразу без разбора имён тегов (см. Math/Scenarios.py).
+        """
+        if self.engine is not None:
+            return self.engine.status_fields()
+
+        pumps = self.pumps
+        return {
+            'na_on': [pump.na_on for pump in pumps],
+            'na_off': [pump.na_off for pump in pumps],
+            'motor_i': [pump.current_motor_i for pump in pumps],
+            'pressure_in': [unit[3].p_out for unit in self._units],
+            'pressure_out': [pump.p_out for pump in pumps],
+            'temps': [[pump.NA_AI_T_1_n for pump in pumps], [pump.NA_AI_T_2_n for pump in pumps],
+                      [pump.NA_AI_T_3_n for pump in pumps], [pump.NA_AI_T_4_n for pump in pumps],
+                      [pump.NA_AI_T_5_n for pump in pumps]],
+            'flow': [pump.NA_AI_Qmom_n for pump in pumps],
+            'oil_running': [oil_system.running for oil_system in self.oil_systems],
+            'oil_pressure_ok': [oil_system.pressure_ok for oil_system in self.oil_systems],
+            'oil_pressure': [oil_system.pressure for oil_system in self.oil_systems],
+            'valve_state': [valve.state for valve in self.valves.values()],
+        }
+
+    def get_status(self) -> Dict:
+        """
+        Снимок состояния {component: {param: value}} на последний такт.
+        Снимок собирается один раз за такт и не изменяется после выдачи.
+        """
+        if self._status is None:
+            self._refresh_status()
+        return self._status
+
+    def get_changes(self, since=None):
+        """
+        Теги, изменившиеся после версии since: (текущая версия, {component: {param: value}}).
+        При since=None возвращается полный снимок.
+        """
+        status, tag_versions = self.get_status(), self._tag_versions
+        if since is None:
+            return self.status_version, status
+
+        changes = {}
+        for (component, param), version in tag_versions.items():
+            if version > since:
+                changes.setdefault(component, {})[param] = status[component][param]
+        return self.status_version, changes
+
+    def _refresh_status(self):
+        """
+        Пересобирает снимок и отмечает версией теги, значения которых изменились.
+        Снимок и версии тегов заменяются новыми объектами, а не меняются на месте:
+        читатели из другого потока (режим исполнения "thread") видят целый такт.
+        """
+        status = self._build_status()
+        previous = self._status or {}
+        version = self.status_version + 1
+        tag_versions = dict(self._tag_versions)
+        changed = False
+        for component, params in status.items():
+            old = previous.get(component, {})
+            if old == params:
+                # Компонент не изменился - без сравнения по тегам
+                continue
+            for param, value in params.items():
+                if param not in old or old[param] != value:
+                    tag_versions[(component, param)] = version
+                    changed = True
+        self._tag_versions = tag_versions
+        self._status = status
+        if changed:
+            self.status_version = version
+
+    def _status_tags(self):
+        """
+        Имена тегов get_status - строятся один раз, а не на каждом такте:
+        [(компонент, имена параметров)] для насосов, маслосистем и концевиков
+        выходных задвижек; значения _build_status подставляет в том же порядке.
+        """
+        pumps = [
+            (f'pump_{pump_id}', (
+                # Основные параметры работы
+                # 'na4_start: pump.na_start,
+                # 'na4_stop': pump.na_stop,
+                f'{pump.name.lower()}_on',
+                f'{pump.name.lower()}_off',
+                f'{pump.name.lower()}_motor_i',
+
+                # Давления
+                f'{pump.name.lower()}_pressure_in',
+                f'{pump.name.lower()}_pressure_out',
+
+                # Температуры
+                f'{pump.name.upper()}_AI_T_1_n',  # T1 - рабочий подшипник
+
+                f'{pump.name.upper()}_DI_kojuh',  # Его нет!!! # Состояние механических частей
+                f'{pump.name.upper()}_AI_T_2_n',  # T2 - полевой подшипник
+                f'{pump.name.upper()}_AI_T_3_n',  # T3 - подшипник двигателя (рабочий)
+                f'{pump.name.upper()}_AI_T_4_n',  # T4 - подшипник двигателя (полевой)
+                f'{pump.name.upper()}_AI_T_5_n',  #  для гидроопоры
+
+                # Параметры потока
+                f'{pump.name.upper()}_AI_Qmom_n',
+            ))
+            for pump_id, pump in enumerate(self.pumps)
+        ]
+        oil_systems = [
+            (f"oil_system_{id}", (
+                # Параметры маслосистемы
+                f'{oil_system.pump_name.upper()}_DI_FL_MS',
+                f'{oil_system.pump_name.upper()}_DI_FL_MS_P',
+                f'{oil_system.pump_name.upper()}_AI_P_Oil_Nas_n',
+            #   'NA4_oil_motor_start': self.oil_pump_commands[pump_id]['start'],
+            #   'NA4_oil_motor_stop': self.oil_pump_commands[pump_id]['stop'],
+
+            #'temperature': oil_system.temperature - в управлении нет такого тега
+            ))
+            for id, oil_system in enumerate(self.oil_systems)
+        ]
+        # Концевики выходных задвижек; теги - по имени насоса, которому задвижка принадлежит
+        valve_keys = self.topology.valves
+        valves = [
+            (f"valve_{valve_keys[valve_index]}", (
+                f'{pump.name.upper()}_DI_Zadv_Open',
+                f'{pump.name.upper()}_DI_Zadv_Close',
+                # 'NA4_CMD_Zadv_Open': valve.target_position == 100.0,
+                # 'NA4_CMD_Zadv_Close': valve.target_position == 0.0,
+            ))
+            for pump, valve_index in zip(self.pumps, self.topology.pump_out_valve)
+        ]
+        return pumps, oil_systems, valves
+
+    def _build_status(self) -> Dict:
+        status = {}
+        fields = self.status_fields()
+        temps = fields['temps']
+        pump_tags, oil_tags, valve_tags = self._status_layout
+
+        # Собираем данные по каждому насосу (значения - в порядке имён из _status_tags)
+        rows = zip(fields['na_on'], fields['na_off'], fields['motor_i'],
+                   fields['pressure_in'], fields['pressure_out'],
+                   temps[0], repeat(True), temps[1], temps[2], temps[3], temps[4],
+                   fields['flow'])
+        for (component, tags), row in zip(pump_tags, rows):
+            status[component] = dict(zip(tags, row))
+
+        rows = zip(fields['oil_running'], fields['oil_pressure_ok'], fields['oil_pressure'])
+        for (component, tags), row in zip(oil_tags, rows):
+            status[component] = dict(zip(tags, row))
+
+        valve_states = fields['valve_state']
+        for (component, tags), valve_index in zip(valve_tags, self.topology.pump_out_valve):
+            valve_state = valve_states[valve_index]
+            status[component] = dict(zip(tags, (valve_state == "open", valve_state == "closed")))
+
+            #Текущий режим работы насоса
+            #'operation_mode': pump.get_operation_mode_name()
+            
+            
+
+        #         #Значения с датчиков
+        # for key, values in self.valve_sensor_values.items():
+        #     status['valve_sensors'][key] = {
+        #         'temperature_current_mA': values['temperature_current_mA'],
+        #         'pressure_current_mA': values['pressure_current_mA'],
+        #         'position_current_mA': values['position_current_mA']
+        #     }
+
+        # for pump_id, values in self.pump_sensor_values.items():
+        #     status['pump_sensors'][pump_id] = {
+        #         'bearing_work_temp_current_mA': values['bearing_work_temp_current_mA'],
+        #         'bearing_field_temp_current_mA': values['bearing_field_temp_current_mA'],
+        #         'motor_bearing_work_temp_current_mA': values['motor_bearing_work_temp_current_mA'],
+        #         'motor_bearing_field_temp_current_mA': values['motor_bearing_field_temp_current_mA'],
+        #         'hydro_support_temp_current_mA': values['hydro_support_temp_current_mA'],
+        #         'pressure_current_mA': values['pressure_current_mA'],
+        #         'motor_current_current_mA': values['motor_current_current_mA'],
+        #         'flow_current_mA': values['flow_current_mA'],
+        #         'shaft_speed_current_mA': values['shaft_speed_current_mA']
+        #     }
+
+        # for key, values in self.pipe_sensor_values.items():
+        #     status['pipe_sensors'][key] = {
+        #         'pressure_current_mA': values['pressure_current_mA'],
+        #         'temperature_current_mA': values['temperature_current_mA']
+        #     }        
+
+        # for i, values in self.oil_sensor_values.items():
+        #     status['oil_sensors'][i] = {
+        #         'flow_current_mA': values['flow_current_mA'],
+        #         'temperature_current_mA': values['temperature_current_mA'],
+        #     }
+
+        # for i, values in self.tank_sensor_values.items():
+        #     status['tank_sensors'][i] = {
+        #         'level_current_mA': values['level_current_mA'],
+        #         'density_current_mA': values['density_current_mA'],
+        #         'temperature_current_mA': values['temperature_current_mA'],
+        #         'flow_current_mA': values['flow_current_mA']
+        #     }
+
+        return status
+    
+    def _format_sensors_table(self, status: Dict) -> str:
+        lines = []
+        lines.append("=== Датчики (ток 4-20 мА) ===\n")
+
+        # Задвижки
+        lines.append(f"{'Valve':<8} {'Temp':>6} {'Pres':>6} {'Pos':>6}")
+        for key, val in status.get('valve_sensors', self.valve_sensor_values).items():
+            lines.append(f"{key:<8} "
+                        f"{val['temperature_current_mA']:6.2f} "
+                        f"{val['pressure_current_mA']:6.2f} "
+                        f"{val['position_current_mA']:6.2f}")
+        lines.append("")
+
+        # Насосы
+        lines.append(f"{'PumpID':<6} {'T1':>6} {'T2':>6} {'T3':>6} {'T4':>6} {'Hydro':>6} {'Pres':>6} {'MotorI':>7} {'Flow':>6} {'Speed':>6}")
+        for pump_id, val in status.get('pump_sensors', self.pump_sensor_values).items():
+            lines.append(f"{pump_id:<6} "
+                        f"{val['bearing_work_temp_current_mA']:6.2f} "
+                        f"{val['bearing_field_temp_current_mA']:6.2f} "
+                        f"{val['motor_bearing_work_temp_current_mA']:6.2f} "
+                        f"{val['motor_bearing_field_temp_current_mA']:6.2f} "
+                        f"{val['hydro_support_temp_current_mA']:6.2f} "
+                        f"{val['pressure_current_mA']:6.2f} "
+                        f"{val['motor_current_current_mA']:7.2f} "
+                        f"{val['flow_current_mA']:6.2f} "
+                        f"{val['shaft_speed_current_mA']:6.2f}")
+        lines.append("")
+
+        # Трубы
+        lines.append(f"{'Pipe':<10} {'Pres':>6} {'Temp':>6}")
+        for key, val in status.get('pipe_sensors', self.pipe_sensor_values).items():
+            lines.append(f"{key:<10} "
+                        f"{val['pressure_current_mA']:6.2f} "
+                        f"{val['temperature_current_mA']:6.2f}")
+        lines.append("")
+
+        # Маслосистемы
+        lines.append(f"{'OilSys':<6} {'Flow':>6} {'Temp':>6}")
+        for i, val in status.get('oil_sensors', self.oil_sensor_values).items():
+            lines.append(f"{i:<6} "
+                        f"{val['flow_current_mA']:6.2f} "
+                        f"{val['temperature_current_mA']:6.2f}")
+        lines.append("")
+
+        # Маслобаки
+        lines.append(f"{'Tank':<6} {'Level':>6} {'Density':>8} {'Temp':>6} {'Flow':>6}")
+        for i, val in status.get('tank_sensors', self.tank_sensor_values).items():
+            lines.append(f"{i:<6} "
+                        f"{val['level_current_mA']:6.2f} "
+                        f"{val['density_current_mA']:8.2f} "
+                        f"{val['temperature_current_mA']:6.2f} "
+                        f"{val['flow_current_mA']:6.2f}")
+        lines.append("")
+
+        return "\n".join(lines)
+
+
+    def __str__(self):
+        """
+        Возвращает текстовое представление состояния системы.
+
+        """
+        status = self.get_status()
+        output = []
+        
+        # Общая информация
+        output.append("=== Состояние БКНС ===")
+        output.append(f"Входные параметры: Давление={status['main_inlet']['pressure']:.4f} МПа")
+        output.append(f"Выходные параметры: Давление={status['main_outlet']['pressure']:.4f} МПа\n")
+
+        # Детальная информация по каждому насосу
+        for pump_name, pump_data in status['pumps'].items():
+            output.append(
+                f"Насос {pump_name} (ID {pump_data['pump_id']}):\n"
+                f"  Режим работы: {pump_data['operation_mode']}\n"
+                f"  Старт: {pump_data['start']}, Стоп: {pump_data['stop']}, "
+                f"Вкл: {pump_data['on']}, Выкл: {pump_data['off']}\n"
+                f"  Ток двигателя: {pump_data['motor_i']:.2f} А\n"
+                f"  Давление вход: {pump_data['pressure_in']:.3f} МПа, "
+                f"выход: {pump_data['pressure_out']:.3f} МПа\n"
+                f"  Температуры:\n"
+                f"    Подшипник (раб.): {pump_data['bearing_work_temp']:.1f}°C\n"
+                f"    Подшипник (поле): {pump_data['bearing_field_temp']:.1f}°C\n"
+                f"    Мотор (раб.): {pump_data['motor_bearing_work_temp']:.1f}°C\n"
+                f"    Мотор (поле): {pump_data['motor_bearing_field_temp']:.1f}°C\n"
+                f"    Гидроподшипник: {pump_data['hydro_support_temp']:.1f}°C\n"
+                f"  Маслосистема: {'запущена' if pump_data['oil_system_running'] else 'остановлена'}, "
+                f"Давление: {pump_data['oil_pressure']:.2f} бар ,"
+                f"Температура масла: {pump_data['oil_temperature']:.1f}°C\n"
+                f"  Команды маслонасоса: старт={pump_data['oil_pump_start_cmd']}, стоп={pump_data['oil_pump_stop_cmd']}\n"
+                f"  Входная задвижка: состояние: "
+                f"{'открыта' if pump_data['in_valve_open'] else 'закрыта' if pump_data['in_valve_closed'] else 'в движении'}, "
+                f"команды: открыть={pump_data['in_valve_open_cmd']}, закрыть={pump_data['in_valve_close_cmd']}\n"
+                f"  Выходная задвижка: состояние: "
+                f"{'открыта' if pump_data['out_valve_open'] else 'закрыта' if pump_data['out_valve_closed'] else 'в движении'}, "
+                f"команды: открыть={pump_data['out_valve_open_cmd']}, закрыть={pump_data['out_valve_close_cmd']}\n"
+                f"  Расход: {pump_data['flow_rate']:.3f} м³/с\n"
+            )
+        
+        output.append("")
+        # Добавляем таблицу с датчиками
+        output.append(self._format_sensors_table(status))
+        return "\n".join(output)
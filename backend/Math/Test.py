@@ -1,348 +1,210 @@
+import contextlib
+import json
+import math
+import os
+import sys
 import time
-from BKNS import BKNS
+from Math.Scenarios import SCENARIOS, run_ensemble, run_scenario
+from Math.Snapshot import load_state, save_state
+from Math.Station import BKNS, DEFAULT_TOPOLOGY
+from session_config import load_config
 
+# Конфигурация сессии, из которой берётся топология станции (запуск из папки backend: python -m Math.Test)
+CONFIG_PATH = "../sessions/bkns/config.py"
 
 
-def tests (bkns:BKNS,test_id=None):
+def session_topology(config_path=CONFIG_PATH):
+    """Топология станции из конфигурации сессии (TOPOLOGY; если не задана - стандартная БКНС)"""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        config = load_config("test", config_path)
+    return getattr(config, "TOPOLOGY", None)
 
-    try:
-        valid_scenarios = {1, 2, 3, 4, 5, 6, 7} #индексы сценариев
 
-        if test_id not in valid_scenarios:
+def tests (bkns,test_id=None):
+    """
+    Функция для запуска определенного сценария для объекта БКНС (см. Math.Scenarios.SCENARIOS).
+    В качестве результата выводится таблица значений с датчиков
+    """
+
+    try:
+        if test_id not in SCENARIOS:
             print(f"Предупреждение: сценарий {test_id} не определён. Запускается предыдущий сценарий.")
             test_id = 1
-        
 
         print(f"\n=== Запуск сценария {test_id} ===")
+        print(f"\n=== {SCENARIOS[test_id][0]} ===")
 
-        match test_id:
-            
-            #Функция для запуска определенного сценария для объекта БКНС. 
-            #В качестве результата выводится таблица значений с датчиков
-
-            case 1:
-
-            #Пояснение происходящего
-                print(f"\n=== Плавная работа одного из насосов (NA4) ===")
-
-            # Сценарий 1: Плавный запуск и остановка насоса NA4 с нагревом
-
-                print(f"\nЗапуск насоса NA4")
-                #Открытие задвижек
-                bkns.control_valve('in_0', 'open') 
-                bkns.control_valve('out_0', 'open') 
-                #Запуск насосов
-                bkns.control_pump(0, start=True) 
-                bkns.control_oil_pump(0, start=True)  
-
-                #Работа насоса NA4 - ожидается рост давления, скорости насоса и тока, легкий рост температуры
-                for _ in range(50):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОстановка насоса NA4")
-                #Остановка насосов, задвижки оставляем
-                bkns.control_pump(0, start=False)
-                bkns.control_oil_pump(0, start=False)
-
-                #Плавная остановка насоса NA4 - ожидается падение давления, скорости насоса и тока, остывание
-                for _ in range(50):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)            
-
-
-            case 2:
-
-            #Пояснение происходящего
-                print(f"\n=== Плавная работа обоих насосов  ===")
-
-            #Сценарий 2: Работа сначала одного насоса, а после и второго (работа 2 насосов одновременно)
-
-                print(f"\nЗапуск насоса NA4")
-                #Открытие задвижек
-                bkns.control_valve('in_0', 'open') 
-                bkns.control_valve('out_0', 'open') 
-                #Запуск насосов
-                bkns.control_pump(0, start=True) 
-                bkns.control_oil_pump(0, start=True)  
-
-                #Работа насоса NA4 - ожидается
-                for _ in range(15):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nЗапуск насоса NA2")
-                #Открытие задвижек
-                bkns.control_valve('in_1', 'open')
-                bkns.control_valve('out_1', 'open')
-                #Запуск насосов
-                bkns.control_pump(1, start=True) 
-                bkns.control_oil_pump(1, start=True)  
-
-                #Работа обоих насосов - ожидается
-                for _ in range(35):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОстановка насоса NA4")
-                #Остановка насосов, задвижки оставляем
-                bkns.control_pump(0, start=False)
-                bkns.control_oil_pump(0, start=False)
-
-                #Плавная остановка насоса NA4 - ожидается
-                for _ in range(15):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОстановка насоса NA2") 
-                #Остановка насосов, задвижки оставляем 
-                bkns.control_pump(1, start=False)
-                bkns.control_oil_pump(1, start=False)
-
-                #Плавная остановка обоих насосов - ожидается
-                for _ in range(35):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-                
-
-            case 3:
-
-            #Пояснение происходящего
-                print(f"\n=== Работа обоих насосов и закрытие входной задвижки у одного насоса ===")
-     
-            #Сценарий 3: Работа обоих насосов и переход одного в режим закрытой входной задвижки
-
-                print(f"\nЗапуск обоих насосов")
-                #Запуск насосов
-                bkns.control_pump(0, start=True)
-                bkns.control_pump(1, start=True)
-                bkns.control_oil_pump(0, start=True)
-                bkns.control_oil_pump(1, start=True)
-                #Открытие задвижек
-                for key in ['in_0', 'out_0', 'in_1', 'out_1']:
-                    bkns.control_valve(key, 'open') 
-
-                #Работа обоих насосов - ожидается
-                for _ in range(25):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                #Закрытие входной задвижки - ожидается 
-                print(f"\nЗакрытие входной задвижки NA4")
-                bkns.control_valve('in_0', 'close')
-                for _ in range(40):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОткрытие входной задвижки NA4")
-                #Открытие задвижки
-                bkns.control_valve('in_0', 'open') 
-
-                #Возобновление прежней работы - ожидается 
-                for _ in range(35):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-            case 4:
-
-            #Пояснение происходящего
-                print(f"\n=== Работа обоих насосов и закрытие выходной задвижки у одного насоса ===")
-     
-            #Сценарий 4: Работа обоих насосов и переход одного в режим закрытой выходной задвижки
-
-                print(f"\nЗапуск обоих насосов")
-                #Запуск насосов
-                bkns.control_pump(0, start=True)
-                bkns.control_pump(1, start=True)
-                bkns.control_oil_pump(0, start=True)
-                bkns.control_oil_pump(1, start=True)
-                #Открытие задвижек
-                for key in ['in_0', 'out_0', 'in_1', 'out_1']:
-                    bkns.control_valve(key, 'open') 
-
-                #Работа обоих насосов - ожидается 
-                for _ in range(25):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                #Закрытие выходной задвижки - ожидается 
-                print(f"\nЗакрытие выходной задвижки NA2")
-                bkns.control_valve('out_1', 'close')
-                for _ in range(40):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОткрытие выходной задвижки NA2")
-                #Открытие задвижки
-                bkns.control_valve('out_1', 'open') 
-
-                #Возобновление прежней работы - ожидается 
-                for _ in range(35):
-
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-            case 5:
-
-            #Пояснение происходящего
-                print(f"\n=== Работа обоих насосов и закрытие задвижек у одного насоса ===")
-     
-            #Сценарий 5: Работа обоих насосов и переход одного в режим закрытых задвижек 
-
-                print(f"\nЗапуск обоих насосов")
-                #Запуск насосов
-                bkns.control_pump(0, start=True)
-                bkns.control_pump(1, start=True)
-                bkns.control_oil_pump(0, start=True)
-                bkns.control_oil_pump(1, start=True)
-                #Открытие задвижек
-                for key in ['in_0', 'out_0', 'in_1', 'out_1']:
-                    bkns.control_valve(key, 'open') 
-
-                #Работа обоих насосов - ожидается 
-                for _ in range(25):
-
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                #Закрытие задвижек - ожидается 
-                print(f"\nЗакрытие задвижек NA2")
-                bkns.control_valve('in_1', 'close')
-                bkns.control_valve('out_1', 'close')
-                for _ in range(40):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОткрытие задвижек NA2")
-                #Открытие задвижки
-                bkns.control_valve('in_1', 'open') 
-                bkns.control_valve('out_1', 'open') 
-
-                #Возобновление прежней работы - ожидается 
-                for _ in range(35):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-            case 6:
-
-            #Пояснение происходящего
-                print(f"\n=== Работа обоих насосов и выключение маслосистемы у одного насоса ===")
-     
-            #Сценарий 6: Работа обоих насосов и переход одного в режим выключенной маслосистемы
-
-                print(f"\nЗапуск обоих насосов")
-                #Запуск насосов
-                bkns.control_pump(0, start=True)
-                bkns.control_pump(1, start=True)
-                bkns.control_oil_pump(0, start=True)
-                bkns.control_oil_pump(1, start=True)
-                #Открытие задвижек
-                for key in ['in_0', 'out_0', 'in_1', 'out_1']:
-                    bkns.control_valve(key, 'open') 
-
-                #Работа обоих насосов - ожидается 
-                for _ in range(25):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                #Выключение маслосистемы NA4- ожидается 
-                print(f"\nВыключение маслосистемы NA4")
-                bkns.control_oil_pump(0, start=False)
-                for _ in range(40):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nВключение маслосистемы NA4")
-                #Включение маслосистемы NA4
-                bkns.control_oil_pump(0, start=True)
-
-                #Возобновление прежней работы - ожидается 
-                for _ in range(35):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-            case 7:
-
-            #Пояснение происходящего
-                print(f"\n=== Работа обоих насосов и заклинивание (остановка) задвижки у одного насоса ===")
-     
-            #Сценарий 7: Работа обоих насосов и переход одного в режим выключенной маслосистемы
-
-                print(f"\nЗапуск обоих насосов")
-                #Запуск насосов
-                bkns.control_pump(0, start=True)
-                bkns.control_pump(1, start=True)
-                bkns.control_oil_pump(0, start=True)
-                bkns.control_oil_pump(1, start=True)
-                #Открытие задвижек
-                for key in ['in_0', 'out_0', 'in_1', 'out_1']:
-                    bkns.control_valve(key, 'open') 
-
-                #Работа обоих насосов - ожидается 
-                for _ in range(25):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                #Закрытие выходной задвижки - ожидается 
-                print(f"\nЗакрытие выходной задвижки NA4")
-                bkns.control_valve('out_0', 'close')
-                for _ in range(4):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОстановка задвижки NA4")
-                #Остановка задвижки
-                bkns.control_valve('out_0', 'stop')
-                #Работа в данном режиме - ожидается 
-                for _ in range(36):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-                print(f"\nОткрытие задвижки NA4")
-                #Открытие задвижки
-                bkns.control_valve('out_0', 'open')
-
-                #Возобновление прежней работы - ожидается 
-                for _ in range(35):
-                    bkns.update_system()
-                    print(bkns._format_sensors_table(bkns.get_status()))
-                    time.sleep(0.3)
-
-            case _:
-                print(f"Сценарий {test_id} не определён.")
+        def on_step(model):
+            print(model._format_sensors_table(model.get_status()))
+            time.sleep(0.3)
 
+        run_scenario(bkns, test_id, on_phase=lambda description: print(f"\n{description}"), on_step=on_step)
 
     #Нажатие на Ctrl+C прерывает сценарии
     except KeyboardInterrupt:
         print("\nСценарий прерван пользователем.")
 
-import sys
+
+def ensemble(test_id, runs=100, seed=None):
+    """Ансамбль прогонов сценария в пуле процессов - для подбора уставок сигнализации"""
+    report = run_ensemble(session_topology(), test_id, runs=runs, seed=seed)
+    print(f"\n=== Сценарий {test_id}: {report['title']} ({runs} прогонов) ===")
+    for pump_id, stats in enumerate(report['pumps']):
+        peak = stats['peak_temperature']
+        print(f"Насос {pump_id}: пик. температура подшипников "
+              f"ср. {peak['mean']:.2f}°C, p95 {peak['p95']:.2f}°C, макс. {peak['max']:.2f}°C")
+        reach = stats['time_to_nominal']
+        if reach is None:
+            print(f"Насос {pump_id}: номинальное давление не достигнуто")
+        else:
+            print(f"Насос {pump_id}: выход на номинальное давление ({stats['reached_nominal']}/{runs}) "
+                  f"ср. {reach['mean']:.1f} с, p95 {reach['p95']:.1f} с")
+    return report
+
+
+def station_topology(n_pumps):
+    """Топология станции из n_pumps насосов с датчиками стандартной БКНС"""
+    with open(DEFAULT_TOPOLOGY, encoding="utf-8") as f:
+        spec = json.load(f)
+    names = [f"NA{i + 1}" for i in range(n_pumps)]
+    spec["oil_systems"] = names
+    spec["pumps"] = [
+        {"name": name, "oil_system": name, "in_valve": f"in_{i}", "out_valve": f"out_{i}",
+         "in_pipe": f"in_{i}", "out_pipe": f"out_{i}"}
+        for i, name in enumerate(names)
+    ]
+    return spec
+
+
+def start_station(bkns):
+    """Пуск всех насосов станции: маслонасосы, задвижки, насосы (без вывода сообщений модели)"""
+    topology = bkns.topology
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for pump_id in range(len(bkns.pumps)):
+            bkns.control_oil_pump(topology.pump_oil[pump_id], True)
+            bkns.control_valve(topology.valves[topology.pump_in_valve[pump_id]], "open")
+            bkns.control_valve(topology.valves[topology.pump_out_valve[pump_id]], "open")
+            bkns.control_pump(pump_id, True)
+
+
+def check_snapshot(engine="scalar", seed=1, ticks=30):
+    """
+    Снимок и восстановление (Math/Snapshot.py): модель, у которой после снимка
+    закрыли задвижки и восстановили снимок, должна пройти следующие ticks тактов
+    так же, как модель без перерыва. Возвращает True при полном совпадении статуса.
+    """
+    topology = session_topology()
+    reference = BKNS(engine=engine, seed=seed, topology=topology)
+    restored = BKNS(engine=engine, seed=seed, topology=topology)
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for bkns in (reference, restored):
+            start_station(bkns)
+            for _ in range(ticks):
+                bkns.update_system(1.0)
+        snapshot = save_state(restored)
+        for valve_key in restored.valves:
+            restored.control_valve(valve_key, "close")
+        for _ in range(5):
+            restored.update_system(1.0)
+        load_state(restored, snapshot)
+        for bkns in (reference, restored):
+            for _ in range(ticks):
+                bkns.update_system(1.0)
+    expected, actual = reference.get_status(), restored.get_status()
+    differ = [key for key in expected if expected[key] != actual[key]]
+    print(f"Снимок ({engine}): {'совпадает' if not differ else 'расходится: ' + ', '.join(differ)}")
+    return not differ
+
+
+def check_engines(n_pumps=2, seed=1, ticks=60):
+    """
+    Скалярный и векторный движки на станции из n_pumps насосов: пуск, ticks тактов,
+    закрытие выходной задвижки первого насоса и ещё ticks тактов. get_status()
+    должен совпасть: дискретные теги - точно, аналоговые - в пределах 1e-6
+    (точность таблиц трения, Math/Curves.py). Возвращает True при совпадении.
+    """
+    topology = station_topology(n_pumps)
+    statuses = []
+    for engine in ("scalar", "vector"):
+        bkns = BKNS(engine=engine, seed=seed, topology=topology)
+        start_station(bkns)
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(ticks):
+                bkns.update_system(1.0)
+            bkns.control_valve(topology["pumps"][0]["out_valve"], "close")
+            for _ in range(ticks):
+                bkns.update_system(1.0)
+        statuses.append(bkns.get_status())
+    scalar, vector = statuses
+    differ = [
+        f"{component}.{param}"
+        for component, params in scalar.items()
+        for param, value in params.items()
+        if param not in vector.get(component, {})
+        or type(value) is not type(vector[component][param])
+        or not (value == vector[component][param]
+                or isinstance(value, float) and math.isclose(value, vector[component][param], rel_tol=1e-6, abs_tol=1e-9))
+    ]
+    if scalar.keys() != vector.keys():
+        differ.append("состав компонентов")
+    print(f"Движки (насосов: {n_pumps}): {'совпадают' if not differ else 'расходятся: ' + ', '.join(differ)}")
+    return not differ
+
+
+def bench(pump_counts=(2, 8, 16, 32, 64), ticks=200, repeat=5):
+    """
+    Время такта (update_system + get_status) скалярного и векторного движков на
+    станциях из разного числа насосов в штатном режиме: все насосы в работе,
+    задвижки открыты. Берётся лучший из repeat замеров по ticks тактов.
+    """
+    results = {}
+    print(f"{'насосов':>8} {'scalar, мс':>11} {'vector, мс':>11} {'ускорение':>10}")
+    for n_pumps in pump_counts:
+        topology = station_topology(n_pumps)
+        timings = {}
+        for engine in BKNS.ENGINES:
+            bkns = BKNS(engine=engine, seed=0, topology=topology)
+            start_station(bkns)
+            # Выход на установившийся режим
+            with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                for _ in range(120):
+                    bkns.update_system(1.0)
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in range(ticks):
+                    bkns.update_system(1.0)
+                    bkns.get_status()
+                best = min(best, (time.perf_counter() - start) / ticks)
+            timings[engine] = best * 1e3
+        results[n_pumps] = timings
+        print(f"{n_pumps:>8} {timings['scalar']:>11.3f} {timings['vector']:>11.3f} "
+              f"{timings['scalar'] / timings['vector']:>9.2f}x")
+    return results
+
 
 if __name__ == "__main__":
     scenario_number = 7
 
-    bkns = BKNS()
+    # python -m Math.Test ensemble [число прогонов] [зерно]
+    if len(sys.argv) > 1 and sys.argv[1] == "ensemble":
+        runs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+        seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        ensemble(scenario_number, runs, seed)
+        sys.exit(0)
+
+    # python -m Math.Test check - проверки снимков и движков (код выхода 1 при расхождении)
+    if len(sys.argv) > 1 and sys.argv[1] == "check":
+        ok = all([check_snapshot(engine) for engine in ("scalar", "vector")]
+                 + [check_engines(n_pumps) for n_pumps in (2, 8)])
+        sys.exit(0 if ok else 1)
+
+    # python -m Math.Test bench [число насосов ...]
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        bench(tuple(int(n) for n in sys.argv[2:]) or (2, 8, 16, 32, 64))
+        sys.exit(0)
+
+    bkns = BKNS(topology=session_topology())
     
     filename = f"test_output_{scenario_number}.txt"  # Формируем имя файла с номером сценария
     
@@ -0,0 +1,125 @@
+import json
+
+
+# ТОПОЛОГИЯ СТАНЦИИ
+# Описание станции (файл JSON или словарь) компилируется один раз в Topology:
+# агрегаты получают номера, а связи насос -> задвижки, трубы, маслосистема
+# хранятся кортежами индексов. Шаг модели (Math/Station.py, Math/VectorEngine.py)
+# ходит по индексам и не ищет агрегаты по строковым ключам.
+#
+# Формат описания:
+# {
+#   "headers": {"inlet": "main_inlet", "outlet": "main_outlet"},   - общие трубы
+#   "oil_systems": ["NA4", "NA2"],                                  - маслосистемы (имя насоса)
+#   "pumps": [
+#     {"name": "NA4", "oil_system": "NA4",
+#      "in_valve": "in_0", "out_valve": "out_0", "in_pipe": "in_0", "out_pipe": "out_0"},
+#     ...
+#   ],
+#   "valves": [...], "pipes": [...],   - необязательно: порядок задвижек и труб
+#                                        (по умолчанию - по насосам, общие трубы в конце)
+#   "load": {"pressure": 1.9, "kv": 34.0},  - необязательно: потребитель за общей выходной
+#                                        трубой - давление (МПа) и пропускная способность Kv
+#                                        (м³/ч при перепаде 1 бар, по умолчанию 17 на насос)
+#   "sensors": {                         - датчики агрегатов по группам
+#     "pump": [{"sensor": "pressure_sensor", "type": "PumpPressureSensor", "input": "pressure",
+#               "value": "pressure_current_mA", "args": {...}}, ...],
+#     ...
+#   }
+# }
+# Группы датчиков: valve, pump, pipe, oil, tank. "type" - имя класса датчика
+# (Math/Station.py: SENSOR_TYPES), "input" - измеряемая величина агрегата
+# (Math/Station.py: SENSOR_INPUTS), "value" - имя канала в *_sensor_values,
+# "args" - необязательные параметры диапазона датчика.
+
+SENSOR_GROUPS = ("valve", "pump", "pipe", "oil", "tank")
+
+# Потребитель по умолчанию: давление за станцией (МПа) и Kv нагрузки на один насос -
+# при нём каждый насос работает около 0.8 номинальной подачи (Math/Network.py)
+LOAD_PRESSURE = 1.9
+LOAD_KV_PER_PUMP = 17.0
+
+
+class Topology:
+    """
+    Скомпилированная топология станции.
+
+    Имена агрегатов - кортежи pumps, valves, pipes, oil_systems; связи -
+    кортежи индексов по номеру насоса (pump_in_valve, pump_out_valve,
+    pump_in_pipe, pump_out_pipe, pump_oil), inlet/outlet - индексы общих труб,
+    load_pressure/load_kv - потребитель за общей выходной трубой.
+    sensors - {группа: ((имя датчика, тип, канал, величина, args), ...)}.
+    Объект неизменяем после сборки и общий для копий модели (Math/Fork.py).
+    """
+
+    def __init__(self, spec):
+        pumps = spec.get("pumps") or []
+        if not pumps:
+            raise ValueError("В топологии нет насосов")
+        headers = spec.get("headers", {})
+        for header in ("inlet", "outlet"):
+            if header not in headers:
+                raise ValueError(f"В топологии не задана общая труба headers.{header}")
+
+        self.pumps = tuple(pump["name"] for pump in pumps)
+        self.oil_systems = tuple(spec.get("oil_systems") or self.pumps)
+        self.valves = tuple(spec.get("valves") or [key for pump in pumps for key in (pump["in_valve"], pump["out_valve"])])
+        self.pipes = tuple(spec.get("pipes") or [key for pump in pumps for key in (pump["in_pipe"], pump["out_pipe"])]
+                           + [headers["inlet"], headers["outlet"]])
+        for kind, names in (("насосов", self.pumps), ("маслосистем", self.oil_systems),
+                            ("задвижек", self.valves), ("труб", self.pipes)):
+            if len(set(names)) != len(names):
+                raise ValueError(f"Повторяющиеся имена {kind} в топологии: {names}")
+
+        valve_index = {key: i for i, key in enumerate(self.valves)}
+        pipe_index = {key: i for i, key in enumerate(self.pipes)}
+        oil_index = {name: i for i, name in enumerate(self.oil_systems)}
+
+        def resolve(index, pump, field, default=None):
+            key = pump.get(field, default)
+            if key not in index:
+                raise ValueError(f"Насос {pump['name']}: {field} = {key!r} не найден в топологии")
+            return index[key]
+
+        self.pump_in_valve = tuple(resolve(valve_index, pump, "in_valve") for pump in pumps)
+        self.pump_out_valve = tuple(resolve(valve_index, pump, "out_valve") for pump in pumps)
+        self.pump_in_pipe = tuple(resolve(pipe_index, pump, "in_pipe") for pump in pumps)
+        self.pump_out_pipe = tuple(resolve(pipe_index, pump, "out_pipe") for pump in pumps)
+        # По умолчанию у насоса своя маслосистема с его именем
+        self.pump_oil = tuple(resolve(oil_index, pump, "oil_system", pump["name"]) for pump in pumps)
+        self.inlet = pipe_index.get(headers["inlet"])
+        self.outlet = pipe_index.get(headers["outlet"])
+        if self.inlet is None or self.outlet is None:
+            raise ValueError("Общие трубы headers должны входить в список труб")
+
+        load = spec.get("load", {})
+        self.load_pressure = float(load.get("pressure", LOAD_PRESSURE))
+        self.load_kv = float(load.get("kv", LOAD_KV_PER_PUMP * len(pumps)))
+        if self.load_kv <= 0:
+            raise ValueError(f"Пропускная способность нагрузки load.kv должна быть положительной: {self.load_kv}")
+
+        sensors = spec.get("sensors", {})
+        unknown = set(sensors) - set(SENSOR_GROUPS)
+        if unknown:
+            raise ValueError(f"Неизвестные группы датчиков: {sorted(unknown)}. Допустимо: {SENSOR_GROUPS}")
+        self.sensors = {
+            group: tuple(
+                (channel["sensor"], channel["type"], channel["value"], channel["input"], channel.get("args", {}))
+                for channel in sensors.get(group, ())
+            )
+            for group in SENSOR_GROUPS
+        }
+
+    @property
+    def n_pumps(self):
+        return len(self.pumps)
+
+
+def load_topology(source):
+    """Топология из файла JSON (путь) или словаря с описанием станции."""
+    if isinstance(source, Topology):
+        return source
+    if isinstance(source, dict):
+        return Topology(source)
+    with open(source, encoding="utf-8") as f:
+        return Topology(json.load(f))
@@ -1,3 +1,11 @@
+import math
+
+
+# Остаток хода (%), который считается пройденным: подшаг такта, заканчивающийся
+# в момент прихода задвижки в цель (Math/Integrator.py), не оставляет её в 1e-13 % от цели
+TRAVEL_EPSILON = 1e-9
+
+
 class Valve:
     """
     Класс, моделирующий задвижку с электроприводом в промышленной системе труб.
@@ -16,6 +24,7 @@ class Valve:
         move_delay (float): Общее время открытия/закрытия (по умолчанию 2 сек)
         target_position (float): Целевое положение задвижки
         move_direction (int): Направление движения (1 - открытие, -1 - закрытие, 0 -нет движения)
+        kv (float): Пропускная способность полностью открытой задвижки (м³/ч при перепаде 1 бар)
     """
 
     def __init__(self,move_delay: float = 2.0):
@@ -28,6 +37,7 @@ class Valve:
         self.move_delay = move_delay  # Установка времени задержки
         self.target_position = 0.0
         self.move_direction = 0  # 0 - нет движения, 1 - открытие, -1 - закрытие
+        self.kv = 400.0  # Пропускная способность при полном открытии [м³/ч при 1 бар]
 
 
     def update_conditions(self, pressure: float, temperature: float):
@@ -99,7 +109,10 @@ class Valve:
         # Рассчитываем изменение положения за dt
         step = (100.0 / self.move_delay) * dt
 
-        if self.move_direction == 1:
+        if step >= abs(self.target_position - self.current_position) - TRAVEL_EPSILON:
+            # Задвижка доходит до цели за этот шаг
+            self.current_position = self.target_position
+        elif self.move_direction == 1:
             # Открываем задвижку, не превышая целевое положение
             self.current_position = min(self.current_position + step, self.target_position)
         elif self.move_direction == -1:
@@ -119,6 +132,15 @@ class Valve:
             self.pressure = 0.0
             self.temperature = 0.0
 
+    def travel_time(self) -> float:
+        """
+        Время (с) до конца хода движущейся задвижки (inf - задвижка неподвижна).
+        Подшаг такта заканчивается в этот момент (Math/Integrator.py).
+        """
+        if not self.is_moving:
+            return math.inf
+        return abs(self.target_position - self.current_position) * self.move_delay / 100.0
+
     def _update_state(self):
         """
         Вспомогательный метод для обновления атрибута state
@@ -0,0 +1,668 @@
+import math
+import time
+import numpy as np
+from Math.Curves import FrictionTables, pump_curve
+from Math.Integrator import SubSteps, curvature_step
+from Math.Network import OUTLET_HEADER
+from Math.Valve import TRAVEL_EPSILON
+
+
+# Коды состояний задвижки в векторном представлении (индекс = код)
+VALVE_STATES = ("open", "closed", "moving", "stopped")
+VALVE_OPEN, VALVE_CLOSED, VALVE_MOVING, VALVE_STOPPED = range(len(VALVE_STATES))
+
+# Режимы работы насоса (совпадают с CentrifugalPump.OPERATION_MODE_*):
+# код = закрыта входная задвижка + 2·закрыта выходная
+MODE_NORMAL, MODE_INLET_CLOSED, MODE_OUTLET_CLOSED, MODE_BOTH_CLOSED = range(4)
+
+# Доля тока от номинального по режиму: [режим, прошло ли 5 с в режиме] (CentrifugalPump.calculate_current)
+CURRENT_FACTORS = np.array([[1.0, 1.0], [0.7, 1.3], [1.5, 1.5], [0.5, 0.5]])
+CURRENT_FACTORS.flags.writeable = False
+
+# Ветви CentrifugalPump.update_operation по режиму: [режим] -> (штатный, закрыта только
+# выходная, закрыта входная, насос качает), и предел температуры при давлении масла в норме
+MODE_FLAGS = np.array([
+    [True, False, False, True],
+    [False, False, True, False],
+    [False, True, False, True],
+    [False, False, True, False],
+])
+MODE_MAX_TEMP = np.array([40.0, 40.0, 40.0, 60.0])
+MODE_FLAGS.flags.writeable = False
+MODE_MAX_TEMP.flags.writeable = False
+
+# Соответствие: атрибут массива движка -> атрибут объекта -> тип
+PUMP_STATE_FIELDS = (
+    ('p_in_outside', 'p_in_outside', float),
+    ('p_in', 'p_in', float),
+    ('p_out', 'p_out', float),
+    ('current_omega', 'current_omega', float),
+    ('current_motor_i', 'current_motor_i', float),
+    ('na_on', 'na_on', bool),
+    ('na_off', 'na_off', bool),
+    ('na_start', 'na_start', bool),
+    ('na_stop', 'na_stop', bool),
+    ('operation_mode', 'operation_mode', int),
+    ('mode_change_time', 'mode_change_time', float),
+    ('max_operating_temp', 'max_operating_temp', float),
+    ('flow', 'NA_AI_Qmom_n', float),
+    ('simulation_time', 'simulation_time', float),
+    ('start_omega', 'start_omega', float),
+    ('start_time', 'start_time', float),
+)
+PUMP_TEMPERATURE_FIELDS = ('NA_AI_T_1_n', 'NA_AI_T_2_n', 'NA_AI_T_3_n', 'NA_AI_T_4_n', 'NA_AI_T_5_n')
+
+VALVE_STATE_FIELDS = (
+    ('valve_position', 'current_position', float),
+    ('valve_target', 'target_position', float),
+    ('valve_direction', 'move_direction', int),
+    ('valve_moving', 'is_moving', bool),
+    ('valve_pressure', 'pressure', float),
+    ('valve_temperature', 'temperature', float),
+)
+
+PIPE_STATE_FIELDS = (
+    ('pipe_p_in', 'p_in', float),
+    ('pipe_p_out', 'p_out', float),
+    ('pipe_T', 'T', float),
+)
+
+OIL_STATE_FIELDS = (
+    ('oil_running', 'running', bool),
+    ('oil_pressure_ok', 'pressure_ok', bool),
+    ('oil_temp_ok', 'temp_ok', bool),
+    ('oil_flow_rate', 'flow_rate', float),
+    ('oil_pressure', 'pressure', float),
+    ('oil_temperature', 'temperature', float),
+    ('oil_viscosity', 'viscosity', float),
+)
+
+OIL_PUMP_STATE_FIELDS = (
+    ('running', 'running', bool),
+    ('speed', 'pump_speed', float),
+)
+
+TANK_STATE_FIELDS = (
+    ('tank_level', 'level', float),
+    ('tank_density', 'density', float),
+    ('tank_temperature', 'temperature', float),
+    ('tank_inflow', 'inflow', float),
+    ('tank_outflow', 'outflow', float),
+)
+
+
+def _gather(objects, attr, dtype=float):
+    """Собирает атрибут всех объектов в одномерный массив."""
+    return np.array([getattr(obj, attr) for obj in objects], dtype=dtype)
+
+
+def _scatter(objects, attr, values):
+    """Записывает значения массива обратно в атрибуты объектов."""
+    for obj, value in zip(objects, values.tolist()):
+        setattr(obj, attr, value)
+
+
+class VectorEngine:
+    """
+    Векторный движок БКНС.
+
+    Состояние насосов, задвижек, труб и маслосистем хранится в массивах NumPy
+    (structure-of-arrays), а шаг модели выполняется одним пакетным проходом
+    по всем агрегатам сразу. Логика шага повторяет CentrifugalPump.step,
+    Valve.update, PipeModel.compute_output_pressure и OilSystem.update.
+
+    Пакетный проход - это около двух сотен вызовов NumPy за такт почти при любом
+    числе насосов (по несколько микросекунд каждый), а скалярный шаг дорожает
+    линейно с числом агрегатов. Движок предназначен для больших станций: на
+    типовых (2-16 насосов) он медленнее скалярного, окупается примерно от 24-32
+    насосов, и по умолчанию модель работает скалярным. Замер - python -m Math.Test
+    bench (такт вместе с get_status: 2 насоса - 0.25 мс скалярным против 0.51 мс
+    векторным, 16 - 0.63 против 0.92, 32 - 0.96 против 0.75, 64 - 1.6 против 0.94).
+
+    Массивы параметров только для чтения, массивы состояния пересоздаются load().
+    Пока движок активен, источником истины являются массивы, а объекты модели
+    (pumps, valves, pipes, oil_systems) хранят лишь параметры. Для синхронизации
+    используются load() (объекты -> массивы) и store() (массивы -> объекты).
+    """
+
+    def __init__(self, model):
+        pumps = model.pumps
+        self.n_pumps = len(pumps)
+        # Колебания берутся из генератора модели (тот же, что у насосов) в порядке скалярного движка
+        self.noise = model.noise
+
+        # Топология: индексы задвижек, труб и маслосистем для каждого насоса (Math/Topology.py)
+        topology = model.topology
+        self.valve_keys = list(topology.valves)
+        self.pipe_keys = list(topology.pipes)
+        self.in_valve = np.array(topology.pump_in_valve, dtype=int)
+        self.out_valve = np.array(topology.pump_out_valve, dtype=int)
+        self.in_pipe = np.array(topology.pump_in_pipe, dtype=int)
+        self.out_pipe = np.array(topology.pump_out_pipe, dtype=int)
+        # Задвижки насосов и трубы за ними - для условий среды на задвижках за одно присваивание
+        self.pump_valves = np.concatenate((self.in_valve, self.out_valve))
+        self.pump_valve_pipes = np.concatenate((self.in_pipe, self.out_pipe))
+        self.main_inlet = topology.inlet
+        self.main_outlet = topology.outlet
+        self.pump_oil = np.array(topology.pump_oil, dtype=int)
+
+        # Параметры насосов (не меняются во время работы)
+        for attr in ('nominal_capacity', 'max_head_zero_capacity', 'reference_shaft_speed',
+                     'min_shaft_speed_threshold', 'impeller_diameter_scale', 'nominal_current',
+                     'current_reduction_step', 'ambient_temp', 'temp_rise_rate', 'temp_cooling_rate',
+                     'temp_dry_run_rise_rate', 'temp_closed_valve_rise_rate', 'temp_fluctuation',
+                     'current_fluctuation', 'pressure_fluctuation', 'flow_fluctuation', 'g', 'time_constant',
+                     'current_response', 'p_in_rise_rate', 'p_drop_rate', 'p_out_decay_rate'):
+            setattr(self, attr, _gather(pumps, attr))
+        # Характеристики напора H(q, ω) = a·q² + b·q·ω + c·ω² (Math/Curves.py)
+        curves = [pump_curve(pump.a, pump.b, pump.c, pump.reference_shaft_speed, pump.impeller_diameter_scale)
+                  for pump in pumps]
+        for attr in ('a', 'b', 'c'):
+            setattr(self, f'curve_{attr}', _gather(curves, attr))
+        # Пределы колебаний в порядке их розыгрыша в CentrifugalPump.update_operation:
+        # давление, расход, ток, температуры T1..T5 (см. _fluctuations)
+        self.fluctuation_limits = np.column_stack(
+            [self.pressure_fluctuation * 1e6, self.flow_fluctuation, self.current_fluctuation]
+            + [self.temp_fluctuation] * len(PUMP_TEMPERATURE_FIELDS))
+
+        # Параметры задвижек
+        self.valve_move_delay = _gather(model.valves.values(), 'move_delay')
+
+        # Параметры труб
+        pipes = list(model.pipes.values())
+        for attr in ('L', 'S', 'D_h', 'L_eq', 'r', 'Re_lam', 'Re_tur', 'lambda_lam'):
+            setattr(self, f'pipe_{attr}', _gather(pipes, attr))
+        # Общие таблицы коэффициента трения по геометрии труб
+        self._friction = FrictionTables(pipes)
+
+        # Параметры маслосистем
+        oil_systems = model.oil_systems
+        for attr in ('nominal_viscosity', 'temp_limit', 'ambient_temp', 'oil_mass',
+                     'oil_heat_capacity', 'heat_transfer_coeff'):
+            setattr(self, f'oil_{attr}', _gather(oil_systems, attr))
+        for prefix, pump_attr in (('main', 'main_pump'), ('reserve', 'reserve_pump')):
+            oil_pumps = [getattr(oil_system, pump_attr) for oil_system in oil_systems]
+            setattr(self, f'{prefix}_nominal_flow', _gather(oil_pumps, 'nominal_flow'))
+            setattr(self, f'{prefix}_max_pressure', _gather(oil_pumps, 'max_pressure'))
+        self.tank_volume_max = _gather([oil_system.tank for oil_system in oil_systems], 'volume_max')
+
+        # Параметры и индексы топологии только для чтения: они общие для копий
+        # модели (Math/Fork.py) и не входят в снимок состояния (Math/Snapshot.py)
+        for value in vars(self).values():
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+        self.load(model)
+
+    # -------------------------------------------------------------------------
+    # Синхронизация с объектами модели
+    # -------------------------------------------------------------------------
+    def load(self, model):
+        """Переносит текущее состояние объектов модели в массивы движка."""
+        pumps = model.pumps
+        for attr, field, dtype in PUMP_STATE_FIELDS:
+            setattr(self, attr, _gather(pumps, field, dtype))
+        self.temps = np.column_stack([_gather(pumps, field) for field in PUMP_TEMPERATURE_FIELDS])
+
+        valves = list(model.valves.values())
+        for attr, field, dtype in VALVE_STATE_FIELDS:
+            setattr(self, attr, _gather(valves, field, dtype))
+        self.valve_state = np.array([VALVE_STATES.index(valve.state) for valve in valves], dtype=int)
+
+        pipes = list(model.pipes.values())
+        for attr, field, dtype in PIPE_STATE_FIELDS:
+            setattr(self, attr, _gather(pipes, field, dtype))
+
+        oil_systems = model.oil_systems
+        for attr, field, dtype in OIL_STATE_FIELDS:
+            setattr(self, attr, _gather(oil_systems, field, dtype))
+        for prefix, pump_attr in (('main', 'main_pump'), ('reserve', 'reserve_pump')):
+            oil_pumps = [getattr(oil_system, pump_attr) for oil_system in oil_systems]
+            for attr, field, dtype in OIL_PUMP_STATE_FIELDS:
+                setattr(self, f'{prefix}_{attr}', _gather(oil_pumps, field, dtype))
+
+        tanks = [oil_system.tank for oil_system in oil_systems]
+        for attr, field, dtype in TANK_STATE_FIELDS:
+            setattr(self, attr, _gather(tanks, field, dtype))
+        self.tank_inlet_valves = np.array([tank.inlet_valves for tank in tanks], dtype=bool)
+        self.tank_outlet_valves = np.array([tank.outlet_valves for tank in tanks], dtype=bool)
+
+        self.oil_cmd_start = np.array([cmd['start'] for cmd in model.oil_pump_commands], dtype=bool)
+        self.oil_cmd_stop = np.array([cmd['stop'] for cmd in model.oil_pump_commands], dtype=bool)
+
+    def store(self, model):
+        """Записывает состояние из массивов движка обратно в объекты модели."""
+        pumps = model.pumps
+        for attr, field, _ in PUMP_STATE_FIELDS:
+            _scatter(pumps, field, getattr(self, attr))
+        for column, field in enumerate(PUMP_TEMPERATURE_FIELDS):
+            _scatter(pumps, field, self.temps[:, column])
+
+        valves = list(model.valves.values())
+        for attr, field, _ in VALVE_STATE_FIELDS:
+            _scatter(valves, field, getattr(self, attr))
+        for valve, code in zip(valves, self.valve_state.tolist()):
+            valve.state = VALVE_STATES[code]
+
+        pipes = list(model.pipes.values())
+        for attr, field, _ in PIPE_STATE_FIELDS:
+            _scatter(pipes, field, getattr(self, attr))
+
+        oil_systems = model.oil_systems
+        for attr, field, _ in OIL_STATE_FIELDS:
+            _scatter(oil_systems, field, getattr(self, attr))
+        for prefix, pump_attr in (('main', 'main_pump'), ('reserve', 'reserve_pump')):
+            oil_pumps = [getattr(oil_system, pump_attr) for oil_system in oil_systems]
+            for attr, field, _ in OIL_PUMP_STATE_FIELDS:
+                _scatter(oil_pumps, field, getattr(self, f'{prefix}_{attr}'))
+
+        tanks = [oil_system.tank for oil_system in oil_systems]
+        for attr, field, _ in TANK_STATE_FIELDS:
+            _scatter(tanks, field, getattr(self, attr))
+        for tank, inlet, outlet in zip(tanks, self.tank_inlet_valves.tolist(), self.tank_outlet_valves.tolist()):
+            tank.inlet_valves = inlet
+            tank.outlet_valves = outlet
+
+    # -------------------------------------------------------------------------
+    # Команды управления
+    # -------------------------------------------------------------------------
+    def control_pump(self, pump_id, start):
+        """Аналог BKNS.control_pump для массивов движка."""
+        self.na_start[pump_id] = start
+        self.na_stop[pump_id] = not start
+
+    def control_oil_pump(self, pump_id, start):
+        """Аналог BKNS.control_oil_pump для массивов движка."""
+        self.oil_cmd_start[pump_id] = start
+        self.oil_cmd_stop[pump_id] = not start
+
+    def control_valve(self, valve_key, signal):
+        """Аналог Valve.control для задвижки valve_key."""
+        i = self.valve_keys.index(valve_key)
+
+        if signal == "stop":
+            self.valve_moving[i] = False
+            self.valve_direction[i] = 0
+            self.valve_target[i] = self.valve_position[i]
+        elif signal in ("open", "close"):
+            self.valve_target[i] = 100.0 if signal == "open" else 0.0
+            self.valve_direction[i] = np.sign(self.valve_target[i] - self.valve_position[i])
+            self.valve_moving[i] = self.valve_direction[i] != 0
+        else:
+            print(f"Предупреждение: Неизвестный сигнал управления '{signal}'")
+            return
+
+        self._update_valve_states(np.array([i]))
+
+    # -------------------------------------------------------------------------
+    # Шаг модели
+    # -------------------------------------------------------------------------
+    def step(self, model, dt, now=None):
+        """
+        Пакетный шаг модели; порядок расчёта совпадает с BKNS.update_system:
+        маслосистемы - одним шагом dt, быстрая часть - подшагами (Math/Integrator.py).
+        now - модельное время (с) для колебаний давления масла.
+        """
+        self._update_oil_systems(model, dt, now)
+
+        steps = SubSteps(dt)
+        while True:
+            h = steps.next(self._substep_limit())
+            self._fast_step(model, h, dt if steps.last else 0.0)
+            if steps.last:
+                break
+
+        # Общая выходная труба: давление - в выходном коллекторе, температура - средняя по выходным трубам
+        self._compute_output_pressure(
+            self.main_outlet,
+            model.network.pressure[OUTLET_HEADER],
+            np.add.reduce(self.pipe_T[self.out_pipe]) / self.n_pumps
+        )
+
+    def _substep_limit(self):
+        """Векторный аналог BKNS._substep_limit."""
+        # Аналог CentrifugalPump.substep_limit: наименьший из sqrt(8·TOLERANCE·ω_ref/|ω''|) -
+        # у насоса с наибольшей кривизной относительно ω_ref
+        on = (self.na_on | self.na_start) & ~self.na_stop
+        curvature = np.where(on, np.abs(self.reference_shaft_speed - self.current_omega) / self.time_constant ** 2,
+                             self.current_omega / (self.time_constant / 2) ** 2)
+        limit = curvature_step(float((curvature / self.reference_shaft_speed).max()), 1.0)
+
+        moving = self.valve_moving
+        if moving.any():
+            travel = np.abs(self.valve_target[moving] - self.valve_position[moving]) * self.valve_move_delay[moving] / 100.0
+            limit = min(limit, float(travel.min()))
+        return limit
+
+    def _fast_step(self, model, dt, tick_dt):
+        """Векторный аналог BKNS._fast_step."""
+        self._update_valves(dt)
+        self._pump_speed(dt)
+
+        # Расходы и давления сети (Math/Network.py)
+        network = model.network
+        network.solve(model.inlet_pressure, self.current_omega, self.valve_position[self.in_valve] / 100.0,
+                      self.valve_position[self.out_valve] / 100.0, model.rho, model.mu)
+        # Расходы труб известны на весь подшаг - потери считаются один раз для всех труб
+        self._pipe_loss = self._pressure_loss(network.pipe_flow, model.mu, model.rho)
+
+        self._compute_output_pressure(self.main_inlet, model.inlet_pressure, model.inlet_temperature)
+
+        self._update_pumps(model, dt, tick_dt)
+
+    def _update_valves(self, dt):
+        """Векторный аналог Valve.update."""
+        moving = np.flatnonzero(self.valve_moving)
+        if moving.size == 0:
+            return
+
+        step = (100.0 / self.valve_move_delay[moving]) * dt
+        position = self.valve_position[moving]
+        target = self.valve_target[moving]
+        direction = self.valve_direction[moving]
+
+        position = np.where(direction == 1, np.minimum(position + step, target), position)
+        position = np.where(direction == -1, np.maximum(position - step, target), position)
+        position = np.where(np.abs(target - position) <= TRAVEL_EPSILON, target, position)
+        self.valve_position[moving] = position
+
+        reached = moving[position == target]
+        self.valve_moving[reached] = False
+        self.valve_direction[reached] = 0
+        self._update_valve_states(moving)
+
+        # При полном закрытии сбрасываем параметры среды
+        closed = moving[position == 0.0]
+        self.valve_pressure[closed] = 0.0
+        self.valve_temperature[closed] = 0.0
+
+    def _update_valve_states(self, idx):
+        """Векторный аналог Valve._update_state для задвижек idx."""
+        position = self.valve_position[idx]
+        self.valve_state[idx] = np.where(
+            self.valve_moving[idx], VALVE_MOVING,
+            np.where(position == 100.0, VALVE_OPEN, np.where(position == 0.0, VALVE_CLOSED, VALVE_STOPPED))
+        )
+
+    def _pressure_loss(self, m_dot, mu, rho):
+        """Векторный аналог PipeModel.compute_pressure_loss для всех труб."""
+        S, D_h, lambda_lam = self.pipe_S, self.pipe_D_h, self.pipe_lambda_lam
+        length = self.pipe_L + self.pipe_L_eq
+
+        velocity = abs(m_dot) / (rho * S)
+        Re = (rho * velocity * D_h) / mu
+        f = self._friction.friction(Re)
+
+        laminar = (lambda_lam * mu * length / 2) * (m_dot / (2 * rho * D_h ** 2 * S))
+        turbulent = (f * length / 2) * (m_dot * abs(m_dot) / (2 * rho * D_h * S ** 2))
+        return np.where(Re < self.pipe_Re_lam, laminar, turbulent)
+
+    def _compute_output_pressure(self, idx, p_in, temperature):
+        """Векторный аналог PipeModel.compute_output_pressure для труб idx - номера или массива номеров (потери такта - _pipe_loss)."""
+        delta_p = self._pipe_loss[idx]
+
+        self.pipe_p_in[idx] = p_in
+        self.pipe_p_out[idx] = self.pipe_p_in[idx] - (delta_p + delta_p) / 1e6
+        self.pipe_T[idx] = temperature
+
+    def _update_oil_systems(self, model, dt, now=None):
+        """Векторный аналог OilSystem.update (вместе с OilTank.update и OilPump.update)."""
+        # Маслобак
+        inflow_rates = np.asarray(model.oil_inflow_rates, dtype=float)
+        outflow_rates = np.asarray(model.oil_outflow_rates, dtype=float)
+        self.tank_inlet_valves[:] = model.oil_inlet_signals
+        self.tank_outlet_valves[:] = model.oil_outlet_signals
+        self.tank_inflow = np.add.reduce(self.tank_inlet_valves * inflow_rates, axis=1)
+        self.tank_outflow = np.add.reduce(self.tank_outlet_valves * outflow_rates, axis=1)
+        delta_volume = (self.tank_inflow - self.tank_outflow) * dt / 3600
+        self.tank_level = np.clip(self.tank_level + delta_volume, 0.0, self.tank_volume_max)
+
+        # Маслонасосы: основной по командам, резервный всегда выключен (как в BKNS.update_system) -
+        # его скорость нулевая, и слагаемые резервного насоса в расходе и нагреве не считаются
+        start, stop = self.oil_cmd_start, self.oil_cmd_stop
+        self.main_running = (self.main_running | start) & ~stop
+        self.main_speed = np.where(stop, 0.0, np.where(start, 1.0, self.main_speed))
+        self.reserve_running[:] = False
+        self.reserve_speed[:] = 0.0
+        self.oil_running = self.main_running.copy()
+
+        temperature = self.tank_temperature
+        viscosity = self.oil_nominal_viscosity * np.exp(-0.03 * (temperature - 40))
+        self.oil_viscosity = np.maximum(10, np.minimum(viscosity, 100))
+
+        viscosity_factor = 1 - (self.oil_viscosity - self.oil_nominal_viscosity) / 100
+        main_flow = self.main_nominal_flow * self.main_speed
+        self.oil_flow_rate = main_flow * viscosity_factor
+
+        now = time.time() if now is None else now
+        time_factor = 1 + 0.1 * math.sin(now / 10)
+        self.oil_pressure = np.minimum(self.main_max_pressure, self.main_max_pressure * self.main_speed * time_factor)
+
+        heating_power = np.where(self.main_speed > 0, self.oil_pressure * main_flow / 600, 0.0)
+        delta_heat = heating_power * dt / (self.oil_oil_mass * self.oil_oil_heat_capacity)
+        cooling = self.oil_heat_transfer_coeff * (temperature - self.oil_ambient_temp) * dt
+
+        temperature = np.minimum(temperature + delta_heat - cooling, self.oil_temp_limit)
+        self.oil_temperature = np.maximum(temperature, self.oil_ambient_temp)
+
+        self.oil_pressure_ok = self.oil_pressure >= 2.0
+        self.oil_temp_ok = self.oil_temperature < self.oil_temp_limit
+
+    def _update_pumps(self, model, dt, tick_dt):
+        """Обновление насосов вместе с их входными/выходными трубами и задвижками."""
+        mi = self.main_inlet
+
+        # Входные трубы насосов (от общей входной трубы)
+        self._compute_output_pressure(self.in_pipe, self.pipe_p_out[mi], self.pipe_T[mi])
+
+        # Подпор - давление после входной задвижки, расход - из решения сети
+        network = model.network
+        self.p_in_outside = self.pipe_p_out[self.in_pipe] - network.valve_loss[self.in_valve]
+        target_omega = np.where(self.na_on, self.reference_shaft_speed, 0.0)
+        q = network.pump_flow.copy()
+
+        in_state = self.valve_state[self.in_valve]
+        out_state = self.valve_state[self.out_valve]
+        inlet_open = in_state != VALVE_CLOSED
+        outlet_open = (out_state == VALVE_OPEN) | (out_state == VALVE_MOVING)
+
+        self._pump_step(target_omega, q, model.rho, inlet_open, outlet_open, dt, tick_dt)
+        # За закрытой выходной задвижкой давление не передаётся
+        p_before_out_pipe = np.where(self.valve_position[self.out_valve] > 0,
+                                     self.p_out - network.valve_loss[self.out_valve], 0.0)
+
+        # Выходные трубы насосов
+        self._compute_output_pressure(self.out_pipe, p_before_out_pipe, model.inlet_temperature)
+
+        # Условия среды на задвижках: входные - по входным трубам, выходные - по выходным
+        self.valve_pressure[self.pump_valves] = self.pipe_p_out[self.pump_valve_pipes]
+        self.valve_temperature[self.pump_valves] = self.pipe_T[self.pump_valve_pipes]
+
+    def _reset_ramp(self, mask):
+        """Векторный аналог CentrifugalPump.reset_ramp для насосов mask."""
+        self.start_omega = np.where(mask, self.current_omega, self.start_omega)
+        self.start_time = np.where(mask, self.simulation_time, self.start_time)
+
+    def _pressure_gain(self, q, rho):
+        """Векторный аналог CentrifugalPump.calculate_pressure_gain (без колебаний)."""
+        omega = self.current_omega
+        spinning = omega >= self.min_shaft_speed_threshold
+        H = (self.curve_a * q + self.curve_b * omega) * q + self.curve_c * omega * omega
+        H = np.where(spinning, H, 0.0)
+        return rho * self.g * H
+
+    def _calculate_current(self, speed_ratio, time_in_mode, dt):
+        """
+        Векторный аналог CentrifugalPump.calculate_current без колебаний и
+        ограничения снизу (маска насосов, у которых ток считается, - в _pump_step).
+        """
+        factor = CURRENT_FACTORS[self.operation_mode, (time_in_mode >= 5.0).astype(int)]
+        target_current = self.nominal_current * speed_ratio * factor
+        decay = np.maximum(0.0, 1.0 - self.current_response * speed_ratio) ** dt
+        return target_current + (self.current_motor_i - target_current) * decay
+
+    def _fluctuations(self, noisy, current, running, oil_ok, speed_ratio, time_in_mode, dt):
+        """
+        Колебания такта в том же порядке, в каком их берёт из общего генератора
+        скалярный движок: насос за насосом, у каждого - давление, расход, ток,
+        затем дребезг T1..T5 (CentrifugalPump.update_operation). noisy - маски
+        колебаний давления, расхода и тока, current - ток без колебаний.
+
+        Дребезг температуры зависит от нагрева (CentrifugalPump.update_temperatures),
+        нагрев в штатном режиме - от тока с его колебанием, а номер значения в
+        генераторе - от числа колебаний у предыдущих насосов. Значения берутся
+        через peek и раскладываются заново, пока колебания тока не перестанут
+        меняться: за проход становится верным ещё один насос, обычно хватает двух
+        проходов. Всё, что от тока не зависит, считается до цикла. Возвращает
+        колебания давления, расхода и тока (n×3) и температуры после нагрева или
+        остывания за dt с дребезгом.
+        """
+        n = self.n_pumps
+        mask = np.zeros(self.fluctuation_limits.shape, dtype=bool)
+        for column, values in enumerate(noisy):
+            mask[:, column] = values
+        u = self.noise.peek(int(np.count_nonzero(mask)) + n * len(PUMP_TEMPERATURE_FIELDS))
+
+        # Нагрев: остывающие насосы, рост температуры не в штатном режиме и от давления масла
+        T1 = self.temps[:, 0]
+        max_temp = self.max_operating_temp
+        cooling = ~self.na_on | (self.current_omega < self.min_shaft_speed_threshold) | (T1 > max_temp)
+        heating = (~cooling & (T1 < max_temp))[:, None]
+        mode = self.operation_mode
+        normal = mode == MODE_NORMAL
+        rise = np.choose(mode, (
+            0.0,
+            self.temp_dry_run_rise_rate * (1 + time_in_mode / 20),
+            self.temp_closed_valve_rise_rate,
+            self.temp_closed_valve_rise_rate * 1.5,
+        ))
+        delta_oil = ((~oil_ok) * 3 * dt)[:, None]
+        # Дребезг вблизи максимальной температуры
+        jitter = ~cooling[:, None]
+        jitter_from = (max_temp * 0.9)[:, None]
+
+        current_noise = np.zeros(n)
+        while True:
+            current_motor_i = np.where(running, np.maximum(0, current + current_noise), 0.0)
+            normal_rise = self.temp_rise_rate * ((current_motor_i / self.nominal_current) * speed_ratio)
+            delta_temp = (np.where(normal, normal_rise, rise) * dt)[:, None]
+            temps = np.where(heating, self.temps + delta_temp + delta_oil, self.temps)
+            mask[:, 3:] = jitter & (temps >= jitter_from)
+
+            # Как NoiseSource.uniform(-limit, limit) для каждого значения
+            index = np.flatnonzero(mask)
+            low = -self.fluctuation_limits.ravel()[index]
+            noise = np.zeros(mask.shape)
+            noise.ravel()[index] = low + (-low - low) * u[:index.size]
+            if (noise[:, 2] == current_noise).all():
+                break
+            current_noise = noise[:, 2]
+        self.noise.skip(index.size)
+
+        temps = temps + noise[:, 3:]
+        cooled = np.maximum(self.temps - (self.temp_cooling_rate * dt)[:, None], self.ambient_temp[:, None])
+        return noise[:, :3], np.where(cooling[:, None], cooled, temps)
+
+    def _pump_speed(self, dt):
+        """Команды пуска/останова и скорости насосов на конец подшага (как в BKNS._fast_step)."""
+        # control_pump (команды пуска/останова приходят редко)
+        if self.na_start.any():
+            start = self.na_start & ~self.na_on
+            self.na_on = self.na_on | start
+            self.na_off = self.na_off & ~start
+            self.na_start = self.na_start & ~start
+            self._reset_ramp(start)
+
+        if self.na_stop.any():
+            stop = self.na_stop & self.na_on
+            self.na_on = self.na_on & ~stop
+            self.na_off = self.na_off | stop
+            self.na_stop = self.na_stop & ~stop
+            self._reset_ramp(stop)
+
+        coasting = ~self.na_on & (self.current_motor_i > 0)
+        if coasting.any():
+            self.current_motor_i = np.where(
+                coasting, np.maximum(0, self.current_motor_i - self.current_reduction_step * dt), self.current_motor_i)
+            self.p_out = np.where(coasting, np.maximum(self.p_in, self.p_out - self.p_out_decay_rate * dt), self.p_out)
+
+        # calculate_omega
+        target_omega = np.where(self.na_on, self.reference_shaft_speed, 0.0)
+        t = np.maximum(self.simulation_time + dt - self.start_time, 0)
+        spin_up = target_omega - (target_omega - self.start_omega) * np.exp(-t / self.time_constant)
+        coast_down = np.maximum(0, self.start_omega * np.exp(-t / (self.time_constant / 2)))
+        self.current_omega = np.where(self.na_on, spin_up, coast_down)
+
+    def _pump_step(self, target_omega, q, rho, inlet, outlet, dt, tick_dt):
+        """Векторный аналог CentrifugalPump.update_operation для всех насосов сразу."""
+        final = tick_dt > 0
+
+        # Режим работы по состоянию задвижек и ветви update_operation для работающих насосов
+        mode = ~inlet + 2 * ~outlet
+        self.operation_mode = mode
+        on = self.na_on
+        normal, outlet_closed, inlet_closed, pumping = (MODE_FLAGS[mode] & on[:, None]).T
+
+        oil_ok = self.oil_pressure_ok[self.pump_oil]
+        self.max_operating_temp = np.where(oil_ok, MODE_MAX_TEMP[mode], 60.0)
+
+        # Давления
+        ramp_in = pumping & (self.p_in_outside > self.p_in)
+        self.p_in = np.where(ramp_in, np.minimum(self.p_in + self.p_in_rise_rate * dt, self.p_in_outside), self.p_in)
+        delta_p = self._pressure_gain(np.where(outlet_closed, 0.0, q), rho)
+
+        # Расход и ток
+        omega_ratio = np.divide(self.current_omega, target_omega, out=np.zeros(self.n_pumps), where=target_omega > 0)
+        flow = np.where(normal, q * omega_ratio, 0.0)
+        speed_ratio = self.current_omega / self.reference_shaft_speed
+        time_in_mode = self.simulation_time - self.mode_change_time
+        current = self._calculate_current(speed_ratio, time_in_mode, dt)
+        running = on & (self.current_omega >= self.min_shaft_speed_threshold)
+
+        # На последнем подшаге - случайные колебания и температуры за такт
+        if final:
+            noisy = (
+                pumping & (delta_p >= 0.8 * rho * self.g * self.max_head_zero_capacity),
+                normal & (flow >= 0.8 * self.nominal_capacity),
+                running & (current >= self.nominal_current * 0.8),
+            )
+            noise, self.temps = self._fluctuations(noisy, current, running, oil_ok, speed_ratio, time_in_mode, tick_dt)
+            delta_p = delta_p + noise[:, 0]
+            flow = flow + noise[:, 1]
+            current = current + noise[:, 2]
+
+        self.p_out = np.where(pumping, self.p_in + delta_p / 1e6, self.p_out)
+        self.p_in = np.where(inlet_closed, np.maximum(0, self.p_in - self.p_drop_rate * dt), self.p_in)
+        self.p_out = np.where(inlet_closed, np.maximum(0, self.p_out - self.p_drop_rate * dt), self.p_out)
+        self.flow = flow
+        self.current_motor_i = np.where(running, np.maximum(0, current), np.where(on, 0.0, self.current_motor_i))
+        self.simulation_time = self.simulation_time + dt
+
+    # -------------------------------------------------------------------------
+    # Выдача состояния
+    # -------------------------------------------------------------------------
+    def status_fields(self):
+        """Значения, необходимые для BKNS.get_status, в виде списков Python."""
+        return {
+            'na_on': self.na_on.tolist(),
+            'na_off': self.na_off.tolist(),
+            'motor_i': self.current_motor_i.tolist(),
+            'pressure_in': self.pipe_p_out[self.in_pipe].tolist(),
+            'pressure_out': self.p_out.tolist(),
+            'temps': self.temps.T.tolist(),
+            'flow': self.flow.tolist(),
+            'oil_running': self.oil_running.tolist(),
+            'oil_pressure_ok': self.oil_pressure_ok.tolist(),
+            'oil_pressure': self.oil_pressure.tolist(),
+            'valve_state': [VALVE_STATES[code] for code in self.valve_state.tolist()],
+        }
+
+    def sensor_inputs(self):
+        """Физические величины для банка датчиков, в порядке BKNS._sensor_inputs (массивы без копирования)."""
+        return {
+            'valve': (self.valve_temperature, self.valve_pressure, self.valve_position),
+            'pump': (*self.temps.T, self.p_out, self.current_motor_i, self.flow, self.current_omega),
+            'pipe': (self.pipe_p_out, self.pipe_T),
+            'oil': (self.oil_flow_rate, self.oil_temperature),
+            'tank': (self.tank_level, self.tank_density, self.tank_temperature, self.tank_inflow - self.tank_outflow),
+        }
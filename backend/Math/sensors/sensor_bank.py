@@ -0,0 +1,96 @@
+from collections.abc import Mapping
+import numpy as np
+from .analog_current_sensor import values_to_currents
+
+
+# БАНК ДАТЧИКОВ
+class SensorBank:
+    """
+    Банк аналоговых датчиков 4–20 мА одной модели.
+
+    Все датчики регистрируются в непрерывных массивах диапазонов
+    (physical_min/physical_max/current_min/current_max), а пересчёт
+    физических значений в ток выполняется одним векторным проходом convert().
+    Значения читаются через представления values(group), которые ссылаются
+    на общий массив токов и не пересобираются на каждом такте.
+    Массивы диапазонов после build() только для чтения - это параметры,
+    общие для копий модели (Math/Fork.py).
+    """
+
+    FORK_SHARED = ("_index",)
+
+    def __init__(self):
+        self._sensors = []
+        self._index = {}  # group -> {key -> {value_name -> индекс в массиве}}
+        self.currents = np.zeros(0)
+
+    def register(self, group, key, value_name, sensor):
+        """Регистрирует датчик; возвращает его индекс в массивах банка."""
+        idx = len(self._sensors)
+        self._sensors.append(sensor)
+        self._index.setdefault(group, {}).setdefault(key, {})[value_name] = idx
+        return idx
+
+    def build(self):
+        """Собирает массивы диапазонов после регистрации всех датчиков."""
+        sensors = self._sensors
+        self.physical_min = np.array([s.physical_min for s in sensors], dtype=float)
+        self.physical_max = np.array([s.physical_max for s in sensors], dtype=float)
+        self.current_min = np.array([s.current_min for s in sensors], dtype=float)
+        self.current_max = np.array([s.current_max for s in sensors], dtype=float)
+        for array in (self.physical_min, self.physical_max, self.current_min, self.current_max):
+            array.flags.writeable = False
+        self.currents = np.zeros(len(sensors))
+
+    def __len__(self):
+        return len(self._sensors)
+
+    def convert(self, physical):
+        """
+        Пересчитывает токи всех датчиков. physical - значения в порядке регистрации.
+        Массив токов обновляется на месте, чтобы представления оставались актуальными.
+        """
+        np.copyto(self.currents, values_to_currents(
+            physical, self.physical_min, self.physical_max, self.current_min, self.current_max))
+
+    def values(self, group):
+        """Представление токов группы в виде {key: {value_name: мА}}."""
+        return SensorValuesView(self, self._index.get(group, {}))
+
+
+class SensorValuesView(Mapping):
+    """Отображение key -> каналы датчиков агрегата, без копирования данных."""
+
+    FORK_SHARED = ("_index",)
+
+    def __init__(self, bank, index):
+        self._bank = bank
+        self._index = index
+
+    def __getitem__(self, key):
+        return SensorChannelsView(self._bank, self._index[key])
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+class SensorChannelsView(Mapping):
+    """Отображение value_name -> текущий ток (мА) датчика."""
+
+    FORK_SHARED = ("_index",)
+
+    def __init__(self, bank, index):
+        self._bank = bank
+        self._index = index
+
+    def __getitem__(self, value_name):
+        return float(self._bank.currents[self._index[value_name]])
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
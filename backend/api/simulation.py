@@ -1,17 +1,31 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
+from typing import List
 import asyncio
 import uuid
-import importlib.util
 import os
+import re
+import sys
 
 from state import (
     sessions, session_states, previous_states, session_last_full_sync,
+    session_status_versions, session_publish_filters, session_broadcasters, session_snapshots,
+    session_schedulers, session_runners, session_historians, session_journals, session_configs,
     opc_adapters, SERVER_URL, SESSIONS_DIR
 )
 from logic import control_logic
 from opc_utils import send_to_server
 from opc_adapter import OPCAdapter
+from publish_filter import PublishFilter
+from broadcaster import StateBroadcaster
+from status_cache import get_snapshot, etag_matches
+from tick_scheduler import TickScheduler
+from model_runner import create_runner
+from session_supervisor import supervisor
+from historian import Historian
+from journal import SessionJournal, list_runs, replay
+from session_config import get_template, module_name
 from background_tasks import update_loop
 
 api_router = APIRouter(prefix="/api")
@@ -28,10 +42,46 @@ def get_modes(session_id: str):
      return control_logic.control_modes.get(session_id, {})
 
 @api_router.get("/simulation/{session_id}/status")
-def get_state(session_id: str):
+def get_state(session_id: str, request: Request):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail=f"Сессия '{session_id}' не найдена или еще не загружена.")
-    return sessions[session_id].get_status()
+    # Снимок публикуется update_loop раз за такт; клиент с актуальным ETag получает 304
+    etag, body = get_snapshot(session_id, sessions[session_id])
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Интервал комментария-пинга в потоке, чтобы прокси не закрывали соединение
+STREAM_KEEPALIVE = 15
+
+@api_router.get("/simulation/{session_id}/stream")
+async def stream_state(session_id: str, request: Request):
+    """
+    Поток состояния сессии (Server-Sent Events): первое сообщение - полный снимок
+    {"type": "snapshot", "status", "control_modes", "state"}, далее раз за такт -
+    {"type": "delta", "changes", ...} только с изменившимися значениями.
+    """
+    broadcaster = session_broadcasters.get(session_id)
+    if broadcaster is None:
+        raise HTTPException(status_code=404, detail=f"Сессия '{session_id}' не найдена или еще не загружена.")
+
+    queue = broadcaster.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {data}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @api_router.post("/simulation/{session_id}/pause")
@@ -51,6 +101,36 @@ def resume_simulation(session_id: str):
     return {"status": "resumed"}
 
 
+@api_router.get("/simulation/workers")
+def get_model_workers():
+    """Пул рабочих процессов моделей: какие сессии в каком процессе."""
+    return supervisor.get_stats()
+
+@api_router.get("/simulation/{session_id}/tick/stats")
+def get_tick_stats(session_id: str):
+    """Статистика тактов update_loop: частота, перегрузки, пропуски, джиттер."""
+    scheduler = session_schedulers.get(session_id)
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    return scheduler.get_stats()
+
+class TickRateCommand(BaseModel):
+    rate_hz: float
+    policy: str = None
+
+@api_router.post("/simulation/{session_id}/tick/rate")
+def set_tick_rate(session_id: str, cmd: TickRateCommand):
+    scheduler = session_schedulers.get(session_id)
+    if scheduler is None:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    try:
+        scheduler.set_rate(cmd.rate_hz, cmd.policy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"[SYSTEM] Частота тактов сессии {session_id}: {cmd.rate_hz} Гц ({scheduler.policy})")
+    return {"status": "OK", "rate_hz": scheduler.rate_hz, "policy": scheduler.policy}
+
+
 class ManualParamCommand(BaseModel):
     source: str
     component: str
@@ -61,6 +141,184 @@ class ManualParamCommand(BaseModel):
 def manual_cmd(session_id: str, cmd: ManualParamCommand):
     return control_logic.process_command(session_id, cmd.source, cmd.component, cmd.param, cmd.value)
 
+# Ограничения пакетного прогона, чтобы один запрос не занимал сервер надолго
+PREVIEW_MAX_STEPS = 86400
+PREVIEW_MAX_RECORDS = 2000
+
+class PreviewCommand(BaseModel):
+    step: int
+    component: str
+    param: str
+
+class PreviewRequest(BaseModel):
+    steps: int
+    dt: float = 1.0
+    record_every: int = 1
+    commands: List[PreviewCommand] = []
+
+@api_router.post("/simulation/{session_id}/preview")
+async def preview_simulation(session_id: str, req: PreviewRequest):
+    """
+    Прогоняет копию модели сессии на steps шагов с фиксированным dt быстрее
+    реального времени и возвращает траекторию. Живая модель не изменяется.
+    """
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    if not 0 < req.steps <= PREVIEW_MAX_STEPS:
+        raise HTTPException(status_code=400, detail=f"steps должно быть в диапазоне 1..{PREVIEW_MAX_STEPS}")
+    if req.dt <= 0:
+        raise HTTPException(status_code=400, detail="dt должно быть больше 0")
+    if req.steps / max(1, req.record_every) > PREVIEW_MAX_RECORDS:
+        raise HTTPException(status_code=400, detail=f"Слишком много точек траектории, максимум {PREVIEW_MAX_RECORDS}. Увеличьте record_every.")
+
+    commands = [(cmd.step, cmd.component, cmd.param) for cmd in req.commands]
+    runner = session_runners[session_id]
+    try:
+        # Копия снимается между тактами модели, прогон идёт вне цикла событий
+        trajectory = await runner.preview(req.steps, req.dt, commands, req.record_every)
+    except Exception as e:
+        print(f"[PREVIEW] Ошибка прогона сессии {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка прогона модели: {e}")
+
+    return {"session_id": session_id, "dt": req.dt, "steps": req.steps, "trajectory": trajectory}
+
+@api_router.get("/simulation/{session_id}/history/tags")
+def get_history_tags(session_id: str):
+    historian = session_historians.get(session_id)
+    if historian is None:
+        raise HTTPException(status_code=404, detail="Архив для сессии не ведётся")
+    return historian.tags()
+
+# Ограничение числа точек на тег в ответе /history
+HISTORY_MAX_POINTS = 10000
+
+@api_router.get("/simulation/{session_id}/history")
+def get_history(session_id: str, tags: str, from_: float = Query(None, alias="from"), to: float = None,
+                max_points: int = 1000, mode: str = "lttb"):
+    """
+    Тренды тегов tags ("component/param" через запятую) за интервал [from, to] (Unix-время, с).
+    Не больше max_points точек на тег: mode="lttb" - {"t", "v"} (прореживание LTTB),
+    "minmax" - {"t", "min", "max", "avg"} по интервалам, "raw" - исходные значения.
+    Длинные интервалы считаются по заранее посчитанным агрегатам архива.
+    """
+    historian = session_historians.get(session_id)
+    if historian is None:
+        raise HTTPException(status_code=404, detail="Архив для сессии не ведётся")
+    if not 2 <= max_points <= HISTORY_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"max_points должно быть в диапазоне 2..{HISTORY_MAX_POINTS}")
+    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    try:
+        result = historian.query(tag_list, from_, to, max_points, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"from": from_, "to": to, "mode": mode, **result}
+
+@api_router.get("/simulation/{session_id}/journal")
+def get_journal(session_id: str):
+    """Текущий журнал сессии (запуск, такт, снимки) и все записанные запуски."""
+    journal = session_journals.get(session_id)
+    return {"current": journal.info() if journal else None, "runs": list_runs(session_id)}
+
+class ReplayRequest(BaseModel):
+    run: str = None
+    from_tick: int = 0
+    to_tick: int = None
+    record_every: int = 1
+
+@api_router.post("/simulation/{session_id}/replay")
+async def replay_session(session_id: str, req: ReplayRequest):
+    """
+    Воспроизводит записанный запуск сессии (по умолчанию - текущий) с такта from_tick
+    по to_tick быстрее реального времени и возвращает траекторию [{"tick", "status"}].
+    Живая модель не затрагивается.
+    """
+    journal = session_journals.get(session_id)
+    run = req.run or (journal.run if journal else None)
+    if run is None or run not in list_runs(session_id):
+        raise HTTPException(status_code=404, detail="Журнал не найден")
+    current_tick = journal.tick if journal is not None and run == journal.run else None
+    try:
+        trajectory = await asyncio.to_thread(
+            replay, session_id, run, req.from_tick, req.to_tick, max(1, req.record_every), PREVIEW_MAX_RECORDS, current_tick
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[REPLAY] Ошибка воспроизведения сессии {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка воспроизведения: {e}")
+    return {"session_id": session_id, "run": run, "trajectory": trajectory}
+
+@api_router.get("/simulation/{session_id}/snapshot")
+async def get_model_snapshot(session_id: str):
+    """
+    Двоичный снимок состояния модели (Math/Snapshot.py) - единицы килобайт.
+    Восстанавливается через POST /restore в сессию с тем же config.py.
+    """
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    tick, data = await session_runners[session_id].snapshot()
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": f'attachment; filename="{session_id}_{tick}.snapshot"',
+            "X-Model-Tick": str(tick),
+        },
+    )
+
+@api_router.post("/simulation/{session_id}/restore")
+async def restore_model_snapshot(session_id: str, request: Request):
+    """Восстанавливает модель из снимка GET /snapshot (тело запроса - двоичный снимок)."""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    data = await request.body()
+    try:
+        await session_runners[session_id].restore(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"[SNAPSHOT] Ошибка восстановления сессии {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка восстановления: {e}")
+    print(f"[SNAPSHOT] Сессия {session_id} восстановлена из снимка ({len(data)} байт)")
+    return {"session_id": session_id, "status": "restored"}
+
+@api_router.get("/simulation/{session_id}/checkpoints")
+def get_checkpoints(session_id: str):
+    """Контрольные точки модели для перемотки назад (CHECKPOINTS в config.py сессии)."""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    runner = session_runners[session_id]
+    return {"interval": runner.checkpoint_interval, "checkpoints": runner.checkpoint_info()}
+
+class RewindRequest(BaseModel):
+    seconds: float
+
+@api_router.post("/simulation/{session_id}/rewind")
+async def rewind_session(session_id: str, req: RewindRequest):
+    """
+    Перематывает модель назад: восстанавливает последнюю контрольную точку,
+    снятую не позже seconds секунд назад (или самую старую из имеющихся).
+    Более поздние точки удаляются.
+    """
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    if req.seconds < 0:
+        raise HTTPException(status_code=400, detail="seconds должно быть не меньше 0")
+    try:
+        checkpoint = await session_runners[session_id].rewind(req.seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"[SNAPSHOT] Сессия {session_id} перемотана на такт {checkpoint['tick']}")
+    return {"session_id": session_id, "status": "restored", **checkpoint}
+
+@api_router.get("/simulation/{session_id}/opc/stats")
+def get_opc_stats(session_id: str):
+    """Состояние очереди записи OPC: глубина, отброшенные/заменённые записи, задержка."""
+    adapter = opc_adapters.get(session_id)
+    if adapter is None:
+        raise HTTPException(status_code=404, detail="OPC адаптер для сессии не найден")
+    return {"connected": adapter.is_running, **adapter.get_write_stats()}
+
 @api_router.post("/simulation/{session_id}/sync")
 async def sync(session_id: str, background_tasks: BackgroundTasks):
     adapter = opc_adapters.get(session_id)
@@ -128,6 +386,84 @@ def debug_overrides():
     return all_overrides
 
 
+async def start_session(session_id, runner, config_module, config_session, config_path):
+    """
+    Регистрирует сессию с запущенным исполнителем модели и запускает её OPC-адаптер
+    и цикл обновления. config_session - сессия, чей config.py загружен как config_module.
+    """
+    checkpoint_config = getattr(config_module, "CHECKPOINTS", None)
+    if checkpoint_config is not None:
+        runner.configure_checkpoints(**checkpoint_config)
+    model = runner.model
+
+    sessions[session_id] = model
+    session_runners[session_id] = runner
+    session_configs[session_id] = (config_session, config_path)
+    session_states[session_id] = {"running": True}
+    previous_states[session_id] = {}
+    session_status_versions.pop(session_id, None)
+    session_snapshots.pop(session_id, None)
+    session_publish_filters[session_id] = PublishFilter(getattr(config_module, "PUBLISH_FILTER", None))
+    session_broadcasters[session_id] = StateBroadcaster(session_id, model)
+    session_schedulers[session_id] = TickScheduler(
+        getattr(config_module, "TICK_RATE", 1.0), getattr(config_module, "TICK_POLICY", "skip")
+    )
+    journal_config = getattr(config_module, "JOURNAL", None)
+    if journal_config is not None:
+        journal = SessionJournal(session_id, config_path, config_session=config_session, **journal_config)
+        await runner.attach_journal(journal)
+        session_journals[session_id] = journal
+    historian_config = getattr(config_module, "HISTORIAN", None)
+    if historian_config is not None:
+        session_historians[session_id] = Historian(session_id, **historian_config)
+    session_last_full_sync[session_id] = 0
+    control_logic.control_modes.setdefault(session_id, {})
+    control_logic.manual_overrides.setdefault(session_id, {})
+
+    opc_adapter = OPCAdapter(SERVER_URL, control_logic, sessions, send_to_server, session_id)
+    opc_adapters[session_id] = opc_adapter
+    asyncio.create_task(opc_adapter.run())
+
+    asyncio.create_task(update_loop(session_id))
+
+class ForkSessionRequest(BaseModel):
+    name: str = None
+
+@api_router.post("/simulation/{session_id}/fork")
+async def fork_session(session_id: str, req: ForkSessionRequest):
+    """
+    Создаёт новую сессию - копию живой модели session_id в её текущем состоянии
+    (Math/Fork.py): параметры модели общие, состояние своё. Копия работает
+    независимо от исходной сессии, в том же режиме исполнения; источник
+    управления и ручные значения оператора копируются.
+    По умолчанию имя - "<session_id>-fork<N>".
+    """
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Сессия не найдена")
+    name = req.name
+    if name is None:
+        number = 1
+        while f"{session_id}-fork{number}" in sessions:
+            number += 1
+        name = f"{session_id}-fork{number}"
+    if not re.fullmatch(r"[\w.-]+", name):
+        raise HTTPException(status_code=400, detail="Имя сессии может содержать только буквы, цифры, '_', '-' и '.'")
+    if name in sessions:
+        raise HTTPException(status_code=409, detail=f"Сессия '{name}' уже загружена и активна.")
+
+    config_session, config_path = session_configs[session_id]
+    try:
+        runner = await session_runners[session_id].fork(name)
+    except Exception as e:
+        print(f"[FORK] Ошибка копирования сессии {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка копирования модели: {e}")
+    control_logic.control_modes[name] = dict(control_logic.control_modes.get(session_id, {}))
+    control_logic.manual_overrides[name] = dict(control_logic.manual_overrides.get(session_id, {}))
+    await start_session(name, runner, sys.modules[module_name(config_session)], config_session, config_path)
+
+    print(f"[SYSTEM] Сессия '{name}' создана копированием сессии '{session_id}'.")
+    return {"session_id": name, "source": session_id, "status": "loaded"}
+
 class LoadSessionRequest(BaseModel):
     session_name: str
 
@@ -146,30 +482,26 @@ async def load_session(data: LoadSessionRequest):
         if not os.path.exists(full_path):
              raise FileNotFoundError(f"Конфигурационный файл не найден: {full_path}")
 
-        spec = importlib.util.spec_from_file_location(session_id, full_path)
-        config_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(config_module)
-
-        model = config_module.MODEL
-
-        sessions[session_id] = model
-        session_states[session_id] = {"running": True}
-        previous_states[session_id] = {}
-        session_last_full_sync[session_id] = 0
-        control_logic.control_modes[session_id] = {}
-        control_logic.manual_overrides[session_id] = {}
-
-        opc_adapter = OPCAdapter(SERVER_URL, control_logic, sessions, send_to_server, session_id)
-        opc_adapters[session_id] = opc_adapter
-        asyncio.create_task(opc_adapter.run())
+        # config.py выполняется только при первой загрузке и после изменения файла,
+        # модель сессии - копия шаблона из кэша
+        template = get_template(session_id, full_path)
+        config_module = template.module
 
-        asyncio.create_task(update_loop(session_id))
+        # Исполнитель модели: в цикле событий, в потоке или в отдельном процессе
+        # (в режиме "process" модель создаёт рабочий процесс)
+        mode = getattr(config_module, "EXECUTION_MODE", "inline")
+        model = template.create_model() if mode != "process" else None
+        runner = create_runner(mode, session_id, model, full_path, supervisor)
+        await runner.start()
+        await start_session(session_id, runner, config_module, session_id, full_path)
 
         print(f"[SYSTEM] Сессия '{session_id}' успешно загружена из папки.")
         return {"session_id": session_id, "status": "loaded"}
 
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"КРИТИЧЕСКАЯ ОШИБКА при загрузке сессии '{session_id}': {e}")
         raise HTTPException(status_code=500, detail=f"Внутренняя ошибка при загрузке сессии: {e}")
@@ -1,6 +1,10 @@
 import asyncio
-from state import sessions, session_states, previous_states
+from state import (
+    sessions, session_states, session_broadcasters, session_schedulers, session_runners, session_historians
+)
 from opc_utils import send_to_server
+from tick_scheduler import TickScheduler
+from model_runner import InlineRunner
 
 async def update_loop(session_id: str):
 
@@ -11,21 +15,38 @@ async def update_loop(session_id: str):
         print(f"[ERROR] Модель для сессии {session_id} не найдена в update_loop.")
         return
 
+    # Такты идут с частотой планировщика сессии; шаг модели dt задаёт планировщик
+    scheduler = session_schedulers.setdefault(session_id, TickScheduler())
+    # Где шагает модель (цикл событий, поток или процесс) - задаёт EXECUTION_MODE сессии
+    runner = session_runners.get(session_id)
+    if runner is None:
+        runner = session_runners[session_id] = InlineRunner(session_id, model)
+
     while session_id in sessions:
         try:
+            dt = await scheduler.wait()
+
             if session_states.get(session_id, {}).get("running", False):
-                model.update_system()
-                
-                current_state = model.get_status()
+                # Шаг модели; готовый JSON статуса для /status публикуется исполнителем раз за такт
+                await runner.step(dt)
+
+                # Значения такта - в архив (запись на диск идёт чанками в потоке архива)
+                historian = session_historians.get(session_id)
+                if historian is not None:
+                    historian.record(model.get_status())
                 
+                # Изменившиеся теги определяются в send_to_server (по версиям модели или сравнением)
                 await send_to_server(session_id)
-                
-                previous_states[session_id] = current_state
 
-            await asyncio.sleep(1)
+            # Изменения такта (и пауза/режимы управления) - всем открытым панелям
+            broadcaster = session_broadcasters.get(session_id)
+            if broadcaster is not None:
+                broadcaster.publish()
         except asyncio.CancelledError:
             print(f"Update loop для сессии {session_id} остановлен.")
+            runner.close()
             break
         except Exception as e:
             print(f"ОШИБКА в цикле обновления для сессии {session_id}: {e}")
-            await asyncio.sleep(5) # Пауза перед повторной попыткой в случае ошибки
\ No newline at end of file
+            await asyncio.sleep(5) # Пауза перед повторной попыткой в случае ошибки
+            scheduler.reset()
\ No newline at end of file
@@ -0,0 +1,91 @@
+# broadcaster.py
+import asyncio
+
+from state import session_states
+from logic import control_logic
+from status_cache import dumps
+
+
+class StateBroadcaster:
+    """
+    Раздача состояния сессии подписчикам (вкладкам панели) по SSE.
+
+    Один производитель - update_loop - раз за такт вызывает publish(): изменения
+    модели вычисляются и кодируются в JSON один раз, а готовая строка
+    раскладывается по очередям всех подписчиков. Новый подписчик сначала
+    получает полный снимок, затем только изменения (delta).
+
+    Очередь каждого подписчика ограничена: если вкладка не успевает читать,
+    её очередь очищается и ей отправляется новый полный снимок.
+    """
+
+    QUEUE_SIZE = 30
+
+    def __init__(self, session_id, model):
+        self.session_id = session_id
+        self.model = model
+        self.subscribers = set()
+        self.version = getattr(model, "status_version", None)  # версия статуса модели в последнем сообщении
+        self._last_status = {}       # для моделей без get_changes
+        self._last_extra = None      # режимы управления и running/paused
+
+    def _extra(self):
+        """Данные сессии помимо модели: режимы управления и состояние симуляции."""
+        return {
+            "control_modes": control_logic.control_modes.get(self.session_id, {}),
+            "state": "running" if session_states.get(self.session_id, {}).get("running") else "paused",
+        }
+
+    def _snapshot_message(self):
+        get_changes = getattr(self.model, "get_changes", None)
+        if get_changes is not None:
+            version, status = get_changes(None)
+        else:
+            version, status = None, self.model.get_status()
+        return dumps({"type": "snapshot", "version": version, "status": status, **self._extra()})
+
+    def subscribe(self):
+        """Регистрирует подписчика; первым сообщением в очереди будет полный снимок."""
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        queue.put_nowait(self._snapshot_message())
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def publish(self):
+        """Вычисляет изменения за такт и рассылает их всем подписчикам."""
+        get_changes = getattr(self.model, "get_changes", None)
+        if get_changes is not None:
+            version, changes = get_changes(self.version)
+        else:
+            version, status = None, self.model.get_status()
+            changes = {}
+            for component, params in status.items():
+                old = self._last_status.get(component, {})
+                for param, value in params.items():
+                    if param not in old or old[param] != value:
+                        changes.setdefault(component, {})[param] = value
+            self._last_status = {component: dict(params) for component, params in status.items()}
+        self.version = version
+
+        message = {"type": "delta", "version": version}
+        if changes:
+            message["changes"] = changes
+        extra = self._extra()
+        if extra != self._last_extra:
+            self._last_extra = {"control_modes": dict(extra["control_modes"]), "state": extra["state"]}
+            message.update(extra)
+        if len(message) == 2 or not self.subscribers:
+            return
+
+        data = dumps(message)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                # Медленный подписчик: вместо накопленных изменений - новый снимок
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot_message())
@@ -0,0 +1,60 @@
+# downsample.py
+import numpy as np
+
+
+def merge_buckets(keys, mins, maxs, sums, counts):
+    """
+    Сводит агрегаты с одинаковым ключом (начало интервала, мс) в один.
+    keys должны быть неубывающими. Возвращает (keys, mins, maxs, sums, counts).
+    """
+    keys = np.asarray(keys)
+    if keys.size == 0:
+        return keys, np.asarray(mins), np.asarray(maxs), np.asarray(sums), np.asarray(counts)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (
+        keys[starts],
+        np.minimum.reduceat(mins, starts),
+        np.maximum.reduceat(maxs, starts),
+        np.add.reduceat(sums, starts),
+        np.add.reduceat(counts, starts),
+    )
+
+
+def aggregate(times_ms, values, bucket_ms, origin_ms=0):
+    """Агрегаты min/max/sum/count исходных значений по интервалам bucket_ms (times_ms - по возрастанию)."""
+    times_ms = np.asarray(times_ms, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    keys = origin_ms + (times_ms - origin_ms) // bucket_ms * bucket_ms
+    return merge_buckets(keys, values, values, values, np.ones(values.size))
+
+
+def lttb(times, values, n):
+    """
+    Largest-Triangle-Three-Buckets: индексы n точек ряда, сохраняющих его форму.
+    Первая и последняя точки входят всегда.
+    """
+    size = len(times)
+    if n >= size or n < 3:
+        return np.arange(size) if n >= size else np.linspace(0, size - 1, max(n, 0)).astype(int)
+
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)  # границы n-2 внутренних корзин
+    selected = np.empty(n, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+
+    a = 0
+    for i in range(n - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Опорная точка следующей корзины - её среднее (для последней - последняя точка)
+        if i + 2 < n - 1:
+            next_start, next_stop = edges[i + 1], edges[i + 2]
+            avg_t = times[next_start:next_stop].mean()
+            avg_v = values[next_start:next_stop].mean()
+        else:
+            avg_t, avg_v = times[-1], values[-1]
+        t, v = times[start:stop], values[start:stop]
+        area = np.abs((times[a] - avg_t) * (v - values[a]) - (times[a] - t) * (avg_v - values[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
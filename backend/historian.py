@@ -0,0 +1,396 @@
+# historian.py
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from downsample import aggregate, lttb, merge_buckets
+from state import HISTORY_DIR
+
+# Уровни предварительной агрегации (длительность интервала, с)
+ROLLUP_LEVELS = (60, 600, 3600)
+# Запись агрегата: начало интервала (мс), id тега, min, max, sum, count - всё float64
+ROLLUP_FIELDS = 6
+QUERY_MODES = ("lttb", "minmax", "raw")
+
+
+# ---- Сжатие столбцов (в духе Gorilla) ----
+
+def _pack(data):
+    """Байтовая перестановка (shuffle) 8-байтовых слов и zlib: одинаковые старшие байты идут подряд."""
+    return zlib.compress(np.ascontiguousarray(data.view(np.uint8).reshape(-1, 8).T).tobytes(), 6)
+
+
+def _unpack(blob, count):
+    raw = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(8, count)
+    return np.ascontiguousarray(raw.T).view(np.uint64).ravel()
+
+
+def encode_times(times_ms):
+    """Метки времени (мс, int64): хранится разность второго порядка - при ровном такте почти одни нули."""
+    times_ms = np.asarray(times_ms, dtype=np.int64)
+    dod = np.diff(np.diff(times_ms, prepend=0), prepend=0)
+    return _pack(dod.view(np.uint64))
+
+
+def decode_times(blob, count):
+    return np.cumsum(np.cumsum(_unpack(blob, count).view(np.int64)))
+
+
+def encode_values(values):
+    """Значения float64: XOR с предыдущим значением - у медленно меняющихся тегов остаются нулевые байты."""
+    bits = np.asarray(values, dtype=np.float64).view(np.uint64)
+    xor = bits.copy()
+    xor[1:] ^= bits[:-1]
+    return _pack(xor)
+
+
+def decode_values(blob, count):
+    return np.bitwise_xor.accumulate(_unpack(blob, count)).view(np.float64)
+
+
+class Historian:
+    """
+    Архив значений тегов сессии на диске.
+
+    update_loop раз за такт передаёт в record() статус модели. Значения копятся
+    в памяти столбцами (тег -> значения), по chunk_ticks тактов столбцы сжимаются
+    и дописываются отдельным файлом-чанком в HISTORY_DIR/<session_id>/:
+        <начало, мс>.npz - столбец времени "t" и по столбцу на тег "component/param";
+        index.jsonl      - индекс по времени: одна строка на чанк {file, start, end, count};
+        rollup_<L>.bin   - агрегаты min/max/sum/count по интервалам L с (ROLLUP_LEVELS),
+                           дописываются вместе с чанком; tags.json - номера тегов в них.
+    Запись чанка идёт в отдельном потоке. Файлы только дописываются; при повторной
+    загрузке сессии архив продолжается. Дискретные (bool) теги хранятся как 0/1
+    и восстанавливаются при чтении. Нечисловые значения не архивируются.
+
+    Настройки - переменная HISTORIAN в config.py сессии, например {"chunk_ticks": 600}.
+    """
+
+    def __init__(self, session_id, chunk_ticks=600, directory=None):
+        self.session_id = session_id
+        self.chunk_ticks = chunk_ticks
+        self.directory = os.path.join(directory or HISTORY_DIR, session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, "index.jsonl")
+        self.index = self._load_index()
+        self.tags_path = os.path.join(self.directory, "tags.json")
+        self.tag_ids = self._load_tag_ids()
+        self._truncate_rollups()
+        self.kinds = {}  # тег -> "bool" | "float"
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"historian-{session_id}")
+        self._pending = []  # чанки, отданные на запись, но ещё не попавшие в индекс
+        self._new_buffer()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _load_tag_ids(self):
+        if not os.path.exists(self.tags_path):
+            return {}
+        with open(self.tags_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _rollup_path(self, level):
+        return os.path.join(self.directory, f"rollup_{level}.bin")
+
+    def _rollup_sizes(self):
+        """Размеры файлов агрегатов, покрывающие проиндексированные чанки."""
+        return self.index[-1].get("rollup_bytes", {}) if self.index else {}
+
+    def _truncate_rollups(self):
+        """Отрезает агрегаты, дописанные после последней строки индекса (запись прервалась)."""
+        sizes = self._rollup_sizes()
+        for level in ROLLUP_LEVELS:
+            path = self._rollup_path(level)
+            if os.path.exists(path) and os.path.getsize(path) > sizes.get(str(level), 0):
+                with open(path, "r+b") as f:
+                    f.truncate(sizes.get(str(level), 0))
+
+    def _new_buffer(self):
+        self.times = []
+        self.columns = {}  # тег -> список значений (NaN там, где тега ещё не было)
+
+    def _seal(self):
+        """Отдаёт текущий чанк на запись; до записи он остаётся доступен для чтения."""
+        chunk = (self.times, self.columns)
+        self._pending.append(chunk)
+        self._new_buffer()
+        return chunk
+
+    def record(self, status, now=None):
+        """Добавляет значения тегов на момент now (с, по умолчанию - текущее время)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            count = len(self.times)
+            self.times.append(int(now * 1000))
+            for component, params in status.items():
+                for param, value in params.items():
+                    if isinstance(value, (bool, np.bool_)):
+                        kind = "bool"
+                    elif isinstance(value, (int, float, np.number)):
+                        kind = "float"
+                    else:
+                        continue
+                    tag = f"{component}/{param}"
+                    column = self.columns.get(tag)
+                    if column is None:
+                        column = self.columns[tag] = [np.nan] * count
+                        self.kinds.setdefault(tag, kind)
+                    column.append(float(value))
+            # Теги, которых в этом такте не было
+            for column in self.columns.values():
+                if len(column) <= count:
+                    column.append(np.nan)
+            chunk = self._seal() if len(self.times) >= self.chunk_ticks else None
+        if chunk is not None:
+            self._writer.submit(self._write_chunk, chunk)
+
+    def flush(self):
+        """Записывает неполный текущий чанк (например, при остановке) и ждёт окончания записи."""
+        with self._lock:
+            chunk = self._seal() if self.times else None
+        if chunk is not None:
+            self._writer.submit(self._write_chunk, chunk)
+        self._writer.submit(lambda: None).result()
+
+    def close(self):
+        self.flush()
+        self._writer.shutdown(wait=True)
+
+    def _write_chunk(self, chunk):
+        times, columns = chunk
+        try:
+            count = len(times)
+            name = f"{times[0]}.npz"
+            arrays = {"t": np.frombuffer(encode_times(times), dtype=np.uint8)}
+            for tag, values in columns.items():
+                arrays[tag] = np.frombuffer(encode_values(values), dtype=np.uint8)
+            path = os.path.join(self.directory, name)
+            with open(path + ".tmp", "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(path + ".tmp", path)
+            rollup_bytes = self._write_rollups(times, columns)
+
+            entry = {"file": name, "start": times[0], "end": times[-1], "count": count,
+                     "kinds": {tag: self.kinds[tag] for tag in columns}, "rollup_bytes": rollup_bytes}
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            with self._lock:
+                self.index.append(entry)
+                self._pending.remove(chunk)
+        except Exception as e:
+            print(f"[HISTORIAN] Ошибка записи чанка сессии {self.session_id}: {e}")
+
+    def _write_rollups(self, times, columns):
+        """Дописывает агрегаты чанка по всем уровням; возвращает новые размеры файлов."""
+        new_tags = [tag for tag in columns if tag not in self.tag_ids]
+        if new_tags:
+            for tag in new_tags:
+                self.tag_ids[tag] = len(self.tag_ids)
+            with open(self.tags_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.tag_ids, f)
+            os.replace(self.tags_path + ".tmp", self.tags_path)
+
+        times = np.asarray(times, dtype=np.int64)
+        sizes = {}
+        for level in ROLLUP_LEVELS:
+            records = []
+            for tag, values in columns.items():
+                values = np.asarray(values, dtype=np.float64)
+                mask = ~np.isnan(values)
+                if not mask.any():
+                    continue
+                keys, mins, maxs, sums, counts = aggregate(times[mask], values[mask], level * 1000)
+                records.append(np.column_stack(
+                    [keys, np.full(keys.size, self.tag_ids[tag]), mins, maxs, sums, counts]
+                ).astype(np.float64))
+            path = self._rollup_path(level)
+            if records:
+                records = np.concatenate(records)
+                # Файл упорядочен по началу интервала - поиск диапазона бинарным поиском
+                records = records[np.argsort(records[:, 0], kind="stable")]
+                with open(path, "ab") as f:
+                    f.write(records.tobytes())
+            sizes[str(level)] = os.path.getsize(path) if os.path.exists(path) else 0
+        return sizes
+
+    def tags(self):
+        """Все теги архива (на диске и в текущем чанке)."""
+        with self._lock:
+            tags = set(self.columns)
+            for _, columns in self._pending:
+                tags.update(columns)
+            for entry in self.index:
+                tags.update(entry["kinds"])
+        return sorted(tags)
+
+    def read(self, tag, start=None, end=None):
+        """
+        Значения тега "component/param" за интервал [start, end] (с, Unix-время).
+        Возвращает (times, values) - массивы NumPy, время в секундах.
+        """
+        start_ms = -np.inf if start is None else start * 1000
+        end_ms = np.inf if end is None else end * 1000
+        with self._lock:
+            entries = [e for e in self.index if e["end"] >= start_ms and e["start"] <= end_ms]
+            # Данные в памяти: отданные на запись чанки и текущий (копии, т.к. текущий пополняется)
+            memory = [(times, columns[tag]) for times, columns in self._pending if tag in columns]
+            if tag in self.columns:
+                memory.append((list(self.times), list(self.columns[tag])))
+            kind = self.kinds.get(tag)
+
+        parts_t, parts_v = [], []
+        for entry in entries:
+            if tag not in entry["kinds"]:
+                continue
+            with np.load(os.path.join(self.directory, entry["file"])) as chunk:
+                times = decode_times(chunk["t"].tobytes(), entry["count"])
+                values = decode_values(chunk[tag].tobytes(), entry["count"])
+            kind = entry["kinds"][tag]
+            parts_t.append(times)
+            parts_v.append(values)
+        for times, values in memory:
+            parts_t.append(np.asarray(times, dtype=np.int64))
+            parts_v.append(np.asarray(values, dtype=np.float64))
+
+        if not parts_t:
+            return np.empty(0), np.empty(0)
+        times = np.concatenate(parts_t)
+        values = np.concatenate(parts_v)
+        mask = (times >= start_ms) & (times <= end_ms) & ~np.isnan(values)
+        times, values = times[mask] / 1000.0, values[mask]
+        if kind == "bool":
+            values = values.astype(bool)
+        return times, values
+
+    def _read_rollups(self, level, size, start_ms, end_ms):
+        """Записи агрегатов уровня level за [start_ms, end_ms] (все теги) из первых size байт файла."""
+        path = self._rollup_path(level)
+        count = size // (8 * ROLLUP_FIELDS)
+        if count == 0 or not os.path.exists(path):
+            return np.empty((0, ROLLUP_FIELDS))
+        records = np.memmap(path, dtype=np.float64, mode="r", shape=(count, ROLLUP_FIELDS))
+        level_ms = level * 1000
+        lo = np.searchsorted(records[:, 0], start_ms // level_ms * level_ms, side="left")
+        hi = np.searchsorted(records[:, 0], end_ms, side="right")
+        return np.array(records[lo:hi])
+
+    def query(self, tags, start=None, end=None, max_points=1000, mode="lttb"):
+        """
+        Ряды тегов за [start, end] (с, Unix-время), не длиннее max_points точек.
+
+        mode: "lttb"   - {"t", "v"}: ряд, прорежённый алгоритмом LTTB;
+              "minmax" - {"t", "min", "max", "avg"}: агрегаты по интервалам;
+              "raw"    - {"t", "v"}: исходные значения без прореживания.
+        Для длинных интервалов исходные значения не читаются: берётся самый
+        грубый уровень агрегатов ROLLUP_LEVELS, который ещё даёт не меньше
+        max_points интервалов (лишние LTTB прореживает, а minmax укрупняет).
+        Неполные интервалы на краях [start, end] считаются по исходным значениям,
+        поэтому точки вне запрошенного интервала в ответ не попадают.
+        Возвращает {"resolution": длительность интервала агрегатов, с (None - исходные), "series": {тег: ряд}}.
+        """
+        if mode not in QUERY_MODES:
+            raise ValueError(f"Неизвестный режим: {mode}. Допустимо: {QUERY_MODES}")
+        if max_points < 2:
+            raise ValueError("max_points должно быть не меньше 2")
+
+        with self._lock:
+            index = list(self.index)
+            memory_start = self._pending[0][0][0] if self._pending else (self.times[0] if self.times else None)
+            memory_count = sum(len(times) for times, _ in self._pending) + len(self.times)
+        sizes = index[-1].get("rollup_bytes", {}) if index else {}
+        rolled_end = index[-1]["end"] if index else None
+
+        now_ms = time.time() * 1000
+        first_ms = index[0]["start"] if index else (memory_start if memory_start is not None else now_ms)
+        start_ms = first_ms if start is None else start * 1000
+        end_ms = now_ms if end is None else end * 1000
+        span = max(end_ms - start_ms, 1)
+
+        # Сколько исходных точек в интервале (по индексу - с точностью до чанка)
+        raw_count = sum(e["count"] for e in index if e["end"] >= start_ms and e["start"] <= end_ms)
+        if memory_start is not None and memory_start <= end_ms:
+            raw_count += memory_count
+        level = None
+        if mode != "raw" and raw_count > max_points and rolled_end is not None:
+            # Если даже самый подробный уровень даёт меньше max_points интервалов - читаются исходные значения
+            levels = [L for L in ROLLUP_LEVELS if span / (L * 1000) >= max_points]
+            level = levels[-1] if levels else None
+
+        series = {}
+        if level is None:
+            for tag in tags:
+                times, values = self.read(tag, start_ms / 1000, end_ms / 1000)
+                series[tag] = self._downsample_raw(times, values, start_ms, span, max_points, mode)
+            return {"resolution": None, "series": series}
+
+        level_ms = level * 1000
+        # Из агрегатов - [rolled_start, rolled_stop): интервалы целиком внутри [start, end], уже записанные на диск.
+        # Остальное - по исходным значениям: неполные интервалы на краях и хвост, ещё не попавший в агрегаты
+        rolled_start = -(-start_ms // level_ms) * level_ms
+        rolled_stop = max(rolled_start, min((end_ms + 1) // level_ms * level_ms, rolled_end + 1))
+        records = self._read_rollups(level, sizes.get(str(level), 0), rolled_start, rolled_stop - 1)
+        # Время исходных значений - целые мс: границы с запасом 0.5 мс не зависят от округления при переводе в секунды
+        edges = [(start_ms, min(rolled_start - 0.5, end_ms)), (rolled_stop - 0.5, end_ms)]
+        for tag in tags:
+            tag_id = self.tag_ids.get(tag)
+            rows = records[records[:, 1] == tag_id] if tag_id is not None else records[:0]
+            parts = [rows[:, [0, 2, 3, 4, 5]]]
+            for edge_start, edge_end in edges:
+                if edge_start > edge_end:
+                    continue
+                times, values = self.read(tag, edge_start / 1000, edge_end / 1000)
+                if times.size:
+                    edge = aggregate(np.round(times * 1000).astype(np.int64), values.astype(np.float64), level_ms)
+                    parts.append(np.column_stack(edge))
+            merged = np.concatenate(parts)
+            merged = merged[np.argsort(merged[:, 0], kind="stable")]
+            keys, mins, maxs, sums, counts = merge_buckets(*merged.T)
+            # Неполный первый интервал начинается с start
+            keys = np.maximum(keys, start_ms)
+            series[tag] = self._downsample_buckets(keys, mins, maxs, sums, counts, level_ms, end_ms, max_points, mode)
+        return {"resolution": level, "series": series}
+
+    @staticmethod
+    def _downsample_raw(times, values, start_ms, span, max_points, mode):
+        if mode == "raw":
+            return {"t": times.tolist(), "v": values.tolist()}
+        if mode == "lttb":
+            if times.size > max_points:
+                selected = lttb(times, values.astype(np.float64), max_points)
+                times, values = times[selected], values[selected]
+            return {"t": times.tolist(), "v": values.tolist()}
+        values = values.astype(np.float64)
+        if times.size <= max_points:
+            return {"t": times.tolist(), "min": values.tolist(), "max": values.tolist(), "avg": values.tolist()}
+        width = int(np.ceil(span / max_points))
+        keys, mins, maxs, sums, counts = aggregate(np.round(times * 1000).astype(np.int64), values, width, int(start_ms))
+        return {"t": (keys / 1000).tolist(), "min": mins.tolist(), "max": maxs.tolist(), "avg": (sums / counts).tolist()}
+
+    @staticmethod
+    def _downsample_buckets(keys, mins, maxs, sums, counts, level_ms, end_ms, max_points, mode):
+        if mode == "lttb":
+            # Время точки - середина интервала, обрезанного по [start, end]
+            ends = np.minimum((keys // level_ms + 1) * level_ms, end_ms)
+            times, values = (keys + ends) / 2000, sums / counts
+            if times.size > max_points:
+                selected = lttb(times, values, max_points)
+                times, values = times[selected], values[selected]
+            return {"t": times.tolist(), "v": values.tolist()}
+        if keys.size > max_points:
+            # Уровень подробнее, чем нужно - интервалы сводятся в max_points групп равной длительности
+            origin = keys[0]
+            groups = ((keys - origin) * max_points // (keys[-1] - origin + level_ms)).astype(np.int64)
+            firsts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+            _, mins, maxs, sums, counts = merge_buckets(groups, mins, maxs, sums, counts)
+            keys = keys[firsts]
+        return {"t": (keys / 1000).tolist(), "min": mins.tolist(), "max": maxs.tolist(), "avg": (sums / counts).tolist()}
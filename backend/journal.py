@@ -0,0 +1,180 @@
+# journal.py
+import bisect
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+from model_runner import _accepts_dt, _apply_commands, _update
+from session_config import load_config, module_name
+from state import JOURNAL_DIR
+
+
+def _json_default(value):
+    """Значения NumPy -> типы Python, прочее (например, значения OPC) - строкой."""
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class SessionJournal:
+    """
+    Журнал сессии для точного воспроизведения (replay).
+
+    Каталог JOURNAL_DIR/<session_id>/<запуск>/ на каждую загрузку сессии:
+        journal.jsonl         - записи по тактам:
+            {"type": "start", "tick": 0, "config_path", "config_session", ...}
+            {"type": "dt", "tick", "dt"}              - шаг модели с такта tick (пишется при изменении)
+            {"type": "command", "tick", "method", "args"} - вызов модели, применённый перед шагом tick
+            {"type": "inbound", "tick", "status", ...} - входящая команда (OPC, /control/manual) и её исход
+                                                    (OK - поставлена в очередь, ERROR - отклонена)
+            {"type": "override" | "override_clear" | "source", "tick", ...} - действия оператора
+            {"type": "snapshot", "tick", "file"}      - снимок модели после такта tick
+            {"type": "restore", "tick", ...}          - модель восстановлена из снимка (/restore, /rewind)
+        snapshot_<tick>.pkl   - снимок модели (pickle), каждые snapshot_every тактов;
+        snapshot_<tick>_restore<n>.pkl - снимок сразу после восстановления модели:
+            с него replay() продолжает воспроизведение после такта tick.
+
+    Такты отсчитывает исполнитель модели (model_runner): команды из очереди он
+    применяет в начале шага и пишет их в журнал с номером этого шага. Модель с
+    фиксированным зерном (seed) при тех же dt и командах даёт тот же результат,
+    поэтому replay() восстанавливает состояние на любой такт.
+    """
+
+    def __init__(self, session_id, config_path, snapshot_every=600, directory=None, config_session=None):
+        self.session_id = session_id
+        self.snapshot_every = snapshot_every
+        self.run = time.strftime("%Y%m%d-%H%M%S")
+        self.directory = os.path.join(directory or JOURNAL_DIR, session_id, self.run)
+        os.makedirs(self.directory, exist_ok=True)
+        self.tick = 0
+        self.snapshots = []
+        self.restores = 0
+        self._dt = None
+        self._lock = threading.Lock()
+        self._file = open(os.path.join(self.directory, "journal.jsonl"), "a", encoding="utf-8")
+        self._write({"type": "start", "tick": 0, "session_id": session_id,
+                     "config_path": os.path.abspath(config_path),
+                     "config_session": config_session or session_id, "time": time.time()})
+
+    def _write(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, default=_json_default, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def record_step(self, tick, dt, commands):
+        """Такт tick выполнен с шагом dt; commands - применённые перед ним вызовы [(метод, аргументы)]."""
+        if dt != self._dt:
+            self._dt = dt
+            self._write({"type": "dt", "tick": tick, "dt": dt})
+        for name, args in commands:
+            self._write({"type": "command", "tick": tick, "method": name, "args": list(args)})
+        self.tick = tick
+
+    def record_event(self, kind, **data):
+        """Событие оператора или входящая команда; tick - число выполненных тактов на момент события."""
+        self._write({"type": kind, "tick": self.tick, "time": time.time(), **data})
+
+    def snapshot_due(self, tick):
+        return self.snapshot_every and tick % self.snapshot_every == 0
+
+    def save_snapshot(self, tick, data, restore=False):
+        """Сохраняет снимок модели (pickle) после такта tick; restore - снимок после восстановления."""
+        if restore:
+            self.restores += 1
+            name = f"snapshot_{tick:010d}_restore{self.restores}.pkl"
+        else:
+            name = f"snapshot_{tick:010d}.pkl"
+        try:
+            path = os.path.join(self.directory, name)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"[JOURNAL] Ошибка записи снимка сессии {self.session_id}: {e}")
+            return
+        self.snapshots.append(tick)
+        self._write({"type": "snapshot", "tick": tick, "file": name, "restore": restore})
+
+    def close(self):
+        self._write({"type": "end", "tick": self.tick, "time": time.time()})
+        self._file.close()
+
+    def info(self):
+        return {"run": self.run, "tick": self.tick, "snapshots": list(self.snapshots)}
+
+
+def list_runs(session_id, directory=None):
+    path = os.path.join(directory or JOURNAL_DIR, session_id)
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+
+def replay(session_id, run, from_tick=0, to_tick=None, record_every=1, max_records=None,
+           current_tick=None, directory=None):
+    """
+    Воспроизводит запуск run сессии с такта from_tick по to_tick (по умолчанию -
+    последний записанный такт) быстрее реального времени: ближайший снимок не
+    позже from_tick + команды и dt из журнала. Если модель восстанавливали из
+    снимка (restore), после такта восстановления воспроизведение продолжается
+    со снимка, записанного сразу после него.
+    Такты без команд в файл не пишутся, поэтому для идущего запуска номер
+    последнего такта передаётся в current_tick (SessionJournal.tick).
+    Возвращает [{"tick", "status"}] для каждого record_every-го такта начиная с from_tick
+    (не больше max_records точек, иначе ValueError).
+    """
+    run_dir = os.path.join(directory or JOURNAL_DIR, session_id, run)
+    with open(os.path.join(run_dir, "journal.jsonl"), encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if not entries or entries[0]["type"] != "start":
+        raise ValueError("Журнал повреждён: нет записи start")
+
+    # Записи идут в порядке тактов; после восстановления снимок того же такта записан позже
+    snapshots = [e for e in entries if e["type"] == "snapshot"]
+    last_tick = max(max(e["tick"] for e in entries), current_tick or 0)
+    to_tick = last_tick if to_tick is None else to_tick
+    if not 0 <= from_tick <= to_tick <= last_tick:
+        raise ValueError(f"Такты должны удовлетворять 0 <= from_tick <= to_tick <= {last_tick}")
+    if max_records is not None and (to_tick - from_tick) // record_every + 1 > max_records:
+        raise ValueError(f"Слишком много точек траектории, максимум {max_records}. Увеличьте record_every.")
+    position = bisect.bisect_right([e["tick"] for e in snapshots], from_tick) - 1
+    if position < 0:
+        raise ValueError("В журнале нет снимка модели до указанного такта")
+    start_tick = snapshots[position]["tick"]
+    # Восстановления после начального снимка: такт -> снимок (последний за такт)
+    restores = {e["tick"]: e for e in snapshots[position + 1:] if e.get("restore") and e["tick"] <= to_tick}
+
+    dt_changes = [(e["tick"], e["dt"]) for e in entries if e["type"] == "dt"]
+    commands = {}
+    for e in entries:
+        if e["type"] == "command" and start_tick < e["tick"] <= to_tick:
+            commands.setdefault(e["tick"], []).append((e["method"], e["args"]))
+
+    # Классы модели из снимка берутся из модуля config.py сессии
+    # (у копии сессии, созданной /fork, - из модуля исходной сессии)
+    config_session = entries[0].get("config_session", session_id)
+    if module_name(config_session) not in sys.modules:
+        load_config(config_session, entries[0]["config_path"])
+
+    def load_snapshot(entry):
+        name = entry.get("file", f"snapshot_{entry['tick']:010d}.pkl")
+        with open(os.path.join(run_dir, name), "rb") as f:
+            return pickle.load(f)
+
+    model = load_snapshot(snapshots[position])
+    accepts_dt = _accepts_dt(model)
+
+    trajectory = []
+    if from_tick == start_tick:
+        trajectory.append({"tick": start_tick, "status": model.get_status()})
+    dt_ticks = [tick for tick, _ in dt_changes]
+    for tick in range(start_tick + 1, to_tick + 1):
+        if tick - 1 in restores:
+            model = load_snapshot(restores[tick - 1])
+        _apply_commands(model, commands.get(tick, ()))
+        position = bisect.bisect_right(dt_ticks, tick) - 1
+        _update(model, dt_changes[position][1] if position >= 0 else None, accepts_dt)
+        if tick >= from_tick and (tick - from_tick) % record_every == 0:
+            trajectory.append({"tick": tick, "status": model.get_status()})
+    return trajectory
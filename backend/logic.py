@@ -1,7 +1,5 @@
-import asyncio
-
 # Класс ControlLogic теперь импортирует нужные ему словари из state.py, а не ищет их глобально
-from state import control_modes, manual_overrides, opc_adapters, sessions
+from state import control_modes, manual_overrides, opc_adapters, sessions, session_runners, session_journals
 
 
 class ControlLogic:
@@ -9,13 +7,22 @@ class ControlLogic:
         self.manual_overrides = manual_overrides
         self.control_modes = control_modes
          
+    @staticmethod
+    def _journal(session_id, kind, **data):
+        """Запись действия в журнал сессии (если журнал ведётся)."""
+        journal = session_journals.get(session_id)
+        if journal is not None:
+            journal.record_event(kind, **data)
+
     def set_manual_override(self, session_id, component, param, value):
         self.manual_overrides.setdefault(session_id, {})
         self.manual_overrides[session_id][(component, param)] = float(value)
+        self._journal(session_id, "override", component=component, param=param, value=float(value))
     
     def clear_manual_override(self, session_id, component, param):
         if session_id in self.manual_overrides:
             self.manual_overrides[session_id].pop((component, param), None)    
+        self._journal(session_id, "override_clear", component=component, param=param)
 
     def debug_print_overrides(self):
         for sid, overrides in self.manual_overrides.items():
@@ -28,8 +35,30 @@ class ControlLogic:
             return {"status": "ERROR", "message": "Неверный режим"}
         self.control_modes.setdefault(session_id, {})
         self.control_modes[session_id][component] = source
+        self._journal(session_id, "source", component=component, source=source)
         return {"status": "OK"}
 
+    @staticmethod
+    def apply_command(model, component_id, param):
+        """Применяет команду тега к переданной модели (живой или её копии для предпросмотра)."""
+        component_parts = component_id.split("_")
+
+        # Теги команд начинаются с имени насоса (na4_start, NA2_CMD_Zadv_Open, ...):
+        # сравнивается только окончание, чтобы работали станции с любыми насосами (Math/Topology.py)
+        if component_parts[0] == "pump":
+            if param.endswith("_start") and "_oil_" not in param: model.control_pump(int(component_parts[1]), True)
+            elif param.endswith("_stop") and "_oil_" not in param: model.control_pump(int(component_parts[1]), False)
+
+        elif component_parts[0]  == "oil":
+            if param.endswith('_oil_motor_start'): model.control_oil_pump(int(component_parts[2]), True)
+            elif param.endswith('_oil_motor_stop'): model.control_oil_pump(int(component_parts[2]), False)
+
+        elif component_parts[0]  == "valve":
+            if param.endswith('_CMD_Zadv_Open'): model.control_valve(f"{component_parts[1]}_{component_parts[2]}", True)
+            elif param.endswith('_CMD_Zadv_Close'): model.control_valve(f"{component_parts[1]}_{component_parts[2]}", False)
+
+        return component_parts
+
     def process_command(self, session_id, component_id, param, value):
         # self.control_modes.setdefault(session_id, {})
         # self.control_modes[session_id].setdefault(component, "MODEL")
@@ -42,28 +71,20 @@ class ControlLogic:
             return {"status": "ERROR", "message": "Модель не найдена"}
     
         try:
-            component_parts = component_id.split("_")
-            # component_, id_ = component_id.rsplit("_", 1)
-            # id_ = int(id_)
-            # pump_name, param = param.split("_", 1)
-            
-            if component_parts[0] == "pump":
-                if (param  == "na2_start") or (param  == "na4_start"): model.control_pump(int(component_parts[1]), True)
-                elif (param == "na2_stop") or (param == "na4_stop" ): model.control_pump(int(component_parts[1]), False)
-            
-            elif component_parts[0]  == "oil":
-                if (param == 'NA2_oil_motor_start') or (param == 'NA4_oil_motor_start'): model.control_oil_pump(int(component_parts[2]), True)
-                elif (param == 'NA2_oil_motor_stop') or (param == 'NA4_oil_motor_stop'): model.control_oil_pump(int(component_parts[2]), False)
-            
-            elif component_parts[0]  == "valve":
-                if (param == 'NA2_CMD_Zadv_Open') or (param == 'NA4_CMD_Zadv_Open'): model.control_valve(f"{component_parts[1]}_{component_parts[2]}", True)
-                elif (param == 'NA2_CMD_Zadv_Close') or (param == 'NA4_CMD_Zadv_Close') : model.control_valve(f"{component_parts[1]}_{component_parts[2]}", False)
+            # Команда проверяется (номер насоса, ключ задвижки, действие) и ставится в очередь
+            # исполнителя модели; применяется она в начале следующего такта
+            runner = session_runners.get(session_id)
+            component_parts = self.apply_command(runner.commands if runner else model, component_id, param)
             
             print(f"[ControlLogic] В модель передан тег {component_parts} с параметром {param}")
+            self._journal(session_id, "inbound", component=component_id, param=param, value=value, status="OK")
             return {"status": "OK"}
         
         except Exception as e:
             print(f"[ControlLogic] Ошибка обработки команды: {e}")
+            # Отклонённая команда в очередь не попала: в журнале - только её исход, replay её не повторит
+            self._journal(session_id, "inbound", component=component_id, param=param, value=value,
+                          status="ERROR", message=str(e))
             return {"status":"ERROR", "message":str(e)}
     
     def send_command_to_opc(self, session_id, component, param, value):
@@ -78,7 +99,7 @@ class ControlLogic:
             print(f"[OVERRIDE->OPC] заменяем {component}.{param} на {override_value}")
             value = override_value
             
-        # Отправляем в OPC
-        asyncio.create_task(adapter.send_to_opc(component, param, value))
+        # Ставим в очередь OPC - отправка одним запросом в конце такта (opc_utils.send_to_server)
+        adapter.queue_write(component, param, value)
 
 control_logic = ControlLogic()
\ No newline at end of file
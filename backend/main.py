@@ -8,9 +8,10 @@ from fastapi.staticfiles import StaticFiles
 
 # ИЗМЕНЕНИЕ: Убраны лишние импорты, которые больше не используются в этом файле
 from state import (
-    sessions, session_states, opc_adapters
+    sessions, session_states, opc_adapters, session_historians, session_journals
 )
 from api.simulation import api_router as simulation_router
+from session_supervisor import supervisor
 
 # 4 ОПРЕДЕЛЕНИЕ API ЭНДПОИНТОВ
 
@@ -22,6 +23,11 @@ async def lifespan(app: FastAPI):
     tasks = [adapter.disconnect() for adapter in opc_adapters.values()]
     await asyncio.gather(*tasks, return_exceptions=True)
     print("Все адаптеры остановлены.")
+    supervisor.stop()
+    for historian in session_historians.values():
+        historian.close()
+    for journal in session_journals.values():
+        journal.close()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(simulation_router)
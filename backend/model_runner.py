@@ -0,0 +1,436 @@
+# model_runner.py
+import asyncio
+import copy
+import inspect
+import pickle
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from logic import ControlLogic
+from status_cache import publish_snapshot
+from Math.Fork import fork as fork_model
+from Math.Snapshot import load_state, save_state
+
+
+def _accepts_dt(model):
+    return "dt" in inspect.signature(model.update_system).parameters
+
+
+def _update(model, dt, accepts_dt):
+    if accepts_dt:
+        model.update_system(dt)
+    else:
+        model.update_system()
+
+
+def _apply_commands(model, commands):
+    """
+    Применяет к модели вызовы [(метод, аргументы)] из CommandQueue. Ошибка одной
+    команды не прерывает такт: она печатается, остальные команды применяются.
+    Возвращает применённые команды - только они попадают в журнал сессии.
+    """
+    applied = []
+    for name, args in commands:
+        try:
+            getattr(model, name)(*args)
+        except Exception as e:
+            print(f"[ControlLogic] Ошибка обработки команды {name}{tuple(args)}: {e}")
+        else:
+            applied.append((name, args))
+    return applied
+
+
+def _command_limits(model):
+    """Допустимые аргументы команд модели (None - модель их не описывает, команды не проверяются)."""
+    command_limits = getattr(model, "command_limits", None)
+    return command_limits() if command_limits is not None else None
+
+
+def _load_state(model, data):
+    """Восстанавливает модель из двоичного снимка и пересобирает её статус (новая версия тегов)."""
+    load_state(model, data)
+    refresh = getattr(model, "_refresh_status", None)
+    if refresh is not None:
+        refresh()
+
+
+def _preview(model, steps, dt, commands, record_every):
+    """Прогон копии модели; commands - [(step, component, param)]."""
+    actions = {}
+    for step, component, param in commands:
+        actions.setdefault(step, []).append(
+            lambda m, c=component, p=param: ControlLogic.apply_command(m, c, p)
+        )
+    return model.simulate(steps, dt, actions, record_every)
+
+
+class CommandQueue:
+    """
+    Очередь команд управления модели.
+    Подставляется в ControlLogic.apply_command вместо модели: вызовы control_*
+    не выполняются сразу, а копятся и применяются исполнителем (в цикле событий,
+    потоке или процессе модели) перед очередным шагом. deque.append/popleft
+    потокобезопасны, блокировка не нужна.
+
+    Если задан limits (BKNS.command_limits()), команда проверяется сразу при
+    вызове: неверный номер насоса или ключ задвижки - ValueError вызывающему,
+    а не ошибка в логе на следующем такте.
+    """
+
+    def __init__(self, limits=None):
+        self._queue = deque()
+        self.limits = limits
+
+    def __getattr__(self, name):
+        if not name.startswith("control_"):
+            raise AttributeError(name)
+        return lambda *args: self._put(name, args)
+
+    def _put(self, name, args):
+        if self.limits is not None:
+            self.limits.check(name, args)
+        self._queue.append((name, args))
+
+    def drain(self):
+        """Забирает все накопленные команды [(имя метода, аргументы)]."""
+        commands = []
+        while True:
+            try:
+                commands.append(self._queue.popleft())
+            except IndexError:
+                return commands
+
+
+class _Runner:
+    """
+    Общее для исполнителей: команды копятся в CommandQueue и применяются в
+    начале очередного шага; исполнитель считает такты (ticks) и передаёт шаги
+    и применённые команды в журнал сессии (journal.SessionJournal), если он подключён.
+
+    Исполнитель также снимает и восстанавливает двоичные снимки модели
+    (Math/Snapshot.py) между шагами и, если заданы контрольные точки
+    (configure_checkpoints), раз в interval секунд кладёт снимок в кольцевой
+    буфер из keep снимков - для перемотки назад (rewind).
+    """
+
+    def __init__(self, session_id, model):
+        self.session_id = session_id
+        self.model = model
+        self.commands = CommandQueue(_command_limits(model))
+        self.ticks = 0
+        self.journal = None
+        self.checkpoints = deque()  # (время, такт, снимок)
+        self.checkpoint_interval = None
+
+    def configure_checkpoints(self, interval=10.0, keep=90):
+        self.checkpoint_interval = interval
+        self.checkpoints = deque(self.checkpoints, maxlen=keep)
+
+    def _after_step(self, dt, commands):
+        self.ticks += 1
+        journal = self.journal
+        if journal is not None:
+            journal.record_step(self.ticks, dt, commands)
+            if journal.snapshot_due(self.ticks):
+                journal.save_snapshot(self.ticks, self._dump_model())
+        if self.checkpoint_interval is not None:
+            now = time.time()
+            if not self.checkpoints or now - self.checkpoints[-1][0] >= self.checkpoint_interval:
+                self.checkpoints.append((now, self.ticks, self._save_state()))
+        publish_snapshot(self.session_id, self.model)
+
+    def _save_state(self):
+        return save_state(self.model)
+
+    def _load_state(self, data):
+        _load_state(self.model, data)
+
+    def _restore(self, data, reason):
+        """Восстановление между шагами; в журнал - событие и снимок после восстановления."""
+        self._load_state(data)
+        if self.journal is not None:
+            self.journal.record_event("restore", reason=reason)
+            self.journal.save_snapshot(self.ticks, self._dump_model(), restore=True)
+        publish_snapshot(self.session_id, self.model)
+
+    def _rewind(self, seconds):
+        """Восстанавливает последнюю контрольную точку не новее seconds секунд назад."""
+        deadline = time.time() - seconds
+        while self.checkpoints and self.checkpoints[-1][0] > deadline:
+            checkpoint = self.checkpoints.pop()
+            if not self.checkpoints:
+                # Точки старше нет - остаётся самая старая из имеющихся
+                self.checkpoints.append(checkpoint)
+                break
+        if not self.checkpoints:
+            raise ValueError("Нет контрольных точек")
+        created, tick, data = self.checkpoints[-1]
+        self._restore(data, f"rewind {seconds} s")
+        return {"time": created, "tick": tick}
+
+    def checkpoint_info(self):
+        now = time.time()
+        return [{"time": created, "age": now - created, "tick": tick, "bytes": len(data)}
+                for created, tick, data in list(self.checkpoints)]
+
+    def _dump_model(self):
+        """Снимок модели для журнала (pickle)."""
+        return pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _attach_journal(self, journal):
+        journal.tick = self.ticks
+        journal.save_snapshot(self.ticks, self._dump_model())
+        self.journal = journal
+
+    async def _call(self, fn, *args):
+        """Выполняет fn между шагами модели (в режиме inline - сразу, в цикле событий)."""
+        return fn(*args)
+
+    async def attach_journal(self, journal):
+        """Подключает журнал: снимок модели на текущий такт, дальше - все шаги и команды."""
+        await self._call(self._attach_journal, journal)
+
+    async def snapshot(self):
+        """Двоичный снимок модели: (такт, bytes)."""
+        return await self._call(lambda: (self.ticks, self._save_state()))
+
+    async def restore(self, data, reason="restore"):
+        """Восстанавливает модель из двоичного снимка (ValueError - снимок не подходит)."""
+        await self._call(self._restore, data, reason)
+
+    async def rewind(self, seconds):
+        return await self._call(self._rewind, seconds)
+
+    async def fork(self, session_id):
+        """Исполнитель того же режима для сессии session_id с копией модели (Math/Fork.py)."""
+        model = await self._call(fork_model, self.model)
+        runner = type(self)(session_id, model)
+        await runner.start()
+        return runner
+
+
+class InlineRunner(_Runner):
+    """Режим "inline": модель шагает прямо в цикле событий (как раньше)."""
+
+    mode = "inline"
+
+    def __init__(self, session_id, model):
+        super().__init__(session_id, model)
+        self._accepts_dt = _accepts_dt(model)
+
+    async def start(self):
+        pass
+
+    def _step(self, dt):
+        commands = _apply_commands(self.model, self.commands.drain())
+        _update(self.model, dt, self._accepts_dt)
+        self._after_step(dt, commands)
+
+    async def step(self, dt):
+        """Шаг модели и публикация снимка статуса для /status."""
+        self._step(dt)
+
+    async def preview(self, steps, dt, commands, record_every):
+        # Копия снимается в цикле событий, между тактами update_loop
+        model = copy.deepcopy(self.model)
+        return await asyncio.to_thread(_preview, model, steps, dt, commands, record_every)
+
+    def close(self):
+        pass
+
+
+class ThreadRunner(InlineRunner):
+    """
+    Режим "thread": модель шагает в отдельном потоке сессии.
+
+    Цикл событий только ждёт завершения шага. Снимок статуса публикуется из
+    потока модели заменой ссылки на неизменяемый кортеж (status_cache), поэтому
+    /status и OPC-подписки не ждут расчёт. Команды применяются потоком модели.
+    """
+
+    mode = "thread"
+
+    def __init__(self, session_id, model):
+        super().__init__(session_id, model)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"model-{session_id}")
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def step(self, dt):
+        await self._call(self._step, dt)
+
+    async def preview(self, steps, dt, commands, record_every):
+        # Копия снимается в потоке модели (между шагами), прогон - в общем пуле потоков
+        model = await asyncio.get_running_loop().run_in_executor(self.executor, copy.deepcopy, self.model)
+        return await asyncio.to_thread(_preview, model, steps, dt, commands, record_every)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ModelProxy:
+    """
+    Заместитель модели в основном процессе для режима "process".
+
+    Хранит последний статус, присланный процессом модели, и версии тегов -
+    тот же интерфейс get_status/get_changes/status_version, что у BKNS.
+    Каждый такт собирается новый словарь статуса, старый не изменяется.
+    """
+
+    def __init__(self):
+        self.status_version = 0
+        self._status = {}
+        self._tag_versions = {}
+
+    def _apply_changes(self, changes):
+        if not changes:
+            return
+        version = self.status_version + 1
+        status = dict(self._status)
+        tag_versions = dict(self._tag_versions)
+        for component, params in changes.items():
+            status[component] = {**status.get(component, {}), **params}
+            for param in params:
+                tag_versions[(component, param)] = version
+        self._status = status
+        self._tag_versions = tag_versions
+        self.status_version = version
+
+    def get_status(self):
+        return self._status
+
+    def get_changes(self, since=None):
+        status, tag_versions = self._status, self._tag_versions
+        if since is None:
+            return self.status_version, status
+        changes = {}
+        for (component, param), version in tag_versions.items():
+            if version > since:
+                changes.setdefault(component, {})[param] = status[component][param]
+        return self.status_version, changes
+
+
+class _ChangeTracker:
+    """Изменения статуса модели с прошлого такта (в процессе модели)."""
+
+    def __init__(self, model):
+        self.model = model
+        self.version = None
+        self.last_status = {}
+
+    def collect(self):
+        get_changes = getattr(self.model, "get_changes", None)
+        if get_changes is not None:
+            self.version, changes = get_changes(self.version)
+            return changes
+        changes = {}
+        for component, params in self.model.get_status().items():
+            old = self.last_status.get(component, {})
+            for param, value in params.items():
+                if param not in old or old[param] != value:
+                    changes.setdefault(component, {})[param] = value
+        self.last_status = {component: dict(params) for component, params in self.model.get_status().items()}
+        return changes
+
+
+class ProcessRunner(_Runner):
+    """
+    Режим "process": модель живёт в рабочем процессе пула (session_supervisor),
+    вне GIL основного процесса; один процесс может обслуживать несколько сессий.
+
+    Рабочий процесс сам загружает config.py сессии. За такт основной процесс
+    передаёт dt и накопленные команды, а получает только изменившиеся теги; они
+    применяются к ModelProxy, который стоит в sessions вместо модели.
+    Обмен идёт из отдельного потока, цикл событий его не ждёт. Предпросмотр
+    выполняется рабочим процессом и на время прогона задерживает его такты.
+    """
+
+    mode = "process"
+
+    def __init__(self, session_id, config_path, supervisor, fork_of=None):
+        super().__init__(session_id, ModelProxy())
+        self.config_path = config_path
+        self.supervisor = supervisor
+        self.fork_of = fork_of
+        self.worker = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"model-{session_id}")
+
+    def _start(self):
+        self.worker = self.supervisor.place(self.session_id, near=self.fork_of)
+        try:
+            if self.fork_of is not None:
+                changes, limits = self.worker.request("fork", self.session_id, self.fork_of)
+            else:
+                changes, limits = self.worker.request("load", self.session_id, self.config_path)
+        except Exception:
+            self.supervisor.release(self.session_id)
+            raise
+        self.commands.limits = limits
+        self.model._apply_changes(changes)
+        publish_snapshot(self.session_id, self.model)
+
+    async def start(self):
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._start)
+
+    def _step(self, dt):
+        # Процесс модели возвращает изменения статуса и применённые команды
+        changes, commands = self.worker.request("step", self.session_id, dt, self.commands.drain())
+        self.model._apply_changes(changes)
+        self._after_step(dt, commands)
+
+    def _dump_model(self):
+        return self.worker.request("snapshot", self.session_id)
+
+    def _save_state(self):
+        return self.worker.request("save_state", self.session_id)
+
+    def _load_state(self, data):
+        self.model._apply_changes(self.worker.request("load_state", self.session_id, data))
+
+    async def _call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def step(self, dt):
+        await self._call(self._step, dt)
+
+    async def fork(self, session_id):
+        # Копия создаётся в том же рабочем процессе и делит с моделью-источником параметры
+        runner = ProcessRunner(session_id, self.config_path, self.supervisor, fork_of=self.session_id)
+        await runner.start()
+        return runner
+
+    async def preview(self, steps, dt, commands, record_every):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.worker.request, "preview", self.session_id, steps, dt, commands, record_every
+        )
+
+    def _close(self):
+        if not self.worker.process.is_alive():
+            return
+        try:
+            self.worker.request("unload", self.session_id)
+        except Exception as e:
+            print(f"[SYSTEM] Не удалось выгрузить модель сессии {self.session_id}: {e}")
+        self.supervisor.release(self.session_id)
+
+    def close(self):
+        if self.worker is not None:
+            self.executor.submit(self._close)
+        self.executor.shutdown(wait=False)
+
+
+RUNNERS = {"inline": InlineRunner, "thread": ThreadRunner, "process": ProcessRunner}
+
+
+def create_runner(mode, session_id, model, config_path, supervisor=None):
+    """
+    Исполнитель модели для режима EXECUTION_MODE из config.py сессии.
+    Для режима "process" нужен supervisor - пул рабочих процессов (session_supervisor).
+    """
+    if mode not in RUNNERS:
+        raise ValueError(f"Неизвестный режим исполнения модели: {mode}. Допустимо: {tuple(RUNNERS)}")
+    if mode == "process":
+        return ProcessRunner(session_id, config_path, supervisor)
+    return RUNNERS[mode](session_id, model)
@@ -2,6 +2,7 @@
 # 1. ИМПОРТЫ
 # =============================================================================
 import asyncio
+import time
 from asyncua import Client, ua, Node
 
 
@@ -17,6 +18,12 @@ class OPCAdapter:
     # -------------------------------------------------------------------------
     # 2.1. Конструктор и конфигурация
     # -------------------------------------------------------------------------
+    # Ограничения очереди записи
+    MAX_PENDING_WRITES = 2000  # максимум различных тегов в очереди
+    WRITER_COUNT = 2           # число писателей, разбирающих очередь
+    WRITE_BATCH_SIZE = 200     # тегов в одном WriteRequest
+    WRITE_TIMEOUT = 5.0        # с, ожидание ответа сервера на запись
+
     def __init__(self, server_url, control_logic, sessions, sync_function, session_id: str):
         self.client = Client(url=server_url)
         self.control_logic = control_logic
@@ -24,6 +31,21 @@ class OPCAdapter:
         self.is_running = False
         self.last_sent_values = {}
         self.sync_function = sync_function
+        # Ограниченная очередь записи: (component_id, param) -> значение (последнее побеждает)
+        self.pending_writes = {}
+        self._writes_ready = asyncio.Event()
+        self._writer_tasks = []
+        self.write_stats = {
+            "queued": 0,        # поставлено в очередь
+            "superseded": 0,    # заменено более новым значением до отправки
+            "dropped": 0,       # отброшено из-за переполнения очереди
+            "written": 0,       # успешно записано
+            "failed": 0,        # ошибки записи
+            "batches": 0,       # выполнено WriteRequest
+            "last_latency_ms": 0.0,
+            "max_latency_ms": 0.0,
+            "total_latency_ms": 0.0,
+        }
         
         self.sessions = sessions
         self.session_id = session_id 
@@ -95,6 +117,10 @@ class OPCAdapter:
             "ns=1;i=404": {"mode": "monitor", "component_id": "oil_system_1", "param": "temperature"},
         }
 
+        # Обратный индекс (component_id, param) -> (Node, VariantType) для записи без перебора карты
+        self.node_index = {}
+        self._build_node_index()
+
     # -------------------------------------------------------------------------
     # 2.2. Основной цикл работы и управление подключением
     # -------------------------------------------------------------------------
@@ -103,6 +129,7 @@ class OPCAdapter:
             try:
                 await self.connect()
                 await self.setup_subscriptions()
+                self._start_writers()
                 
                 print("[OPC Adapter] Соединение установлено. Запуск полной синхронизации...")
                 
@@ -113,6 +140,7 @@ class OPCAdapter:
             except Exception as e:
                 print(f"[OPC Adapter CRITICAL] Ошибка: {e}. Переподключение через 10с.")
                 
+                self._stop_writers()
                 if self.is_running: await self.disconnect()
                 await asyncio.sleep(10)
 
@@ -120,11 +148,13 @@ class OPCAdapter:
         """Устанавливает соединение с OPC UA сервером."""
         print("[OPC Adapter] Подключение...")
         await self.client.connect()
+        self._build_node_index()
         self.is_running = True
         print("[OPC Adapter] Успешно подключено!")
 
     async def disconnect(self):
         """Разрывает соединение с OPC UA сервером."""
+        self._stop_writers()
         if self.is_running:
             await self.client.disconnect()
             self.is_running = False
@@ -170,36 +200,114 @@ class OPCAdapter:
         else:
             print("[OPC Adapter] Нет тегов управления для подписки.")
 
-    async def send_to_opc(self, component_id, param, value):
-        """Находит NodeId по параметру и отправляет значение на сервер."""
+    def _build_node_index(self):
+        """Строит индекс (component_id, param) -> (Node, VariantType) по OPC_NODE_MAPPING."""
+        index = {}
+        for nid, info in self.OPC_NODE_MAPPING.items():
+            variant_type = ua.VariantType.Boolean if info["mode"] in ["control", "status"] else ua.VariantType.Double
+            index[(info["component_id"], info["param"])] = (self.client.get_node(nid), variant_type)
+        self.node_index = index
+
+    def queue_write(self, component_id, param, value):
+        """
+        Ставит значение в очередь записи; отправку выполняют писатели после flush().
+        Более новое значение тега заменяет ещё не отправленное. При переполнении
+        очереди новые теги отбрасываются - они уйдут при следующей полной синхронизации.
+        """
         key = (component_id, param)
-        # if self.last_sent_values.get(key) == value:
-        #     return
+        if key in self.pending_writes:
+            self.write_stats["superseded"] += 1
+        elif len(self.pending_writes) >= self.MAX_PENDING_WRITES:
+            self.write_stats["dropped"] += 1
+            return
+        self.pending_writes[key] = value
+        self.write_stats["queued"] += 1
 
-        # self.last_sent_values[key] = value
+    def flush(self):
+        """Передаёт накопленные записи писателям, не дожидаясь ответа сервера."""
+        if self.pending_writes:
+            self._writes_ready.set()
 
-        node_id = None
-        for nid, info in self.OPC_NODE_MAPPING.items():
-            if info["component_id"] == component_id and info["param"] == param:
-                variant_type = ua.VariantType.Boolean if info["mode"] in ["control", "status"] else ua.VariantType.Double
-                node_id = nid
-                break
+    def get_write_stats(self):
+        """Состояние очереди записи: глубина, отброшенные/заменённые записи и задержка записи."""
+        stats = dict(self.write_stats)
+        total_latency_ms = stats.pop("total_latency_ms")
+        stats["avg_latency_ms"] = total_latency_ms / stats["batches"] if stats["batches"] else 0.0
+        stats["queue_depth"] = len(self.pending_writes)
+        stats["writers"] = sum(1 for task in self._writer_tasks if not task.done())
+        return stats
+
+    def _start_writers(self):
+        """Запускает фиксированный пул писателей очереди."""
+        self._stop_writers()
+        self._writer_tasks = [asyncio.create_task(self._writer()) for _ in range(self.WRITER_COUNT)]
+        self.flush()
+
+    def _stop_writers(self):
+        for task in self._writer_tasks:
+            task.cancel()
+        self._writer_tasks = []
 
-        if not node_id:
-            print(f"[OPC WRITE] Не найден NodeId для {component_id}.{param}")
+    async def _writer(self):
+        """Писатель: забирает из очереди пачку тегов и отправляет её одним WriteRequest."""
+        while True:
+            await self._writes_ready.wait()
+            if not self.pending_writes:
+                self._writes_ready.clear()
+                continue
+            keys = list(self.pending_writes)[:self.WRITE_BATCH_SIZE]
+            batch = {key: self.pending_writes.pop(key) for key in keys}
+            await self._write_batch(batch)
+
+    async def _write_batch(self, pending):
+        """Отправляет пачку значений одним WriteRequest."""
+        keys, nodes, variants = [], [], []
+        for (component_id, param), value in pending.items():
+            entry = self.node_index.get((component_id, param))
+            if entry is None:
+                self.write_stats["failed"] += 1
+                print(f"[OPC WRITE] Не найден NodeId для {component_id}.{param}")
+                continue
+            node, variant_type = entry
+            try:
+                variants.append(ua.Variant(value, variant_type))
+            except Exception as e:
+                self.write_stats["failed"] += 1
+                print(f"[OPC WRITE ERROR] Не удалось преобразовать {component_id}.{param} -> {value}: {e}")
+                continue
+            keys.append((component_id, param, value))
+            nodes.append(node)
+
+        if not nodes:
             return
 
+        stats = self.write_stats
+        started = time.perf_counter()
         try:
+            results = await asyncio.wait_for(
+                self.client.write_values(nodes, variants, raise_on_partial_error=False),
+                timeout=self.WRITE_TIMEOUT
+            )
+        except Exception as e:
+            stats["failed"] += len(nodes)
+            print(f"[OPC WRITE ERROR] Не удалось записать {len(nodes)} тегов: {e!r}")
+            return
 
-            # 2. Создаем переменную `variant` нужного OPC UA типа
-            variant = ua.Variant(value, variant_type)
-            # =======================================================
+        latency_ms = (time.perf_counter() - started) * 1000
+        stats["batches"] += 1
+        stats["last_latency_ms"] = latency_ms
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], latency_ms)
+        stats["total_latency_ms"] += latency_ms
 
-            # 3. Получаем ноду и записываем в нее созданный `variant`
-            node = self.client.get_node(node_id)
-            await node.write_value(variant)
-            
-            print(f"[OPC WRITE] {component_id}.{param} = {value}")
-        except Exception as e:
-            # Теперь эта ошибка точно исчезнет
-            print(f"[OPC WRITE ERROR] Не удалось записать {component_id}.{param} -> {value}: {e}")
\ No newline at end of file
+        for (component_id, param, value), result in zip(keys, results):
+            if result.is_good():
+                stats["written"] += 1
+            else:
+                stats["failed"] += 1
+                print(f"[OPC WRITE ERROR] Не удалось записать {component_id}.{param} -> {value}: {result}")
+        print(f"[OPC WRITE] Записано тегов: {len(nodes)} (одним запросом, {latency_ms:.1f} мс)")
+
+    async def send_to_opc(self, component_id, param, value):
+        """Ставит значение параметра в очередь и будит писателей."""
+        self.queue_write(component_id, param, value)
+        self.flush()
\ No newline at end of file
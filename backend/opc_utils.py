@@ -3,14 +3,13 @@ import time
 
 from state import (
     sessions, session_states, previous_states, session_last_full_sync,
-    opc_adapters, FULL_SYNC_INTERVAL
+    session_status_versions, session_publish_filters, opc_adapters, FULL_SYNC_INTERVAL
 )
 from logic import control_logic
 
 
 async def send_to_server(session_id, force_send_all=False):
     model = sessions[session_id]
-    current_state = model.get_status()
     
     now = time.time()
     
@@ -21,18 +20,41 @@ async def send_to_server(session_id, force_send_all=False):
         last_sync_time = session_last_full_sync.get(session_id, 0)
         if now - last_sync_time >= FULL_SYNC_INTERVAL:
             force_send_all = True
+            session_last_full_sync[session_id] = now
             print(f"[SYNC] Автоматическая полная синхронизация для {session_id}...")
     
     for (component, param), override_value in control_logic.manual_overrides.get(session_id, {}).items():
         control_logic.send_command_to_opc(session_id, component, param, override_value)
     
-    for component, params in current_state.items():
+    get_changes = getattr(model, "get_changes", None)
+    if get_changes is not None:
+        # Модель сама отслеживает изменившиеся теги - отправляем только их
+        since = None if force_send_all else session_status_versions.get(session_id)
+        version, changes = get_changes(since)
+        session_status_versions[session_id] = version
+    else:
+        changes = {}
+        current_state = model.get_status()
+        for component, params in current_state.items():
+            for param, value in params.items():
+                key = (component, param)
+                if force_send_all or previous_states[session_id].get(key) != value:
+                    changes.setdefault(component, {})[param] = value
+                    previous_states[session_id][key] = value
+
+    # Зона нечувствительности и минимальный интервал публикации (PUBLISH_FILTER сессии)
+    publish_filter = session_publish_filters.get(session_id)
+    if publish_filter is not None:
+        changes = publish_filter.apply(changes, now, force=force_send_all)
+
+    for component, params in changes.items():
         for param, value in params.items():
-            key = (component, param)
-            if force_send_all or previous_states[session_id].get(key) != value:
-               # await opc_adapters[session_id].send_to_opc(component, param, value)
-                control_logic.send_command_to_opc(session_id, component, param, value)
-                previous_states[session_id][key] = value
+            control_logic.send_command_to_opc(session_id, component, param, value)
+                
+    # Все изменения такта передаются писателям адаптера (отправка пачками, без ожидания сервера)
+    adapter = opc_adapters.get(session_id)
+    if adapter is not None and adapter.is_running:
+        adapter.flush()
                 
     if force_send_all:
         print("[SYNC] Полная синхронизация завершена.")
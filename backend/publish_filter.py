@@ -0,0 +1,109 @@
+# publish_filter.py
+from fnmatch import fnmatchcase
+import time
+
+
+class PublishFilter:
+    """
+    Фильтр публикации тегов в OPC: зона нечувствительности (deadband) и
+    минимальный интервал публикации для каждого тега.
+
+    Конфигурация задаётся в config.py сессии переменной PUBLISH_FILTER:
+        {
+            "default": {"deadband": 0.0, "percent": 0.0, "min_interval": 0.0},
+            "tags": {"*_AI_Qmom_n": {"deadband": 0.1, "min_interval": 2.0}, ...},
+        }
+    Ключи "tags" - имена параметров (допускаются шаблоны fnmatch), первый
+    подходящий шаблон дополняет настройки "default".
+
+    deadband - абсолютная зона, percent - зона в процентах от последнего
+    опубликованного значения (берётся большая из двух). Числовое значение
+    внутри зоны не публикуется. Если зону значение покинуло раньше
+    min_interval, оно откладывается: за интервал копится только последнее
+    значение, и оно уходит при следующей проверке. Дискретные теги (bool)
+    публикуются при любом изменении сразу.
+    """
+
+    DEFAULT = {"deadband": 0.0, "percent": 0.0, "min_interval": 0.0}
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.default = {**self.DEFAULT, **config.get("default", {})}
+        self.tag_rules = list(config.get("tags", {}).items())
+        self._settings = {}   # param -> итоговые настройки тега
+        self.published = {}   # (component, param) -> (значение, время публикации)
+        self.pending = {}     # (component, param) -> последнее отложенное значение
+
+    def settings(self, param):
+        """Настройки тега с учётом шаблонов (кэшируются по имени параметра)."""
+        settings = self._settings.get(param)
+        if settings is None:
+            settings = self.default
+            for pattern, rule in self.tag_rules:
+                if fnmatchcase(param, pattern):
+                    settings = {**self.default, **rule}
+                    break
+            self._settings[param] = settings
+        return settings
+
+    def apply(self, changes, now=None, force=False):
+        """
+        Отбирает из changes {component: {param: value}} значения для публикации.
+        При force публикуется всё (полная синхронизация), отложенные значения сбрасываются.
+        """
+        now = time.time() if now is None else now
+        result = {}
+
+        if force:
+            self.pending.clear()
+            for component, params in changes.items():
+                for param, value in params.items():
+                    self.published[(component, param)] = (value, now)
+                result[component] = dict(params)
+            return result
+
+        for component, params in changes.items():
+            for param, value in params.items():
+                key = (component, param)
+                if self._should_publish(key, value, now):
+                    result.setdefault(component, {})[param] = value
+
+        # Отложенные значения, у которых истёк минимальный интервал
+        for key, value in list(self.pending.items()):
+            component, param = key
+            if now - self.published[key][1] >= self.settings(param)["min_interval"]:
+                del self.pending[key]
+                self.published[key] = (value, now)
+                result.setdefault(component, {})[param] = value
+
+        return result
+
+    def _should_publish(self, key, value, now):
+        last = self.published.get(key)
+        if last is None or not _is_analog(value) or not _is_analog(last[0]):
+            if last is not None and last[0] == value:
+                return False
+            self.pending.pop(key, None)
+            self.published[key] = (value, now)
+            return True
+
+        last_value, last_time = last
+        settings = self.settings(key[1])
+        band = max(settings["deadband"], abs(last_value) * settings["percent"] / 100.0)
+        if abs(value - last_value) <= band:
+            # Значение вернулось в зону - отложенная публикация больше не нужна
+            self.pending.pop(key, None)
+            return False
+
+        if now - last_time < settings["min_interval"]:
+            self.pending[key] = value
+            return False
+
+        self.pending.pop(key, None)
+        self.published[key] = (value, now)
+        return True
+
+
+def _is_analog(value):
+    """Числовой (не дискретный) тег, к которому применяется зона нечувствительности."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -0,0 +1,98 @@
+# session_config.py
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+from Math.Fork import fork
+
+
+def module_name(session_id):
+    return f"session_config_{session_id}"
+
+
+def load_config(session_id, config_path):
+    """
+    Загружает config.py сессии и регистрирует модуль в sys.modules, чтобы классы
+    модели из него можно было сериализовать (pickle) для снимков журнала.
+    """
+    name = module_name(session_id)
+    spec = importlib.util.spec_from_file_location(name, config_path)
+    config_module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = config_module
+    try:
+        spec.loader.exec_module(config_module)
+    except Exception:
+        sys.modules.pop(name, None)
+        raise
+    return config_module
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class SessionTemplate:
+    """
+    Загруженный и проверенный config.py сессии.
+
+    config.py выполняется один раз; его MODEL служит шаблоном и сам не
+    шагает - каждая загрузка сессии получает копию (create_model) с общими
+    параметрами (Math/Fork.py). Если в config.py SEED = None, копия получает
+    новое случайное зерно, как при выполнении config.py заново.
+    """
+
+    def __init__(self, session_id, path, stamp, digest):
+        self.session_id = session_id
+        self.path = path
+        self.stamp = stamp
+        self.digest = digest
+        self.module = load_config(session_id, path)
+        model = getattr(self.module, "MODEL", None)
+        if model is None:
+            raise ValueError(f"В {path} не задана модель MODEL")
+        for method in ("update_system", "get_status"):
+            if not callable(getattr(model, method, None)):
+                raise ValueError(f"У модели MODEL из {path} нет метода {method}()")
+
+    def create_model(self):
+        """Новый экземпляр модели сессии в начальном состоянии."""
+        model = fork(self.module.MODEL)
+        if "SEED" in vars(self.module) and self.module.SEED is None and hasattr(model, "reseed"):
+            model.reseed(None)
+        return model
+
+
+_templates = {}  # session_id -> SessionTemplate
+_templates_lock = threading.Lock()
+
+
+def get_template(session_id, config_path):
+    """
+    Шаблон сессии из кэша. config.py выполняется заново, только если файл
+    изменился: сначала сравниваются время изменения и размер, при их
+    несовпадении - хэш содержимого.
+    """
+    path = os.path.abspath(config_path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _templates_lock:
+        template = _templates.get(session_id)
+        if template is not None and template.path == path:
+            if template.stamp == stamp:
+                return template
+            digest = _digest(path)
+            if digest == template.digest:
+                template.stamp = stamp
+                return template
+        else:
+            digest = _digest(path)
+        started = time.perf_counter()
+        template = SessionTemplate(session_id, path, stamp, digest)
+        _templates[session_id] = template
+        print(f"[SESSION] Шаблон сессии {session_id} загружен из {path} "
+              f"за {(time.perf_counter() - started) * 1000:.0f} мс")
+        return template
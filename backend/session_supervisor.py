@@ -0,0 +1,187 @@
+# session_supervisor.py
+import copy
+import multiprocessing
+import pickle
+import threading
+
+from Math.Snapshot import save_state
+from Math.Fork import fork
+from model_runner import _ChangeTracker, _accepts_dt, _apply_commands, _command_limits, _load_state, _preview, _update
+from session_config import get_template
+from state import MODEL_WORKERS
+
+# Рабочие процессы запускаются заново (spawn), а не копией основного процесса:
+# в нём уже работают цикл событий, потоки OPC и исполнителей моделей
+_mp = multiprocessing.get_context("spawn")
+
+
+def _worker_main(conn):
+    """
+    Рабочий процесс пула: хранит модели нескольких сессий и выполняет запросы
+    основного процесса (session_id, вид запроса, аргументы) по очереди.
+    """
+    models = {}  # session_id -> (модель, принимает ли update_system dt, _ChangeTracker)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        kind, session_id, *args = request
+        if kind == "close":
+            return
+        try:
+            if kind == "load":
+                config_path, = args
+                model = get_template(session_id, config_path).create_model()
+                tracker = _ChangeTracker(model)
+                models[session_id] = (model, _accepts_dt(model), tracker)
+                conn.send(("ok", (tracker.collect(), _command_limits(model))))
+            elif kind == "fork":
+                source_id, = args
+                model, accepts_dt, _ = models[source_id]
+                model = fork(model)
+                tracker = _ChangeTracker(model)
+                models[session_id] = (model, accepts_dt, tracker)
+                conn.send(("ok", (tracker.collect(), _command_limits(model))))
+            elif kind == "step":
+                dt, commands = args
+                model, accepts_dt, tracker = models[session_id]
+                applied = _apply_commands(model, commands)
+                _update(model, dt, accepts_dt)
+                conn.send(("ok", (tracker.collect(), applied)))
+            elif kind == "preview":
+                steps, dt, commands, record_every = args
+                model = models[session_id][0]
+                conn.send(("ok", _preview(copy.deepcopy(model), steps, dt, commands, record_every)))
+            elif kind == "snapshot":
+                conn.send(("ok", pickle.dumps(models[session_id][0], protocol=pickle.HIGHEST_PROTOCOL)))
+            elif kind == "save_state":
+                conn.send(("ok", save_state(models[session_id][0])))
+            elif kind == "load_state":
+                data, = args
+                model, _, tracker = models[session_id]
+                _load_state(model, data)
+                conn.send(("ok", tracker.collect()))
+            elif kind == "unload":
+                models.pop(session_id, None)
+                conn.send(("ok", None))
+            else:
+                conn.send(("error", f"Неизвестный запрос: {kind}"))
+        except ValueError as e:
+            # Неверные аргументы запроса (например, неподходящий снимок) - ValueError и в основном процессе
+            conn.send(("invalid", str(e)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class WorkerHandle:
+    """Рабочий процесс пула и канал к нему; запросы разных сессий идут по каналу по очереди."""
+
+    def __init__(self, index):
+        self.index = index
+        self.sessions = set()
+        self._lock = threading.Lock()
+        self._conn, child_conn = _mp.Pipe()
+        self.process = _mp.Process(
+            target=_worker_main, args=(child_conn,), name=f"model-worker-{index}", daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def request(self, kind, session_id, *args):
+        """Блокирующий запрос к рабочему процессу (вызывается из потока исполнителя сессии)."""
+        with self._lock:
+            if not self.process.is_alive():
+                raise RuntimeError(f"Рабочий процесс {self.index} завершился (код {self.process.exitcode})")
+            self._conn.send((kind, session_id, *args))
+            status, payload = self._conn.recv()
+        if status == "invalid":
+            raise ValueError(payload)
+        if status == "error":
+            raise RuntimeError(f"Сессия {session_id}, процесс {self.index}: {payload}")
+        return payload
+
+    def stop(self):
+        if self.process.is_alive():
+            with self._lock:
+                try:
+                    self._conn.send(("close", None))
+                except OSError:
+                    pass
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+
+
+class SessionSupervisor:
+    """
+    Размещение моделей сессий (режим исполнения "process") по пулу рабочих процессов.
+
+    Пул ограничен max_workers (MODEL_WORKERS, по умолчанию - число ядер); процессы
+    запускаются по мере загрузки сессий. Новая сессия попадает в процесс с
+    наименьшим числом сессий, поэтому 20+ сессий распределяются по всем ядрам.
+    Основной процесс (API, OPC, панель) обращается к модели только через
+    WorkerHandle, который ему выдаёт place().
+    """
+
+    def __init__(self, max_workers=MODEL_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self.workers = []
+        self.placement = {}  # session_id -> WorkerHandle
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def place(self, session_id, near=None):
+        """
+        Выбирает рабочий процесс для сессии (запускает новый, пока пул не заполнен).
+        near - сессия, в процесс которой нужно поместить эту (копия модели при fork).
+        """
+        with self._lock:
+            worker = self.placement.get(session_id)
+            if worker is not None:
+                return worker
+            self.workers = [w for w in self.workers if w.process.is_alive()]
+            idle = [w for w in self.workers if not w.sessions]
+            if near is not None and near in self.placement:
+                worker = self.placement[near]
+            elif idle:
+                worker = idle[0]
+            elif len(self.workers) < self.max_workers:
+                worker = WorkerHandle(self._started)
+                self._started += 1
+                self.workers.append(worker)
+            else:
+                worker = min(self.workers, key=lambda w: len(w.sessions))
+            worker.sessions.add(session_id)
+            self.placement[session_id] = worker
+            return worker
+
+    def release(self, session_id):
+        with self._lock:
+            worker = self.placement.pop(session_id, None)
+            if worker is not None:
+                worker.sessions.discard(session_id)
+
+    def stop(self):
+        with self._lock:
+            for worker in self.workers:
+                worker.stop()
+            self.workers = []
+            self.placement.clear()
+
+    def get_stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "workers": [
+                {
+                    "index": w.index,
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "sessions": sorted(w.sessions),
+                }
+                for w in self.workers
+            ],
+        }
+
+
+supervisor = SessionSupervisor()
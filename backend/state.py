@@ -6,9 +6,27 @@ FULL_SYNC_INTERVAL = 30
 
 SESSIONS_DIR = "./sessions"
 
+# Число рабочих процессов для моделей в режиме исполнения "process" (см. session_supervisor.py)
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", os.cpu_count() or 1))
+
+# Каталог архива значений тегов (см. historian.py)
+HISTORY_DIR = os.getenv("HISTORY_DIR", "./history")
+
+# Каталог журналов сессий для воспроизведения (см. journal.py)
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "./journal")
+
 sessions = {}
 session_states = {}  # session_id -> {"running": True/False}
 previous_states = {}  # session_id -> dict previous values
+session_status_versions = {}  # session_id -> версия статуса модели, уже отправленная в OPC
+session_publish_filters = {}  # session_id -> PublishFilter (зоны нечувствительности тегов)
+session_broadcasters = {}  # session_id -> StateBroadcaster (потоковая раздача состояния в панель)
+session_snapshots = {}  # session_id -> (версия, ETag, JSON bytes) - кэш ответа /status
+session_schedulers = {}  # session_id -> TickScheduler (частота тактов update_loop)
+session_runners = {}  # session_id -> исполнитель модели (model_runner: inline/thread/process)
+session_historians = {}  # session_id -> Historian (архив значений тегов на диске)
+session_journals = {}  # session_id -> SessionJournal (команды и снимки для воспроизведения)
+session_configs = {}  # session_id -> (сессия, чей config.py загружен; путь к config.py) - для /fork
 session_last_full_sync = {}
 
 manual_overrides = {}  # session_id -> { (component, param): value }
@@ -0,0 +1,63 @@
+# status_cache.py
+import json
+import zlib
+
+from state import session_snapshots
+
+
+def json_default(value):
+    """Значения NumPy (np.bool_, np.float64 и т.п.) -> типы Python для JSON."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    """Компактный JSON с поддержкой значений NumPy."""
+    return json.dumps(data, default=json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def publish_snapshot(session_id, model):
+    """
+    Сериализует статус модели в JSON один раз и сохраняет его как неизменяемый снимок
+    (ETag, bytes). Для моделей с версией статуса (status_version) снимок не
+    пересобирается, пока версия не изменилась.
+    """
+    version = getattr(model, "status_version", None)
+    cached = session_snapshots.get(session_id)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    status = model.get_status()
+    # get_status мог впервые собрать снимок модели и поднять версию
+    version = getattr(model, "status_version", None)
+    body = dumps(status).encode("utf-8")
+    if version is not None:
+        etag = f'"{session_id}-{id(model):x}-{version}"'
+    else:
+        etag = f'"{session_id}-{zlib.crc32(body):08x}"'
+    session_snapshots[session_id] = (version, etag, body)
+    return etag, body
+
+
+def get_snapshot(session_id, model):
+    """
+    Текущий снимок статуса (ETag, bytes). Обычно его заранее публикует update_loop;
+    здесь снимок собирается только при первом обращении или если версия модели ушла вперёд.
+    """
+    cached = session_snapshots.get(session_id)
+    version = getattr(model, "status_version", None)
+    if cached is None or (version is not None and cached[0] != version):
+        return publish_snapshot(session_id, model)
+    return cached[1], cached[2]
+
+
+def etag_matches(if_none_match, etag):
+    """Проверка заголовка If-None-Match (список ETag, допускаются слабые W/ и *)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,118 @@
+# tick_scheduler.py
+import asyncio
+import math
+from collections import deque
+
+import numpy as np
+
+
+class TickScheduler:
+    """
+    Планировщик тактов update_loop с фиксированной частотой.
+
+    Сроки тактов отсчитываются от первого такта (start + n * period), поэтому
+    время работы такта не накапливается в дрейф. Если такт не уложился в период
+    (перегрузка), действует политика:
+        "skip"     - пропущенные такты не выполняются; следующий такт ждёт ближайшего
+                     срока, а шаг модели dt увеличивается на пропущенное время;
+        "catch_up" - пропущенные такты выполняются подряд без ожидания (не более
+                     max_catch_up подряд, дальше - как "skip").
+    wait() возвращает шаг модели dt (с) для очередного такта.
+    """
+
+    POLICIES = ("skip", "catch_up")
+    MIN_RATE_HZ = 0.1
+    MAX_RATE_HZ = 50.0
+
+    def __init__(self, rate_hz=1.0, policy="skip", max_catch_up=10, history=1000):
+        self.max_catch_up = max_catch_up
+        self.jitter = deque(maxlen=history)     # опоздание пробуждения относительно срока, с
+        self.work_time = deque(maxlen=history)  # длительность работы такта, с
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.caught_up = 0
+        self.set_rate(rate_hz, policy)
+
+    def set_rate(self, rate_hz, policy=None):
+        """Меняет частоту (Гц) и, при необходимости, политику перегрузки; отсчёт начинается заново."""
+        policy = policy or getattr(self, "policy", "skip")
+        if not self.MIN_RATE_HZ <= rate_hz <= self.MAX_RATE_HZ:
+            raise ValueError(f"Частота тактов должна быть в диапазоне {self.MIN_RATE_HZ}..{self.MAX_RATE_HZ} Гц")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Неизвестная политика: {policy}. Допустимо: {self.POLICIES}")
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.policy = policy
+        self.reset()
+
+    def reset(self):
+        """
+        Сбрасывает отсчёт сроков (например, после паузы на ошибку). Отсчёт начинается
+        заново со следующего вызова wait(): такт, который уже ждёт своего срока
+        (set_rate из обработчика API), доходит по прежнему отсчёту.
+        """
+        self._restart = True
+
+    async def wait(self):
+        """Ожидает срока следующего такта; возвращает шаг модели dt."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._restart:
+            self._restart = False
+            self._next = now
+            self._last_wake = now
+            self._behind = 0
+            self.ticks += 1
+            return self.period
+
+        self.work_time.append(now - self._last_wake)
+        self._next += self.period
+        dt = self.period
+
+        if now > self._next:
+            self.overruns += 1
+            if self.policy == "catch_up" and self._behind < self.max_catch_up:
+                # Догоняем: такт сразу, шаг модели обычный
+                self._behind += 1
+                self.caught_up += 1
+                self.jitter.append(now - self._next)
+                self._last_wake = now
+                self.ticks += 1
+                return dt
+            # Пропускаем просроченные такты; модель делает один увеличенный шаг
+            missed = math.floor((now - self._next) / self.period) + 1
+            self.skipped += missed
+            self._next += missed * self.period
+            dt += missed * self.period
+
+        self._behind = 0
+        await asyncio.sleep(self._next - now)
+        wake = loop.time()
+        self.jitter.append(wake - self._next)
+        self._last_wake = wake
+        self.ticks += 1
+        return dt
+
+    def get_stats(self):
+        """Статистика тактов: частота, перегрузки, пропуски и джиттер пробуждения (мс)."""
+        jitter = np.fromiter(self.jitter, dtype=float) * 1000
+        work = np.fromiter(self.work_time, dtype=float) * 1000
+        return {
+            "rate_hz": self.rate_hz,
+            "period_ms": self.period * 1000,
+            "policy": self.policy,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "caught_up": self.caught_up,
+            "jitter_ms": {
+                "mean": float(jitter.mean()) if jitter.size else 0.0,
+                "p95": float(np.percentile(jitter, 95)) if jitter.size else 0.0,
+                "max": float(jitter.max()) if jitter.size else 0.0,
+            },
+            "work_ms": {
+                "mean": float(work.mean()) if work.size else 0.0,
+                "max": float(work.max()) if work.size else 0.0,
+            },
+        }
@@ -26,6 +26,15 @@ export const getSimulationStatus = (sessionId) => {
   return api.get(`/simulation/${sessionId}/status`);
 };
 
+// Подписаться на поток состояния сессии (Server-Sent Events):
+// первое сообщение - полный снимок, далее раз за такт - только изменения
+export const subscribeSimulationStream = (sessionId, onMessage, onError) => {
+  const source = new EventSource(`${api.defaults.baseURL}/simulation/${sessionId}/stream`);
+  source.onmessage = (event) => onMessage(JSON.parse(event.data));
+  if (onError) source.onerror = (event) => onError(event, source);
+  return source;
+};
+
 // Получить режимы управления
 export const getControlModes = (sessionId) => {
   return api.get(`/simulation/${sessionId}/control_modes`);
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import * as api from '../api/twinApi';
 import ComponentCard from '../components/ComponentCard';
@@ -15,6 +15,32 @@ function Dashboard() {
   const [inletPressure, setInletPressure] = useState(0);
   const [outletPressure, setOutletPressure] = useState(0);
 
+  // Последний полный статус модели {component: {param: value}} - к нему применяются изменения из потока
+  const statusRef = useRef({});
+
+  // Раскладываем плоский статус по группам и считаем суммарные давления
+  const applyStatus = useCallback((flatData) => {
+    statusRef.current = flatData;
+    const grouped = { pumps: {}, valves: {}, oil_systems: {} };
+    for (const [key, value] of Object.entries(flatData)) {
+      if (key.startsWith("pump_"))grouped.pumps[key] = value; 
+      else if (key.startsWith("valve_out_")) grouped.valves[key] = value;
+      else if (key.startsWith("oil_system_")) grouped.oil_systems[key] = value;
+    }
+    setModelStatus(grouped);
+
+    let totalInPressure = 0;
+    let totalOutPressure = 0;
+    for (const params of Object.values(grouped.pumps)) {
+        for (const [key, value] of Object.entries(params)) {
+            if (key.endsWith('pressure_in')) totalInPressure += value;
+            if (key.endsWith('pressure_out')) totalOutPressure += value;
+        }
+    }
+    setInletPressure(totalInPressure);
+    setOutletPressure(totalOutPressure);
+  }, []);
+
   // Оборачиваем fetchData в useCallback, чтобы функция не создавалась заново при каждом рендере.
   // Это важно для стабильной работы useEffect.
   const fetchData = useCallback(async () => {
@@ -54,25 +80,7 @@ function Dashboard() {
 
 
       // 1. Обрабатываем статус модели (мы знаем, что он успешен)
-      const flatData = statusResult.value.data || {}; // Добавлена проверка на components
-      const grouped = { pumps: {}, valves: {}, oil_systems: {} };
-      for (const [key, value] of Object.entries(flatData)) {
-        if (key.startsWith("pump_"))grouped.pumps[key] = value; 
-        else if (key.startsWith("valve_out_")) grouped.valves[key] = value;
-        else if (key.startsWith("oil_system_")) grouped.oil_systems[key] = value;
-      }
-      setModelStatus(grouped);
-
-      let totalInPressure = 0;
-      let totalOutPressure = 0;
-      for (const params of Object.values(grouped.pumps)) {
-          for (const [key, value] of Object.entries(params)) {
-              if (key.endsWith('pressure_in')) totalInPressure += value;
-              if (key.endsWith('pressure_out')) totalOutPressure += value;
-          }
-      }
-      setInletPressure(totalInPressure);
-      setOutletPressure(totalOutPressure);
+      applyStatus(statusResult.value.data || {}); // Добавлена проверка на components
 
       // 2. Обрабатываем режимы управления (если запрос был успешен)
       if (modesResult.status === 'fulfilled') {
@@ -88,16 +96,52 @@ function Dashboard() {
       console.error("Произошла критическая ошибка в fetchData:", err);
       setError("Произошла непредвиденная ошибка. Проверьте консоль.");
     }
-  }, [sessionId]); // Зависимость только от sessionId
+  }, [sessionId, applyStatus]);
 
-  // Хук для периодического вызова fetchData
+  // Подписка на поток состояния (SSE) вместо опроса каждые 2 секунды:
+  // сервер присылает снимок при подключении и далее только изменения за такт
   useEffect(() => {
+    if (!sessionId) return;
     fetchData(); // Вызываем сразу при загрузке
-    const interval = setInterval(fetchData, 2000); // И далее каждые 2 секунды
+
+    let source = null;
+    let retryTimer = null;
+
+    const onMessage = (message) => {
+      if (message.type === 'snapshot') {
+        applyStatus(message.status || {});
+      } else if (message.changes) {
+        const merged = { ...statusRef.current };
+        for (const [component, params] of Object.entries(message.changes)) {
+          merged[component] = { ...merged[component], ...params };
+        }
+        applyStatus(merged);
+      }
+      if (message.control_modes) setControlModes(message.control_modes);
+      if (message.state) setSimulationMode(message.state);
+      setError(null);
+    };
+
+    const onError = (event, failedSource) => {
+      // Браузер сам переподключается после обрыва, но не после ответа с ошибкой (например, 404,
+      // пока сессия загружается) - тогда переподключаемся сами
+      if (failedSource.readyState === EventSource.CLOSED) {
+        setError(`Сессия '${sessionId}' загружается...`);
+        retryTimer = setTimeout(connect, 2000);
+      }
+    };
+
+    const connect = () => {
+      source = api.subscribeSimulationStream(sessionId, onMessage, onError);
+    };
+    connect();
 
     // Функция очистки при размонтировании компонента
-    return () => clearInterval(interval);
-  }, [fetchData]); // Зависимость от memoized-функции fetchData
+    return () => {
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [sessionId, fetchData, applyStatus]);
 
   return (
     <div className="App">